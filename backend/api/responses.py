@@ -0,0 +1,142 @@
+"""
+HTTP 响应工具 - 压缩协商(gzip / br / zstd)、流式压缩、ETag 条件请求
+
+br 和 zstd 依赖可选包 brotli / zstandard, 未安装时不参与协商。
+扫描完成后结果不再变化, ETag 由任务与结果版本决定, 命中 If-None-Match 时直接返回 304。
+"""
+import hashlib
+import zlib
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from models.schemas import ScanResult
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 可选依赖
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+
+# 服务端偏好顺序
+_PREFERENCE = ('zstd', 'br', 'gzip')
+
+# 小于此字节数的响应不压缩
+MIN_COMPRESS_BYTES = 1024
+
+
+def available_encodings() -> tuple:
+    return tuple(e for e in _PREFERENCE if
+                 e == 'gzip' or (e == 'br' and brotli is not None) or (e == 'zstd' and zstandard is not None))
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """按 Accept-Encoding 选择压缩方式, 都不接受时返回 None(不压缩)"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(','):
+        token, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip().lower()] = q
+    wildcard = accepted.get('*', 0.0)
+    candidates = [e for e in available_encodings() if accepted.get(e, wildcard) > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda e: accepted.get(e, wildcard))
+
+
+def _compressor(encoding: str) -> Callable[[Optional[bytes]], bytes]:
+    """返回流式压缩函数: 传入数据块返回压缩输出, 传入 None 表示结束"""
+    if encoding == 'gzip':
+        z = zlib.compressobj(6, zlib.DEFLATED, 31)
+        return lambda data: z.flush() if data is None else z.compress(data)
+    if encoding == 'br':
+        b = brotli.Compressor(quality=5)
+        return lambda data: b.finish() if data is None else b.process(data)
+    if encoding == 'zstd':
+        c = zstandard.ZstdCompressor(level=3).compressobj()
+        return lambda data: c.flush() if data is None else c.compress(data)
+    raise ValueError(f"不支持的压缩方式: {encoding}")
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    compress = _compressor(encoding)
+    for chunk in chunks:
+        out = compress(chunk)
+        if out:
+            yield out
+    yield compress(None)
+
+
+def result_etag(result: ScanResult, variant: str = '') -> str:
+    """结果版本的实体标签(同一 task_id 升级为完整扫描后标签随之改变)"""
+    key = f"{result.task_id}|{result.scan_mode}|{result.scan_time.isoformat()}|{variant}"
+    return hashlib.md5(key.encode('utf-8')).hexdigest()[:16]
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def encoded_response(request: Request, body: Union[bytes, Iterable[bytes], Callable[[], bytes]], etag: str,
+                     media_type: str = "application/json",
+                     headers: Optional[dict] = None, compressible: bool = True) -> Response:
+    """
+    按请求协商压缩并处理条件请求
+
+    Args:
+        body: 完整字节串, 逐段产出字节串的迭代器(流式输出),
+              或生成字节串的函数(只在需要输出内容时调用, 命中 304 时不生成)
+        compressible: 内容本身已压缩(如 Parquet)时传 False
+        etag: 未压缩内容的实体标签(不含引号), 压缩后的标签追加压缩方式
+    """
+    deferred = callable(body)
+    streaming = not deferred and not isinstance(body, (bytes, bytearray))
+    encoding = negotiate_encoding(request.headers.get('accept-encoding')) if compressible else None
+    if not streaming and not deferred and len(body) < MIN_COMPRESS_BYTES:
+        encoding = None
+
+    tag = f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+    headers = {
+        **(headers or {}),
+        'ETag': tag,
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': 'no-cache',
+    }
+    if _matches(request.headers.get('if-none-match'), tag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    if deferred:
+        body = body()
+    if not streaming:
+        content = b''.join(compress_stream([body], encoding)) if encoding else body
+        return Response(content=content, media_type=media_type, headers=headers)
+
+    # 同步迭代器由 StreamingResponse 放到线程池中执行, 编码/压缩不阻塞事件循环
+    chunks = compress_stream(body, encoding) if encoding else body
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
@@ -2,80 +2,84 @@
 API 路由
 """
 import os
-import asyncio
 import subprocess
 import platform
 from pathlib import Path
-from typing import Dict
-from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Header, Query, Request
 from fastapi.responses import StreamingResponse, Response
-from utils.export_utils import generate_export_html
+from utils.export_utils import iter_export_html, load_report_template
+from utils.json_utils import dumps, iter_result_json
+from utils.manifest_export import ManifestWriter, MANIFEST_FORMATS
+from utils import metrics
 from sse_starlette.sse import EventSourceResponse
 
-from models.schemas import ScanRequest, OpenFileRequest, ScanProgress, ScanResult
-from scanner.pipeline import ScanPipeline
-from .sse import progress_generator
+from models.schemas import ScanRequest, OpenFileRequest, ScanProgress, ScanResult, ScanJob, ScanJobStatus
+from config.settings import settings
+from scanner.pipeline import ScanPipeline, new_task_id
+from scanner.job_runner import JobRunner
+from storage import iter_result_texts, create_state_backend
+from scanner.archive_reader import ARCHIVE_SEPARATOR
+from .responses import encoded_response, result_etag
+from .sse import ProgressFeed, progress_generator
 
 router = APIRouter()
 
-# 全局扫描管线实例
+# 全局扫描管线实例(读取结果/索引/目录树; 扫描在子进程或独立扫描进程中执行)
 pipeline = ScanPipeline()
 
-# 进度队列存储
-progress_queues: Dict[str, asyncio.Queue] = {}
+# 任务状态后端(单进程时在内存中, 多进程部署时共享 SQLite)与进度订阅
+state_backend = create_state_backend()
+progress_feed = ProgressFeed(state_backend)
 
-# 线程池执行器
-executor = ThreadPoolExecutor(max_workers=2)
+# 本进程的扫描执行器(扫描在子进程中执行, 不占用请求处理的 GIL)
+job_runner = JobRunner(state_backend, pipeline.store, settings.state.local_workers)
+
+# 定期上报本进程的运行指标, 任一 API 进程的 /metrics 都能看到全部进程
+metrics_publisher = metrics.MetricsPublisher(state_backend)
+
+
+def start_background():
+    """
+    启动扫描执行器和指标上报(应用启动时调用)
+
+    不能在导入时启动: spawn 启动的扫描子进程会重新导入主模块。
+    """
+    job_runner.start()
+    metrics_publisher.start()
+
+
+def stop_background(timeout: float = 10):
+    """停止指标上报和扫描执行器(应用关闭时调用)"""
+    metrics_publisher.stop()
+    job_runner.stop(timeout)
+
+# 报告模板目录(启动时编译模板)
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+load_report_template(TEMPLATE_DIR)
+
+# 已渲染的报告: task_id -> (结果对象, HTML字节串); 结果移出内存时一并清理
+rendered_reports: Dict[str, Tuple[ScanResult, bytes]] = {}
+pipeline.store.add_evict_listener(lambda task_id: rendered_reports.pop(task_id, None))
 
 
 @router.post("/scan/start")
-async def start_scan(request: ScanRequest, background_tasks: BackgroundTasks):
+async def start_scan(request: ScanRequest):
     """启动扫描任务"""
-    scan_path = request.path
-    
-    # 验证路径
-    if not os.path.exists(scan_path):
-        raise HTTPException(status_code=400, detail=f"路径不存在: {scan_path}")
-    if not os.path.isdir(scan_path):
-        raise HTTPException(status_code=400, detail=f"路径不是目录: {scan_path}")
-    
-    # 创建进度队列
-    task_id = None
-    progress_queue = asyncio.Queue()
-    
-    def run_scan():
-        nonlocal task_id
-        
-        def on_progress(progress: ScanProgress):
-            # 将进度放入队列
-            asyncio.run_coroutine_threadsafe(
-                progress_queue.put(progress),
-                loop
-            )
-        
-        task_id = pipeline.start_scan(scan_path, on_progress)
-        progress_queues[task_id] = progress_queue
-    
-    # 获取当前事件循环
-    loop = asyncio.get_event_loop()
-    
-    # 在后台线程中执行扫描
-    future = loop.run_in_executor(executor, run_scan)
-    
-    # 等待任务ID生成
-    await asyncio.sleep(0.1)
-    
-    # 如果task_id还没生成,先返回一个临时ID
-    temp_id = "pending"
-    
-    return {"task_id": temp_id, "status": "started", "message": "扫描任务已启动"}
+    task_id = _submit_request(request)
+    return {"task_id": task_id, "status": "started", "message": "扫描任务已启动"}
 
 
 @router.post("/scan/start_sync")
 async def start_scan_sync(request: ScanRequest):
     """同步启动扫描任务(用于SSE)"""
+    task_id = _submit_request(request)
+    return {"task_id": task_id, "status": "started"}
+
+
+def _submit_request(request: ScanRequest) -> str:
+    """校验扫描请求并提交(模式/抽样参数/优先级按请求)"""
     scan_path = request.path
     
     # 验证路径
@@ -83,51 +87,75 @@ async def start_scan_sync(request: ScanRequest):
         raise HTTPException(status_code=400, detail=f"路径不存在: {scan_path}")
     if not os.path.isdir(scan_path):
         raise HTTPException(status_code=400, detail=f"路径不是目录: {scan_path}")
+    if request.mode not in ("deep", "quick", "sample"):
+        raise HTTPException(status_code=400, detail=f"不支持的扫描模式: {request.mode}")
+    if request.sample_rate is not None and not 0 < request.sample_rate <= 1:
+        raise HTTPException(status_code=400, detail="抽样比例须在(0, 1]之间")
     
-    # 创建进度队列
-    progress_queue = asyncio.Queue()
-    loop = asyncio.get_event_loop()
-    
-    task_id_holder = {"id": None}
-    
-    def on_progress(progress: ScanProgress):
-        task_id_holder["id"] = progress.task_id
-        try:
-            asyncio.run_coroutine_threadsafe(
-                progress_queue.put(progress),
-                loop
-            )
-        except Exception:
-            pass
-    
-    # 在后台线程中执行扫描
-    def run_scan():
-        return pipeline.start_scan(scan_path, on_progress)
-    
-    # 启动扫描
-    future = loop.run_in_executor(executor, run_scan)
+    return _submit(ScanJob(task_id=new_task_id(), **request.model_dump()))
+
+
+@router.post("/scan/upgrade/{task_id}")
+async def upgrade_scan(task_id: str, priority: int = Query(0, description="优先级(数值大的先执行)")):
+    """将快速扫描升级为完整扫描(复用遍历结果, 沿用同一task_id)"""
+    result = pipeline.get_result(task_id)
+    if result is None or result.scan_mode != "quick":
+        raise HTTPException(status_code=404, detail="快速扫描任务不存在")
+    job = state_backend.get_job(task_id)
+    if job is not None and job.mode == "upgrade" and job.status in ("queued", "running"):
+        raise HTTPException(status_code=409, detail="该任务正在升级")
     
-    # 等待第一个进度消息获取task_id
-    try:
-        first_progress = await asyncio.wait_for(progress_queue.get(), timeout=5.0)
-        task_id = first_progress.task_id
-        progress_queues[task_id] = progress_queue
-        
-        # 把第一个进度放回队列
-        await progress_queue.put(first_progress)
-        
-        return {"task_id": task_id, "status": "started"}
-    except asyncio.TimeoutError:
-        raise HTTPException(status_code=500, detail="启动扫描超时")
+    _submit(ScanJob(task_id=task_id, path=result.scan_path, mode="upgrade", priority=priority))
+    return {"task_id": task_id, "status": "started"}
+
+
+@router.delete("/scan/{task_id}")
+async def cancel_scan(task_id: str):
+    """取消任务: 排队中的任务直接取消, 执行中的任务在处理完当前文件后停止"""
+    job = state_backend.cancel(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    if job.status not in ("queued", "running", "cancelled"):
+        raise HTTPException(status_code=409, detail=f"任务已结束: {job.status}")
+    status = "cancelling" if job.status == "running" else job.status
+    return {"task_id": task_id, "status": status}
+
+
+@router.get("/scan/status/{task_id}")
+async def get_scan_status(task_id: str):
+    """查询任务状态(排队位置、执行者、最近一次进度)"""
+    job = state_backend.get_job(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    latest = state_backend.latest(task_id)
+    return ScanJobStatus(
+        job=job,
+        progress=latest[1] if latest else None,
+        queue_position=state_backend.queue_position(task_id),
+    )
+
+
+@router.get("/scan/jobs")
+async def list_scan_jobs(status: Optional[str] = Query(None, description="逗号分隔的状态, 如 queued,running"),
+                         limit: int = Query(100, ge=1, le=1000)):
+    """按提交时间倒序列出任务"""
+    statuses = [s.strip() for s in status.split(",") if s.strip()] if status else None
+    return state_backend.list_jobs(statuses, limit)
+
+
+def _submit(job: ScanJob) -> str:
+    """提交到任务队列, 由空闲的执行者领取; 进度经状态后端推送"""
+    state_backend.submit(job)
+    return job.task_id
 
 
 @router.get("/scan/progress/{task_id}")
-async def get_scan_progress(task_id: str):
-    """获取扫描进度(SSE流)"""
-    queue = progress_queues.get(task_id)
-    
-    if not queue:
-        # 如果没有队列,检查是否已完成
+async def get_scan_progress(task_id: str,
+                            last_event_id: Optional[str] = Header(None),
+                            since: Optional[int] = Query(None, ge=0)):
+    """获取扫描进度(SSE流); 重连时按 Last-Event-ID(或 since 参数)补发之后的事件"""
+    if state_backend.latest(task_id) is None:
+        # 如果没有进度记录,检查是否已完成
         result = pipeline.get_result(task_id)
         if result:
             # 返回完成状态
@@ -144,16 +172,106 @@ async def get_scan_progress(task_id: str):
             return EventSourceResponse(completed_generator())
         raise HTTPException(status_code=404, detail="任务不存在")
     
-    return EventSourceResponse(progress_generator(queue))
+    resume_from = since if since is not None else _parse_event_id(last_event_id)
+    return EventSourceResponse(progress_generator(progress_feed, task_id, resume_from))
+
+
+def _parse_event_id(value: Optional[str]) -> int:
+    try:
+        return max(0, int(value)) if value else 0
+    except ValueError:
+        return 0
 
 
 @router.get("/scan/result/{task_id}")
-async def get_scan_result(task_id: str):
-    """获取扫描结果"""
+async def get_scan_result(task_id: str, request: Request):
+    """获取扫描结果(流式输出, 文件清单由列式表逐批编码)"""
     result = pipeline.get_result(task_id)
     if not result:
         raise HTTPException(status_code=404, detail="扫描结果不存在")
-    return result
+    return encoded_response(request, iter_result_json(result), result_etag(result, "result"))
+
+
+@router.get("/scan/summary/{task_id}")
+async def get_scan_summary(task_id: str, request: Request):
+    """获取结果摘要(统计数据, 不含文件清单和分组明细)"""
+    index = _get_index(task_id)
+    return encoded_response(request, dumps(index.summary()), result_etag(index.result, "summary"))
+
+
+@router.get("/scan/files/{task_id}")
+async def get_scan_files(task_id: str, request: Request,
+                         category: Optional[List[str]] = Query(None),
+                         file_type: Optional[List[str]] = Query(None),
+                         quality_tag: Optional[List[str]] = Query(None),
+                         needs_ocr: Optional[bool] = None,
+                         needs_review: Optional[bool] = None,
+                         min_size: Optional[int] = Query(None, ge=0),
+                         max_size: Optional[int] = Query(None, ge=0),
+                         sort: Optional[str] = None,
+                         order: str = Query("asc", pattern="^(asc|desc)$"),
+                         offset: int = Query(0, ge=0), limit: int = Query(100, ge=0, le=1000),
+                         fields: Optional[str] = Query(None, description="逗号分隔的投影字段")):
+    """分页获取文件清单(筛选 + 排序 + 字段投影)"""
+    index = _get_index(task_id)
+    filters = {
+        'category': category,
+        'file_type': file_type,
+        'quality_tag': quality_tag,
+        'needs_ocr': None if needs_ocr is None else [needs_ocr],
+        'needs_review': None if needs_review is None else [needs_review],
+    }
+    projection = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+    try:
+        page = index.files(filters, min_size, max_size, sort, order == "desc", offset, limit, projection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _page_response(request, index, page)
+
+
+@router.get("/scan/duplicates/{task_id}")
+async def get_duplicate_groups(task_id: str, request: Request,
+                               sort: str = Query("count", pattern="^(count|size)$"),
+                               offset: int = Query(0, ge=0), limit: int = Query(50, ge=0, le=1000)):
+    """分页获取重复文件组"""
+    index = _get_index(task_id)
+    return _page_response(request, index, index.duplicate_groups(sort, offset, limit))
+
+
+@router.get("/scan/similar/{task_id}")
+async def get_similar_groups(task_id: str, request: Request,
+                             sort: str = Query("similarity", pattern="^(similarity|count)$"),
+                             offset: int = Query(0, ge=0), limit: int = Query(50, ge=0, le=1000)):
+    """分页获取相似文档组"""
+    index = _get_index(task_id)
+    return _page_response(request, index, index.similar_groups(sort, offset, limit))
+
+
+def _page_response(request: Request, index, page):
+    """分页结果: 标签由结果版本和查询参数决定"""
+    variant = f"{request.url.path}?{request.url.query}"
+    return encoded_response(request, dumps(page), result_etag(index.result, variant))
+
+
+def _get_index(task_id: str):
+    index = pipeline.get_index(task_id)
+    if index is None:
+        raise HTTPException(status_code=404, detail="扫描结果不存在")
+    return index
+
+
+@router.get("/scan/tree/{task_id}")
+async def get_scan_tree(task_id: str, path: Optional[str] = None,
+                        offset: int = Query(0, ge=0), limit: int = Query(100, ge=0, le=1000),
+                        sort: str = Query("name", pattern="^(name|size|files)$")):
+    """获取目录树的一层(目录汇总 + 子目录汇总 + 直接文件), 前端逐级展开"""
+    tree = pipeline.get_tree(task_id)
+    if tree is None:
+        raise HTTPException(status_code=404, detail="扫描结果不存在")
+    view = tree.view(path, offset, limit, sort)
+    if view is None:
+        raise HTTPException(status_code=404, detail="目录不存在")
+    return view
 
 
 @router.post("/file/open")
@@ -161,6 +279,10 @@ async def open_file(request: OpenFileRequest):
     """打开本地文件"""
     file_path = request.path
     
+    # 归档成员没有磁盘路径, 打开其所在的顶层归档
+    if ARCHIVE_SEPARATOR in file_path:
+        file_path = file_path.split(ARCHIVE_SEPARATOR, 1)[0]
+    
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="文件不存在")
     
@@ -184,6 +306,15 @@ async def health_check():
     return {"status": "ok"}
 
 
+@router.get("/metrics")
+async def get_metrics():
+    """运行指标(Prometheus 文本格式), 合并所有上报中的进程"""
+    if not settings.metrics.enabled:
+        raise HTTPException(status_code=404, detail="运行指标未启用")
+    body = metrics.render(metrics.collect(state_backend))
+    return Response(content=body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @router.get("/folder/browse")
 async def browse_folder():
     """打开系统文件夹选择对话框"""
@@ -238,27 +369,96 @@ async def browse_folder():
 
 
 @router.get("/report/export/{task_id}")
-async def export_report(task_id: str):
-    """导出HTML报告"""
+async def export_report(task_id: str, request: Request):
+    """导出HTML报告(首次流式渲染并缓存, 之后直接返回缓存)"""
     result = pipeline.get_result(task_id)
     if not result:
         raise HTTPException(status_code=404, detail="未找到扫描结果")
     
-    # 定位模板目录
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    backend_dir = os.path.dirname(current_dir)
-    template_dir = os.path.join(backend_dir, "templates")
+    filename = f"RAG_Assessment_Report_{task_id}.html"
+    cached = rendered_reports.get(task_id)
+    hit = cached is not None and cached[0] is result
+    metrics.cache_lookup("report", hit)
+    body = cached[1] if hit else _render_report(task_id, result)
+    
+    return encoded_response(
+        request, body, result_etag(result, "export"),
+        media_type="text/html; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@router.get("/report/manifest/{task_id}")
+async def export_manifest(task_id: str, request: Request,
+                          format: str = Query("csv", pattern="^(csv|jsonl|parquet)$"),
+                          fields: Optional[str] = Query(None, description="逗号分隔的导出列")):
+    """导出逐文件清单(CSV / JSONL / Parquet), 流式输出"""
+    result = pipeline.get_result(task_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="未找到扫描结果")
     
+    columns = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
     try:
-        html_content = generate_export_html(result, template_dir)
-        filename = f"RAG_Assessment_Report_{task_id}.html"
-        
-        return Response(
-            content=html_content,
-            media_type="text/html",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"生成报告失败: {str(e)}")
+        chunks = ManifestWriter(result, columns).iter_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    media_type, ext = MANIFEST_FORMATS[format]
+    return encoded_response(
+        request, chunks, result_etag(result, f"manifest:{format}:{fields or ''}"),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=manifest_{task_id}.{ext}"},
+        compressible=format != "parquet",
+    )
+
+
+@router.get("/texts/{file_hash}")
+async def get_text(file_hash: str, request: Request,
+                   format: str = Query("json", pattern="^(json|text)$")):
+    """按内容哈希获取提取的文本(json: 含分段边界; text: 纯文本)"""
+    record = pipeline.text_store.get(file_hash)
+    if record is None:
+        raise HTTPException(status_code=404, detail="文本不存在")
+    # 内容寻址, 同一哈希的文本不会变化
+    if format == "text":
+        body = "\n\n".join(s for s in record["segments"] if s).encode("utf-8")
+        return encoded_response(request, body, f"{file_hash}-text", media_type="text/plain; charset=utf-8")
+    return encoded_response(request, dumps({"file_hash": file_hash, **record}), file_hash)
+
+
+@router.get("/scan/texts/{task_id}")
+async def export_texts(task_id: str, request: Request,
+                       unique: bool = Query(True, description="相同内容只输出一次")):
+    """按扫描顺序流式导出任务中文件的提取文本(JSONL, 每行一个文件)"""
+    result = pipeline.get_result(task_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="未找到扫描结果")
+    
+    chunks = (dumps(record) + b"\n" for record in iter_result_texts(result, pipeline.text_store, unique))
+    return encoded_response(
+        request, chunks, result_etag(result, f"texts:{unique}"),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename=texts_{task_id}.jsonl"},
+    )
+
+
+def _render_report(task_id: str, result: ScanResult) -> Iterator[bytes]:
+    """
+    逐段渲染报告, 全部输出后写入缓存
+
+    渲染出错时异常照常抛出(响应头已发出, 由服务器中断连接并记录);
+    出错或客户端中途断开(生成器被关闭)时内容不完整, 不写入缓存。
+    """
+    parts = []
+    completed = False
+    try:
+        for chunk in iter_export_html(result, TEMPLATE_DIR):
+            data = chunk.encode("utf-8")
+            parts.append(data)
+            yield data
+        completed = True
+    finally:
+        if completed:
+            rendered_reports[task_id] = (result, b"".join(parts))
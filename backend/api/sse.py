@@ -1,40 +1,92 @@
 """
 SSE 进度推送
+
+进度由扫描执行者(本进程线程或其他进程)经 ProgressThrottle 采样后写入状态后端, 这里负责读出:
+- ProgressFeed(事件循环侧): 每个 API 进程一个轮询任务监视后端版本号, 变化时唤醒全部订阅者,
+  订阅者各自按事件编号读取; 慢订阅者落后超过后端保留的事件数时直接跳到仍保留的事件, 不会积压。
+  断线重连的客户端按 Last-Event-ID 补发之后的事件。
 """
 import asyncio
-import json
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 from sse_starlette.sse import ServerSentEvent
 
 from models.schemas import ScanProgress
+from storage.state_backend import StateBackend
+from scanner.progress import TERMINAL_STATUSES
+
+
+class ProgressFeed:
+    """进程内的进度订阅"""
+
+    def __init__(self, backend: StateBackend, poll_interval: Optional[float] = None):
+        self.backend = backend
+        self.poll_interval = backend.poll_interval if poll_interval is None else poll_interval
+        self._wakeup: Optional[asyncio.Event] = None
+        self._subscribers = 0
+        self._poller: Optional[asyncio.Task] = None
+
+    async def _poll(self):
+        """有订阅者时轮询后端版本号(只查询版本, 不读数据)"""
+        version = self.backend.version()
+        while self._subscribers > 0:
+            await asyncio.sleep(self.poll_interval)
+            current = self.backend.version()
+            if current != version:
+                version = current
+                # 唤醒当前所有等待者, 之后的等待者使用新的事件对象
+                wakeup, self._wakeup = self._wakeup, asyncio.Event()
+                wakeup.set()
+        self._poller = None
 
+    async def subscribe(self, task_id: str, last_event_id: int = 0) -> AsyncGenerator[tuple, None]:
+        """
+        依次产出编号大于 last_event_id 的事件 (事件编号, 进度), 结束事件之后停止
 
-async def progress_generator(progress_queue: asyncio.Queue) -> AsyncGenerator[ServerSentEvent, None]:
+        编号超出当前范围(例如状态库重建前的编号)视为从头订阅。
+        """
+        latest = self.backend.latest(task_id)
+        cursor = last_event_id if latest and 0 <= last_event_id <= latest[0] else 0
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._subscribers += 1
+        if self._poller is None:
+            self._poller = asyncio.create_task(self._poll())
+        try:
+            while True:
+                wakeup = self._wakeup
+                pending = self.backend.events(task_id, cursor)
+                if not pending:
+                    await wakeup.wait()
+                    continue
+                for event_id, progress in pending:
+                    cursor = event_id
+                    yield event_id, progress
+                    if progress.status in TERMINAL_STATUSES:
+                        return
+        finally:
+            self._subscribers -= 1
+
+
+async def progress_generator(feed: ProgressFeed, task_id: str,
+                             last_event_id: int = 0) -> AsyncGenerator[ServerSentEvent, None]:
     """
     生成SSE事件流
-    
+
     Args:
-        progress_queue: 进度消息队列
-        
+        feed: 进程内的进度订阅
+        last_event_id: 客户端已收到的最后一个事件编号(Last-Event-ID)
+
     Yields:
         ServerSentEvent
     """
     try:
-        while True:
-            # 等待进度更新
-            progress: ScanProgress = await progress_queue.get()
-            
-            # 发送事件
+        async for event_id, progress in feed.subscribe(task_id, last_event_id):
             yield ServerSentEvent(
                 data=progress.model_dump_json(),
-                event="progress"
+                event="progress",
+                id=str(event_id),
             )
-            
-            # 如果完成或出错,结束流
-            if progress.status in ["completed", "error"]:
-                break
-                
     except asyncio.CancelledError:
         pass
 
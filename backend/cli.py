@@ -0,0 +1,127 @@
+"""
+命令行工具 - 扫描并保存提取文本, 从文本库流式导出文本供下游入库; 运行独立扫描进程
+
+用法:
+    python cli.py scan <目录> [--save-texts]      完整扫描, 结果写入结果库
+    python cli.py export <task_id> [-o 文件]       按扫描顺序导出文本(JSONL, 每行一个文件)
+    python cli.py get <file_hash> [--segments]     输出单个文件的文本
+    python cli.py worker [--processes N]           独立扫描进程: 从共享任务队列领取并执行扫描
+                                                   (需 DOC_HEALTH_STATE_BACKEND=sqlite)
+"""
+import argparse
+import os
+import sys
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import settings
+from storage import ResultStore, TextStore, iter_result_texts
+from utils.json_utils import dumps
+
+
+def _scan(args) -> int:
+    from scanner.pipeline import ScanPipeline
+
+    if args.save_texts:
+        settings.text_store.enabled = True
+
+    def on_progress(progress):
+        if progress.total_count:
+            print(f"\r{progress.processed_count}/{progress.total_count} {progress.message[:60]:<60}",
+                  end="", file=sys.stderr, flush=True)
+
+    task_id = ScanPipeline().start_scan(args.path, on_progress)
+    print(file=sys.stderr)
+    print(task_id)
+    return 0
+
+
+def _export(args) -> int:
+    result = ResultStore().get(args.task_id)
+    if result is None:
+        print(f"未找到扫描结果: {args.task_id}", file=sys.stderr)
+        return 1
+
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    count = 0
+    try:
+        for record in iter_result_texts(result, TextStore(), unique=not args.all):
+            out.write(dumps(record) + b"\n")
+            count += 1
+    finally:
+        if args.output:
+            out.close()
+        else:
+            out.flush()
+    print(f"已导出 {count} 个文件的文本", file=sys.stderr)
+    return 0
+
+
+def _get(args) -> int:
+    record = TextStore().get(args.file_hash)
+    if record is None:
+        print(f"文本不存在: {args.file_hash}", file=sys.stderr)
+        return 1
+    if args.segments:
+        sys.stdout.buffer.write(dumps(record) + b"\n")
+    else:
+        sys.stdout.buffer.write("\n\n".join(s for s in record["segments"] if s).encode("utf-8") + b"\n")
+    return 0
+
+
+def _worker(args) -> int:
+    from scanner.job_runner import JobRunner
+    from storage import create_state_backend
+    from utils.metrics import MetricsPublisher
+
+    if settings.state.backend == "memory":
+        print("独立扫描进程需要共享的状态后端, 请设置 DOC_HEALTH_STATE_BACKEND=sqlite", file=sys.stderr)
+        return 1
+    backend = create_state_backend()
+    runner = JobRunner(backend, ResultStore(), args.processes).start()
+    MetricsPublisher(backend).start()
+    print(f"扫描进程已启动(pid {os.getpid()}, {args.processes} 个扫描子进程)", file=sys.stderr)
+    try:
+        runner.wait()
+    except KeyboardInterrupt:
+        runner.stop(timeout=10)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="文档体检命令行工具")
+    parser.add_argument("--db", help=f"结果库路径(默认 {settings.storage.db_path})")
+    parser.add_argument("--text-dir", help=f"文本库目录(默认 {settings.text_store.directory})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="完整扫描目录")
+    scan.add_argument("path")
+    scan.add_argument("--save-texts", action="store_true", help="解析时把文本写入文本库")
+    scan.set_defaults(handler=_scan)
+
+    export = commands.add_parser("export", help="导出任务中文件的文本(JSONL)")
+    export.add_argument("task_id")
+    export.add_argument("-o", "--output", help="输出文件(默认标准输出)")
+    export.add_argument("--all", action="store_true", help="相同内容的文件也逐个输出")
+    export.set_defaults(handler=_export)
+
+    get = commands.add_parser("get", help="按内容哈希输出文本")
+    get.add_argument("file_hash")
+    get.add_argument("--segments", action="store_true", help="输出含分页/幻灯片边界的 JSON")
+    get.set_defaults(handler=_get)
+
+    worker = commands.add_parser("worker", help="作为独立扫描进程运行")
+    worker.add_argument("--processes", type=int, default=1, help="并行执行的扫描数(扫描子进程数)")
+    worker.set_defaults(handler=_worker)
+
+    args = parser.parse_args(argv)
+    if args.db:
+        settings.storage.db_path = args.db
+    if args.text_dir:
+        settings.text_store.directory = args.text_dir
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
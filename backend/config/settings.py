@@ -1,8 +1,9 @@
 """
 配置管理
 """
+import os
 from pydantic import BaseModel
-from typing import Dict
+from typing import Dict, List
 
 
 class PDFDetectionConfig(BaseModel):
@@ -11,6 +12,7 @@ class PDFDetectionConfig(BaseModel):
     text_page_threshold: int = 200         # 文字页阈值(高于此为文字页)
     scan_page_ratio_threshold: float = 0.7  # 扫描页占比阈值
     min_image_area_ratio: float = 0.5      # 扫描页图片面积占比阈值
+    ocr_assumed_dpi: int = 300             # 扫描页无内嵌图片时按此DPI估算像素数
 
 
 class SimilarityConfig(BaseModel):
@@ -24,8 +26,121 @@ class ExcelConfig(BaseModel):
     large_row_threshold: int = 5000        # 大型Excel行数阈值
 
 
+class TextConfig(BaseModel):
+    """纯文本处理配置"""
+    detect_sample_bytes: int = 64 * 1024       # 编码探测采样字节数
+    mmap_threshold: int = 8 * 1024 * 1024      # 超过此大小使用mmap流式统计
+    chunk_bytes: int = 4 * 1024 * 1024         # 流式统计的分块大小
+    max_text_bytes: int = 16 * 1024 * 1024     # 大文件返回给后续分析的最大文本字节数
+
+
+class ScannerConfig(BaseModel):
+    """文件扫描配置"""
+    sniff_headers: bool = True             # 是否嗅探文件头识别加密/损坏文件
+    sniff_head_bytes: int = 8 * 1024       # 嗅探读取的文件头字节数
+    sniff_tail_bytes: int = 4 * 1024       # 嗅探读取的文件尾字节数(PDF trailer)
+
+
+class ArchiveConfig(BaseModel):
+    """归档扫描配置"""
+    enabled: bool = True                           # 是否扫描归档内的文件
+    extensions: List[str] = [".zip"]               # 视为归档的扩展名
+    max_members: int = 10000                       # 单个归档(含嵌套)最多读取的成员数
+    max_member_bytes: int = 200 * 1024 * 1024      # 单个成员解压后的最大字节数
+    max_total_bytes: int = 2 * 1024 * 1024 * 1024  # 单个归档解压总字节数上限
+    max_depth: int = 2                             # 最大嵌套层数(顶层归档为1)
+
+
+class StatsConfig(BaseModel):
+    """统计分析配置"""
+    quantile_relative_accuracy: float = 0.01   # 分位数草图的相对误差上限
+    quantile_max_buckets: int = 2048           # 草图最多保留的桶数(超出时合并最小的桶)
+    slowest_files: int = 20                    # 结果中列出的最慢文件数
+
+
+class NoiseConfig(BaseModel):
+    """噪音检测配置"""
+    enabled: bool = True
+    patterns: List[str] = [
+        '本文档仅供内部使用', '机密文件', '请勿外传', '版权所有', '目录', '页眉', '页脚',
+        'confidential', 'internal use only',
+    ]
+    max_line_length: int = 100             # 短行才参与页眉页脚重复统计
+    min_repeat: int = 3                    # 同一短行出现次数达到此值视为页眉页脚
+    max_text_chars: int = 2 * 1024 * 1024  # 单文档最多分析的字符数
+    heavy_hitter_capacity: int = 1024      # 全库重复行统计最多跟踪的行数(Space-Saving)
+    top_repeated: int = 20                 # 结果中列出的全库高频重复行数
+
+
+class ProgressConfig(BaseModel):
+    """进度推送配置"""
+    rate_hz: float = 5.0                   # 每秒最多推送的进度次数
+    every_n: int = 0                       # 每处理N个文件额外推送一次(0表示不启用)
+    replay_size: int = 64                  # 每个任务保留的最近进度事件数(断线重连时补发)
+
+
+class StorageConfig(BaseModel):
+    """扫描结果持久化配置"""
+    db_path: str = os.environ.get(
+        "DOC_HEALTH_RESULTS_DB", os.path.join(os.path.expanduser("~"), ".doc-health-check", "results.db"))  # ":memory:" 表示不落盘
+    memory_results: int = 8                # 内存中保留的最近使用结果数
+    max_results: int = 200                 # 最多保留的结果数(0表示不限)
+    max_age_days: float = 90               # 结果保留天数(0表示不限)
+
+
+class TextStoreConfig(BaseModel):
+    """提取文本库配置(按内容哈希存储解析出的文本, 供下游入库复用)"""
+    enabled: bool = False
+    directory: str = os.path.join(os.path.expanduser("~"), ".doc-health-check", "texts")
+    compression_level: int = 3             # zstd 压缩级别(未安装 zstandard 时回退 zlib, 级别取 1-9)
+
+
+class StateConfig(BaseModel):
+    """任务状态共享配置(多进程部署时由环境变量选择共享后端)"""
+    # memory: 单进程; sqlite: 多个API进程与独立扫描进程共享任务队列和进度
+    backend: str = os.environ.get("DOC_HEALTH_STATE_BACKEND", "memory")
+    db_path: str = os.environ.get(
+        "DOC_HEALTH_STATE_DB", os.path.join(os.path.expanduser("~"), ".doc-health-check", "state.db"))
+    local_workers: int = int(os.environ.get("DOC_HEALTH_LOCAL_WORKERS", 2))  # API进程启动的扫描子进程数(0表示只由独立扫描进程执行)
+    poll_interval: float = 0.05            # 轮询变更通知的间隔(秒)
+    max_finished_tasks: int = 500          # 保留任务记录和进度的已结束任务数
+
+
+class MetricsConfig(BaseModel):
+    """运行指标配置(/api/metrics)"""
+    enabled: bool = True
+    publish_interval: float = 10.0         # 各进程向状态后端上报指标快照的间隔(秒)
+    stale_seconds: float = 60.0            # 超过此时间未上报的进程不再计入仪表类指标
+    retention_hours: float = 24.0          # 已退出进程的计数器快照保留时间(小时)
+
+
+class ChunkingConfig(BaseModel):
+    """RAG切块预演与向量化成本估算配置"""
+    enabled: bool = True
+    chunk_size: int = 512                  # 每块token数
+    chunk_overlap: int = 64                # 相邻块重叠token数
+    embedding_dims: int = 1024             # 向量维度
+    bytes_per_dim: int = 4                 # 每维字节数(float32)
+    embed_tokens_per_second: float = 5000  # 向量化吞吐(token/秒)
+
+
+class SamplingConfig(BaseModel):
+    """抽样扫描配置"""
+    sample_rate: float = 0.02              # 默认抽样比例
+    min_per_stratum: int = 5               # 每层最少抽样数(层内文件不足时全取)
+    max_samples: int = 20000               # 样本总数上限
+    size_buckets: List[int] = [64 * 1024, 1024 * 1024, 16 * 1024 * 1024]  # 按文件大小分层的边界(字节)
+    confidence: float = 0.95               # 置信区间的置信水平
+
+
 class Settings(BaseModel):
     """全局配置"""
+    # 文件扫描配置
+    scanner: ScannerConfig = ScannerConfig()
+    
+    # 归档扫描配置
+    archive: ArchiveConfig = ArchiveConfig()
+    
     # PDF检测配置
     pdf_detection: PDFDetectionConfig = PDFDetectionConfig()
     
@@ -35,6 +150,36 @@ class Settings(BaseModel):
     # Excel配置
     excel: ExcelConfig = ExcelConfig()
     
+    # 纯文本配置
+    text: TextConfig = TextConfig()
+    
+    # 统计分析配置
+    stats: StatsConfig = StatsConfig()
+    
+    # 抽样扫描配置
+    sampling: SamplingConfig = SamplingConfig()
+    
+    # 噪音检测配置
+    noise: NoiseConfig = NoiseConfig()
+    
+    # RAG切块预演配置
+    chunking: ChunkingConfig = ChunkingConfig()
+    
+    # 进度推送配置
+    progress: ProgressConfig = ProgressConfig()
+    
+    # 结果持久化配置
+    storage: StorageConfig = StorageConfig()
+    
+    # 任务状态共享配置
+    state: StateConfig = StateConfig()
+    
+    # 提取文本库配置
+    text_store: TextStoreConfig = TextStoreConfig()
+    
+    # 运行指标配置
+    metrics: MetricsConfig = MetricsConfig()
+    
     # 支持的文件扩展名
     supported_extensions: Dict[str, str] = {
         ".docx": "docx",
@@ -46,6 +191,9 @@ class Settings(BaseModel):
         ".pdf": "pdf",
         ".txt": "txt",
         ".md": "md",
+        ".markdown": "md",
+        ".rst": "txt",
+        ".log": "txt",
         ".jpg": "image",
         ".jpeg": "image",
         ".png": "image",
@@ -3,6 +3,7 @@ RAG入库体检报告工具 - FastAPI 后端
 """
 import os
 import sys
+from contextlib import asynccontextmanager
 
 # 添加当前目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -12,12 +13,22 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from api.routes import router as api_router
+from api.routes import router as api_router, start_background, stop_background
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动/关闭扫描执行器等后台任务"""
+    start_background()
+    yield
+    stop_background()
+
 
 app = FastAPI(
     title="Document Health Check",
     description="RAG入库文档体检报告工具",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS配置
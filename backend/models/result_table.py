@@ -0,0 +1,320 @@
+"""
+列式结果存储 - 以紧凑数组按列保存所有 FileAnalysis, 字符串统一驻留在一张字符串表中
+
+列由 FileAnalysis 及其嵌套模型(FileInfo / DocumentMetrics)的字段自动生成,
+列名即字段名(扁平, 不带前缀)。Pydantic 对象只在需要时按行构建。
+"""
+import json
+import math
+import struct
+import sys
+import typing
+from array import array
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from pydantic import BaseModel
+
+from .schemas import FileAnalysis
+
+
+# 列类型
+KIND_BOOL = 'bool'
+KIND_INT = 'int'
+KIND_FLOAT = 'float'
+KIND_TIME = 'time'
+KIND_STR = 'str'
+KIND_ENUM = 'enum'
+KIND_OBJECT = 'object'
+
+_TYPECODES = {
+    KIND_BOOL: 'b',
+    KIND_INT: 'q',
+    KIND_FLOAT: 'd',
+    KIND_TIME: 'd',     # 时间戳, None 记为 NaN
+    KIND_STR: 'i',      # 字符串表下标, None 记为 -1
+    KIND_ENUM: 'i',
+}
+
+_DUMP_MAGIC = b'FTBL1'
+
+NULL_STRING = -1
+MISSING_STRING = -2  # 从未出现过的字符串, 不与任何单元格(含空值)相等
+
+
+class StringTable:
+    """字符串驻留表"""
+
+    __slots__ = ('_strings', '_index')
+
+    def __init__(self):
+        self._strings: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        idx = self._index.get(value)
+        if idx is None:
+            idx = len(self._strings)
+            self._strings.append(value)
+            self._index[value] = idx
+        return idx
+
+    def lookup(self, value: str) -> int:
+        """查找字符串下标, 不存在时返回 -1"""
+        return self._index.get(value, NULL_STRING)
+
+    def get(self, idx: int) -> Optional[str]:
+        return None if idx < 0 else self._strings[idx]
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+
+class Column:
+    """单列"""
+
+    __slots__ = ('name', 'group', 'kind', 'enum', 'data')
+
+    def __init__(self, name: str, group: Optional[str], kind: str, enum: Optional[type] = None):
+        self.name = name
+        self.group = group      # 所属嵌套模型字段(file_info / metrics), 顶层字段为 None
+        self.kind = kind
+        self.enum = enum
+        self.data = array(_TYPECODES[kind]) if kind in _TYPECODES else []
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if typing.get_origin(annotation) is typing.Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _column_kind(annotation: Any) -> str:
+    tp = _unwrap_optional(annotation)
+    if not isinstance(tp, type):
+        return KIND_OBJECT
+    if issubclass(tp, Enum):
+        return KIND_ENUM
+    if tp is bool:
+        return KIND_BOOL
+    if tp is int:
+        return KIND_INT
+    if tp is float:
+        return KIND_FLOAT
+    if tp is datetime:
+        return KIND_TIME
+    if tp is str:
+        return KIND_STR
+    return KIND_OBJECT
+
+
+# 嵌套模型字段 -> 模型类
+_GROUP_MODELS = {
+    name: _unwrap_optional(field.annotation)
+    for name, field in FileAnalysis.model_fields.items()
+    if isinstance(_unwrap_optional(field.annotation), type)
+    and issubclass(_unwrap_optional(field.annotation), BaseModel)
+}
+
+
+def _new_column(name: str, group: Optional[str], annotation: Any) -> Column:
+    kind = _column_kind(annotation)
+    return Column(name, group, kind, _unwrap_optional(annotation) if kind == KIND_ENUM else None)
+
+
+def _build_columns() -> List[Column]:
+    columns: List[Column] = []
+    for field_name, field in FileAnalysis.model_fields.items():
+        model = _GROUP_MODELS.get(field_name)
+        if model is None:
+            columns.append(_new_column(field_name, None, field.annotation))
+            continue
+        for sub_name, sub_field in model.model_fields.items():
+            columns.append(_new_column(sub_name, field_name, sub_field.annotation))
+
+    names = [c.name for c in columns]
+    duplicated = {n for n in names if names.count(n) > 1}
+    if duplicated:
+        raise RuntimeError(f"FileAnalysis 扁平化后列名冲突: {duplicated}")
+    return columns
+
+
+class FileTable:
+    """FileAnalysis 的列式存储"""
+
+    def __init__(self):
+        self.strings = StringTable()
+        self.columns: Dict[str, Column] = {c.name: c for c in _build_columns()}
+        self._count = 0
+
+    @classmethod
+    def from_analyses(cls, analyses: Iterable[FileAnalysis]) -> 'FileTable':
+        table = cls()
+        table.extend(analyses)
+        return table
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ---- 写入 ----
+
+    def append(self, analysis: FileAnalysis) -> int:
+        """追加一行, 返回行号"""
+        for col in self.columns.values():
+            owner = analysis if col.group is None else getattr(analysis, col.group)
+            col.data.append(self._encode(col, getattr(owner, col.name)))
+        self._count += 1
+        return self._count - 1
+
+    def extend(self, analyses: Iterable[FileAnalysis]):
+        for a in analyses:
+            self.append(a)
+
+    # ---- 读取 ----
+
+    def column(self, name: str) -> Sequence:
+        """原始列数据(字符串/枚举列为字符串表下标)"""
+        return self.columns[name].data
+
+    def code(self, value: str) -> int:
+        """字符串/枚举值在列中的编码, 用于直接比较原始列数据"""
+        idx = self.strings.lookup(value)
+        return MISSING_STRING if idx < 0 else idx
+
+    def value(self, name: str, row: int) -> Any:
+        """解码单元格"""
+        return self._decode(self.columns[name], row)
+
+    def values(self, name: str) -> List[Any]:
+        """解码整列"""
+        col = self.columns[name]
+        return [self._decode(col, i) for i in range(self._count)]
+
+    def where(self, predicate: Callable[[int], bool]) -> List[int]:
+        return [i for i in range(self._count) if predicate(i)]
+
+    def flagged(self, name: str) -> List[int]:
+        """布尔列为真的行号"""
+        data = self.columns[name].data
+        return [i for i, v in enumerate(data) if v]
+
+    def row(self, row: int) -> FileAnalysis:
+        """按行构建 Pydantic 视图(不做校验)"""
+        groups: Dict[Optional[str], Dict[str, Any]] = {g: {} for g in _GROUP_MODELS}
+        groups[None] = {}
+        for col in self.columns.values():
+            groups[col.group][col.name] = self._decode(col, row)
+        top = groups.pop(None)
+        for group, model in _GROUP_MODELS.items():
+            top[group] = model.model_construct(**groups[group])
+        return FileAnalysis.model_construct(**top)
+
+    def row_dict(self, row: int) -> Dict[str, Any]:
+        """按行构建与 FileAnalysis 结构相同的嵌套字典(供直接序列化, 不构建 Pydantic 对象)"""
+        top: Dict[str, Any] = {}
+        for col in self.columns.values():
+            owner = top if col.group is None else top.setdefault(col.group, {})
+            owner[col.name] = self._decode(col, row)
+        return top
+
+    def rows(self, indices: Iterable[int]) -> List[FileAnalysis]:
+        return [self.row(i) for i in indices]
+
+    def iter_rows(self) -> Iterator[FileAnalysis]:
+        for i in range(self._count):
+            yield self.row(i)
+
+    # ---- 持久化 ----
+
+    def dump(self) -> bytes:
+        """序列化为字节串: 头部(JSON: 行数/字符串表/列描述) + 各列原始数组"""
+        columns = []
+        payloads = []
+        for col in self.columns.values():
+            if isinstance(col.data, array):
+                data = col.data.tobytes()
+                columns.append({'name': col.name, 'typecode': col.data.typecode, 'nbytes': len(data)})
+                payloads.append(data)
+            else:
+                columns.append({'name': col.name, 'values': col.data})
+        header = json.dumps({
+            'count': self._count,
+            'byteorder': sys.byteorder,
+            'strings': self.strings._strings,
+            'columns': columns,
+        }, ensure_ascii=False, default=str).encode('utf-8')
+        return _DUMP_MAGIC + struct.pack('<I', len(header)) + header + b''.join(payloads)
+
+    @classmethod
+    def load(cls, blob: bytes) -> 'FileTable':
+        """
+        从 dump() 的结果恢复; 保存之后新增的列按字段默认值补齐, 已删除的列忽略
+
+        Raises:
+            ValueError: 数据格式不正确
+        """
+        if not blob.startswith(_DUMP_MAGIC):
+            raise ValueError("不是列式表数据")
+        offset = len(_DUMP_MAGIC)
+        (header_len,) = struct.unpack_from('<I', blob, offset)
+        offset += 4
+        header = json.loads(blob[offset:offset + header_len].decode('utf-8'))
+        offset += header_len
+
+        table = cls()
+        for value in header['strings']:
+            table.strings.intern(value)
+        table._count = header['count']
+        swap = header['byteorder'] != sys.byteorder
+        for desc in header['columns']:
+            col = table.columns.get(desc['name'])
+            if 'values' in desc:
+                if col is not None and not isinstance(col.data, array):
+                    col.data = desc['values']
+                continue
+            nbytes = desc['nbytes']
+            chunk = blob[offset:offset + nbytes]
+            offset += nbytes
+            if col is None or not isinstance(col.data, array) or col.data.typecode != desc['typecode']:
+                continue
+            col.data.frombytes(chunk)
+            if swap:
+                col.data.byteswap()
+
+        # 补齐缺失的列
+        for col in table.columns.values():
+            if len(col.data) != table._count:
+                model = FileAnalysis if col.group is None else _GROUP_MODELS[col.group]
+                field = model.model_fields[col.name]
+                default = field.get_default(call_default_factory=True)
+                col.data = type(col.data)(col.data.typecode) if isinstance(col.data, array) else []
+                fill = table._encode(col, default)
+                for _ in range(table._count):
+                    col.data.append(fill)
+        return table
+
+    def _encode(self, col: Column, value: Any) -> Any:
+        kind = col.kind
+        if kind == KIND_STR:
+            return NULL_STRING if value is None else self.strings.intern(value)
+        if kind == KIND_ENUM:
+            return NULL_STRING if value is None else self.strings.intern(value.value)
+        if kind == KIND_TIME:
+            return math.nan if value is None else value.timestamp()
+        return value
+
+    def _decode(self, col: Column, row: int) -> Any:
+        value = col.data[row]
+        kind = col.kind
+        if kind == KIND_STR:
+            return self.strings.get(value)
+        if kind == KIND_ENUM:
+            return None if value < 0 else col.enum(self.strings.get(value))
+        if kind == KIND_TIME:
+            return None if math.isnan(value) else datetime.fromtimestamp(value)
+        if kind == KIND_BOOL:
+            return bool(value)
+        return value
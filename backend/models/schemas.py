@@ -1,7 +1,7 @@
 """
 数据模型定义
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import Optional, List, Dict, Any
 from enum import Enum
 from datetime import datetime
@@ -24,6 +24,7 @@ class FileType(str, Enum):
     TXT = "txt"
     MD = "md"
     IMAGE = "image"
+    ARCHIVE = "archive"  # 无法展开的归档
     OTHER = "other"
 
 
@@ -49,6 +50,8 @@ class FileInfo(BaseModel):
     size: int  # bytes
     modified_time: Optional[datetime] = None
     file_type: FileType
+    container: Optional[str] = None  # 文件头嗅探得到的真实容器类型(zip/ole2/pdf/image)
+    archive_path: Optional[str] = None  # 所属归档(归档成员的虚拟文件才有)
     
     # 解析状态
     is_encrypted: bool = False
@@ -79,12 +82,41 @@ class DocumentMetrics(BaseModel):
     pdf_type: Optional[PDFType] = None
     text_density: float = 0.0      # 文本密度(字符/页)
     image_area_ratio: float = 0.0  # 图片面积占比
+    scan_page_count: int = 0       # 扫描页数
+    
+    # 图片特有
+    image_width: int = 0
+    image_height: int = 0
+    
+    # OCR工作量: 图片像素数 / PDF扫描页像素数
+    pixel_count: int = 0
+    
+    # RAG切块预演: 估算token数 / 切块数
+    token_count: int = 0
+    chunk_count: int = 0
+    
+    # 噪音检测: 非空行数 / 噪音行数(命中噪音模式或文内重复的页眉页脚)
+    line_count: int = 0
+    noise_line_count: int = 0
+    noise_ratio: float = 0.0
+
+
+class FileTiming(BaseModel):
+    """单个文件各处理阶段的耗时(秒, 单调时钟)"""
+    stat_seconds: float = 0.0         # 遍历/stat/文件头嗅探(归档成员含解压读取)
+    hash_seconds: float = 0.0         # 内容哈希
+    extract_seconds: float = 0.0      # 解析文档指标(一次解析同时得到文本的提取器含文本提取)
+    text_seconds: float = 0.0         # 文本提取(与指标分开解析的提取器)
+    fingerprint_seconds: float = 0.0  # SimHash 指纹
+    postprocess_seconds: float = 0.0  # 文本后处理(切块预演/噪音检测/写入文本库)
+    total_seconds: float = 0.0        # 以上各阶段及分类标记的合计
 
 
 class FileAnalysis(BaseModel):
     """单个文件的完整分析结果"""
     file_info: FileInfo
     metrics: DocumentMetrics
+    timing: FileTiming = Field(default_factory=FileTiming)
     
     # 哈希(用于去重)
     file_hash: Optional[str] = None
@@ -106,7 +138,7 @@ class DuplicateGroup(BaseModel):
 class ScanProgress(BaseModel):
     """扫描进度"""
     task_id: str
-    status: str  # scanning, analyzing, completed, error
+    status: str  # queued, scanning, analyzing, completed, error, cancelled
     current_file: Optional[str] = None
     processed_count: int = 0
     total_count: int = 0
@@ -162,6 +194,52 @@ class PageTypeStats(BaseModel):
     scan_ratio: float = 0.0     # 扫描页占比
 
 
+class OCRWorkload(BaseModel):
+    """OCR工作量估算(图片 + PDF扫描页)"""
+    image_files: int = 0            # 图片文件数
+    image_megapixels: float = 0.0   # 图片总像素(百万)
+    scan_pdf_pages: int = 0         # PDF扫描页数
+    scan_pdf_megapixels: float = 0.0  # PDF扫描页总像素(百万)
+    total_pages: int = 0            # 待OCR总页数(每张图片计1页)
+    total_megapixels: float = 0.0   # 待OCR总像素(百万)
+
+
+class ChunkingBreakdown(BaseModel):
+    """切块预演分组统计"""
+    files: int = 0
+    tokens: int = 0
+    chunks: int = 0
+    embedding_seconds: float = 0.0  # 预计向量化耗时
+    storage_bytes: int = 0          # 预计向量存储量
+
+
+class ChunkingStats(BaseModel):
+    """RAG切块预演与向量化成本估算"""
+    chunk_size: int = 0
+    chunk_overlap: int = 0
+    embedding_dims: int = 0
+    total: ChunkingBreakdown = Field(default_factory=ChunkingBreakdown)
+    by_format: Dict[str, ChunkingBreakdown] = Field(default_factory=dict)
+
+
+class RepeatedLine(BaseModel):
+    """全库高频重复短行(疑似页眉页脚)"""
+    text: str
+    doc_count: int       # 出现该行的文档数(估计值, 不低于真实值)
+    error: int = 0       # 估计误差上限: 真实值 ≥ doc_count - error
+
+
+class NoiseStats(BaseModel):
+    """噪音检测统计"""
+    total_lines: int = 0
+    noise_lines: int = 0
+    noise_ratio: float = 0.0               # 全库噪音行占比
+    avg_doc_noise_ratio: float = 0.0       # 文档噪音比例的平均值
+    docs_with_noise: int = 0
+    pattern_hits: Dict[str, int] = Field(default_factory=dict)  # 各噪音模式命中行数
+    repeated_lines: List[RepeatedLine] = Field(default_factory=list)
+
+
 class SimilarGroup(BaseModel):
     """高相似度文档组"""
     files: List[str] = Field(default_factory=list)  # 文件路径列表
@@ -169,6 +247,26 @@ class SimilarGroup(BaseModel):
     distance: int = 0           # SimHash汉明距离
 
 
+class TimingBreakdown(FileTiming):
+    """一组文件的阶段耗时合计"""
+    files: int = 0
+
+
+class SlowFile(BaseModel):
+    """耗时最长的文件"""
+    path: str
+    file_type: str
+    size: int = 0
+    timing: FileTiming = Field(default_factory=FileTiming)
+
+
+class TimingStats(BaseModel):
+    """逐文件阶段耗时汇总: 定位异常慢的文件和耗时所在阶段"""
+    total: TimingBreakdown = Field(default_factory=TimingBreakdown)
+    by_type: Dict[str, TimingBreakdown] = Field(default_factory=dict)
+    slowest_files: List[SlowFile] = Field(default_factory=list)
+
+
 class CategoryStats(BaseModel):
     """文档分类统计"""
     simple_count: int = 0       # 简单文档数
@@ -179,12 +277,39 @@ class CategoryStats(BaseModel):
     complex_files: List[str] = Field(default_factory=list)  # 复杂文档路径列表
 
 
+class Estimate(BaseModel):
+    """抽样外推的估计值及置信区间"""
+    value: float = 0.0
+    lower: float = 0.0
+    upper: float = 0.0
+
+
+class StratumInfo(BaseModel):
+    """抽样分层(文件类型 × 大小区间)"""
+    file_type: str
+    size_bucket: str            # 如 "64KB-1MB"
+    population: int = 0         # 层内文件总数
+    sampled: int = 0            # 层内抽样数
+
+
+class SampleEstimate(BaseModel):
+    """抽样扫描的外推说明"""
+    population_files: int = 0   # 可抽样的文件总数
+    sampled_files: int = 0      # 实际解析的样本数
+    unsampled_files: int = 0    # 不参与抽样的文件(嵌套/损坏的归档)
+    confidence: float = 0.95    # 置信水平
+    strata: List[StratumInfo] = Field(default_factory=list)
+    # 各指标的估计值, 键如 "length_stats.mean"、"category_stats.complex_count"
+    estimates: Dict[str, Estimate] = Field(default_factory=dict)
+
+
 class ScanResult(BaseModel):
     """完整扫描结果"""
     task_id: str
     scan_path: str
     scan_time: datetime
     duration_seconds: float
+    scan_mode: str = "deep"  # deep / quick(仅元数据, 可升级为完整扫描) / sample(抽样外推)
     
     # 总览
     total_files: int = 0
@@ -196,6 +321,18 @@ class ScanResult(BaseModel):
     # PDF页面类型统计
     pdf_page_stats: PageTypeStats = Field(default_factory=PageTypeStats)
     
+    # OCR工作量估算
+    ocr_workload: OCRWorkload = Field(default_factory=OCRWorkload)
+    
+    # RAG切块预演与向量化成本
+    chunking_stats: ChunkingStats = Field(default_factory=ChunkingStats)
+    
+    # 噪音检测
+    noise_stats: NoiseStats = Field(default_factory=NoiseStats)
+    
+    # 逐文件阶段耗时
+    timing_stats: TimingStats = Field(default_factory=TimingStats)
+    
     # 文档分类统计
     category_stats: CategoryStats = Field(default_factory=CategoryStats)
     
@@ -216,11 +353,145 @@ class ScanResult(BaseModel):
     # 需特殊处理的文件清单
     ocr_files: List[FileAnalysis] = Field(default_factory=list)      # 需OCR
     review_files: List[FileAnalysis] = Field(default_factory=list)   # 需人工审核
+    
+    # 抽样扫描: 统计值为外推结果, files 只含样本
+    sample_estimate: Optional[SampleEstimate] = None
+    
+    # 列式文件表(models.result_table.FileTable); 存在时上面的文件清单留空, 按需构建
+    _table: Any = PrivateAttr(default=None)
+    
+    def attach_table(self, table) -> 'ScanResult':
+        """以列式表保存文件清单, 清空对象形式的清单"""
+        self._table = table
+        self.files = []
+        self.ocr_files = []
+        self.review_files = []
+        self.category_stats.simple_files = []
+        self.category_stats.medium_files = []
+        self.category_stats.complex_files = []
+        return self
+    
+    @property
+    def file_table(self):
+        """列式文件表(旧式结果按 files 现场构建)"""
+        if self._table is None:
+            from .result_table import FileTable
+            self._table = FileTable.from_analyses(self.files)
+        return self._table
+    
+    def materialize(self) -> 'ScanResult':
+        """构建含完整文件清单的副本(完整结果接口/旧版前端使用)"""
+        if self._table is None:
+            return self
+        table = self._table
+        category_files: Dict[str, List[str]] = {c.value: [] for c in DocumentCategory}
+        paths = table.values('path')
+        for path, category in zip(paths, table.values('category')):
+            # 与分类统计一致: 未分类计入复杂
+            category_files[(category or DocumentCategory.COMPLEX).value].append(path)
+        
+        full = self.model_copy(update={
+            'files': list(table.iter_rows()),
+            'ocr_files': table.rows(table.flagged('needs_ocr')),
+            'review_files': table.rows(table.flagged('needs_review')),
+            'category_stats': self.category_stats.model_copy(update={
+                'simple_files': category_files['simple'],
+                'medium_files': category_files['medium'],
+                'complex_files': category_files['complex'],
+            }),
+        })
+        full._table = table
+        return full
+
+
+class FilePage(BaseModel):
+    """文件清单分页(items 为 FileAnalysis, 或按投影字段构成的字典)"""
+    total: int = 0
+    offset: int = 0
+    limit: int = 0
+    items: List[Any] = Field(default_factory=list)
+
+
+class DuplicateGroupPage(BaseModel):
+    """重复文件组分页"""
+    total: int = 0
+    offset: int = 0
+    limit: int = 0
+    items: List[DuplicateGroup] = Field(default_factory=list)
+
+
+class SimilarGroupPage(BaseModel):
+    """相似文档组分页"""
+    total: int = 0
+    offset: int = 0
+    limit: int = 0
+    items: List[SimilarGroup] = Field(default_factory=list)
+
+
+class DirectoryRollup(BaseModel):
+    """目录汇总(含全部子目录; 归档按目录处理)"""
+    path: str
+    name: str
+    is_archive: bool = False
+    file_count: int = 0
+    total_size: int = 0  # bytes
+    simple_count: int = 0
+    medium_count: int = 0
+    complex_count: int = 0
+    ocr_count: int = 0          # 需OCR文件数
+    scan_pages: int = 0         # PDF扫描页数
+    failed_count: int = 0       # 解析失败文件数
+    duplicate_count: int = 0    # 存在重复副本的文件数
+    token_count: int = 0        # 估算token数
+    chunk_count: int = 0        # 估算切块数
+    embedding_seconds: float = 0.0  # 预计向量化耗时
+    storage_bytes: int = 0      # 预计向量存储量
+    subdir_count: int = 0       # 直接子目录数(前端据此判断能否展开)
+    direct_file_count: int = 0  # 直接位于该目录下的文件数
+
+
+class DirectoryTreeView(BaseModel):
+    """目录树的一层: 当前目录汇总 + 子目录汇总 + 直接文件(分页)"""
+    node: DirectoryRollup
+    children: List[DirectoryRollup] = Field(default_factory=list)
+    files: List[FileAnalysis] = Field(default_factory=list)
+    offset: int = 0
+    limit: int = 0
 
 
 class ScanRequest(BaseModel):
     """扫描请求"""
     path: str
+    mode: str = "deep"   # deep: 完整解析; quick: 仅遍历和stat; sample: 分层抽样外推
+    sniff: bool = False  # 快速扫描时是否嗅探文件头(识别加密/损坏)
+    sample_rate: Optional[float] = None  # 抽样比例(默认取配置)
+    seed: Optional[int] = None           # 抽样随机种子(便于复现)
+    priority: int = 0                    # 优先级(数值大的先执行, 同级按提交顺序)
+
+
+class ScanJob(BaseModel):
+    """排队执行的扫描任务(经状态后端在API进程与扫描进程之间传递)"""
+    task_id: str
+    path: str
+    mode: str = "deep"   # deep / quick / sample / upgrade(把快速扫描升级为完整扫描)
+    sniff: bool = False
+    sample_rate: Optional[float] = None
+    seed: Optional[int] = None
+    priority: int = 0
+    status: str = "queued"  # queued, running, completed, error, cancelled
+    cancel_requested: bool = False  # 执行中的任务收到取消请求(在文件之间检查并停止)
+    worker: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class ScanJobStatus(BaseModel):
+    """任务状态查询结果"""
+    job: ScanJob
+    progress: Optional[ScanProgress] = None
+    queue_position: Optional[int] = None  # 排队中的任务前面还有几个(从0开始)
     
     
 class OpenFileRequest(BaseModel):
@@ -2,11 +2,13 @@
 重复文件检测分析器
 """
 import hashlib
+import time
 from pathlib import Path
 from typing import Dict, List
 from collections import defaultdict
 
 from models.schemas import DuplicateGroup
+from utils.metrics import HASH_SECONDS
 
 
 class DuplicateAnalyzer:
@@ -28,11 +30,21 @@ class DuplicateAnalyzer:
     
     def add_file(self, file_path: Path) -> str:
         """添加文件并返回其哈希值"""
+        started = time.perf_counter()
         file_hash = self.compute_hash(file_path)
+        HASH_SECONDS.observe(time.perf_counter() - started)
         if file_hash:
             self.hash_map[file_hash].append(str(file_path))
         return file_hash
     
+    def add_data(self, file_path: str, data: bytes) -> str:
+        """添加内存中的文件内容(如归档成员)并返回其哈希值"""
+        started = time.perf_counter()
+        file_hash = hashlib.md5(data).hexdigest()
+        HASH_SECONDS.observe(time.perf_counter() - started)
+        self.hash_map[file_hash].append(file_path)
+        return file_hash
+    
     def get_duplicates(self) -> List[DuplicateGroup]:
         """获取所有重复文件组"""
         duplicates = []
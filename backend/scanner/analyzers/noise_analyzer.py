@@ -1,66 +1,231 @@
 """
-噪音检测分析器(基础版)
+噪音检测分析器 - 在单次解析中逐文档识别噪音行, 并统计全库高频重复行
+
+- 噪音模式: Aho-Corasick 自动机, 每行只扫描一遍即可同时匹配所有模式
+- 文内重复: 同一文档中反复出现的短行(页眉页脚)计为噪音
+- 全库重复: Space-Saving 草图按文档频次跟踪短行, 内存上限固定
 """
-from typing import List, Dict, Tuple
-from collections import Counter
+import heapq
+import re
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models.schemas import NoiseStats, RepeatedLine
+from config.settings import settings
+
+
+class PatternMatcher:
+    """
+    Aho-Corasick 多模式匹配(大小写不敏感)
+
+    构建时把失败转移展开成完整的状态转移表, 匹配时每个字符只查一次表。
+    不在任何模式中出现的字符必然回到根状态, 因此只扫描由模式字符组成的片段。
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = [p for p in dict.fromkeys(p.lower() for p in patterns) if p]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[Optional[int]] = [None]  # 状态 -> 命中的模式下标
+        for idx, pattern in enumerate(self.patterns):
+            self._insert(pattern, idx)
+        self._build()
+
+        alphabet = sorted({ch for p in self.patterns for ch in p})
+        self._segments = re.compile('[' + ''.join(re.escape(ch) for ch in alphabet) + ']+') if alphabet else None
+
+    def _insert(self, pattern: str, idx: int):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._output.append(None)
+            state = nxt
+        if self._output[state] is None:
+            self._output[state] = idx
+
+    def _build(self):
+        """BFS 计算失败链接, 并把失败转移合并进转移表"""
+        goto = self._goto
+        output = self._output
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                # 失败状态更浅, 其转移表已补全
+                fail[nxt] = goto[fail[state]].get(ch, 0) if state else 0
+                if output[nxt] is None:
+                    output[nxt] = output[fail[nxt]]
+                queue.append(nxt)
+            if state:
+                for ch, nxt in goto[fail[state]].items():
+                    goto[state].setdefault(ch, nxt)
+
+    def search(self, text: str) -> Optional[int]:
+        """返回文本中第一个命中的模式下标, 未命中返回 None"""
+        if self._segments is None:
+            return None
+        goto = self._goto
+        output = self._output
+        for segment in self._segments.finditer(text.lower()):
+            state = 0
+            for ch in segment.group():
+                state = goto[state].get(ch, 0)
+                hit = output[state]
+                if hit is not None:
+                    return hit
+        return None
+
+
+class SpaceSaving:
+    """
+    Space-Saving 高频项草图: 最多跟踪 capacity 项
+
+    新项到来且已满时替换计数最小的项, 新计数 = 最小计数 + 1, 误差记为最小计数。
+    任何真实频次超过 N/capacity 的项都一定被保留。
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []  # (计数, 项), 惰性更新
+
+    def add(self, item: str, count: int = 1):
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            victim, floor = self._pop_min()
+            del self.counts[victim]
+            del self.errors[victim]
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+        heapq.heappush(self._heap, (self.counts[item], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, k) for k, c in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[str, int]:
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                return item, count
+
+    def merge(self, other: 'SpaceSaving'):
+        """合并另一个草图(误差上限相加)"""
+        for item, count in other.counts.items():
+            self.add(item, count)
+            self.errors[item] = self.errors.get(item, 0) + other.errors[item]
+
+    def top(self, n: int, min_count: int = 1) -> List[Tuple[str, int, int]]:
+        """保证计数(计数 - 误差)不低于 min_count 的前 n 项: (项, 计数, 误差上限)"""
+        errors = self.errors
+        items = heapq.nlargest(n, ((k, c) for k, c in self.counts.items() if c - errors[k] >= min_count),
+                               key=lambda kv: kv[1])
+        return [(k, c, errors[k]) for k, c in items]
+
+    def clear(self):
+        self.counts.clear()
+        self.errors.clear()
+        self._heap.clear()
 
 
 class NoiseAnalyzer:
     """噪音检测分析器"""
-    
-    # 常见噪音模式
-    NOISE_PATTERNS = [
-        '本文档仅供内部使用',
-        '机密文件',
-        '请勿外传',
-        '版权所有',
-        '目录',
-        '页眉',
-        '页脚',
-        'confidential',
-        'internal use only',
-    ]
-    
-    def __init__(self):
-        self.line_counter = Counter()
-    
+
+    # 常见噪音模式(默认值, 以配置为准)
+    NOISE_PATTERNS = settings.noise.patterns
+
+    def __init__(self, patterns: Optional[Iterable[str]] = None):
+        config = settings.noise
+        self.config = config
+        self.matcher = PatternMatcher(patterns or config.patterns)
+        self.repeated = SpaceSaving(config.heavy_hitter_capacity)
+        self.reset()
+
     def analyze_text(self, text: str) -> Dict:
-        """分析文本中的噪音"""
+        """
+        分析单个文档的噪音, 同时把文档中的短行计入全库重复统计
+
+        Returns:
+            line_count / noise_line_count / noise_ratio / noise_lines(最多10条示例)
+        """
         if not text:
-            return {'noise_ratio': 0, 'noise_lines': []}
-        
-        lines = text.split('\n')
-        noise_lines = []
-        
-        for line in lines:
-            line_stripped = line.strip().lower()
-            if not line_stripped:
+            return {'line_count': 0, 'noise_line_count': 0, 'noise_ratio': 0.0, 'noise_lines': []}
+
+        max_len = self.config.max_line_length
+        search = self.matcher.search
+        lines = []
+        hits: List[Optional[int]] = []
+        for line in text[:self.config.max_text_chars].split('\n'):
+            line = line.strip()
+            if not line:
                 continue
-            
-            # 检查是否匹配噪音模式
-            for pattern in self.NOISE_PATTERNS:
-                if pattern.lower() in line_stripped:
-                    noise_lines.append(line.strip())
-                    break
-            
-            # 统计行频率(用于检测重复页眉页脚)
-            if len(line_stripped) < 100:  # 短行更可能是页眉页脚
-                self.line_counter[line_stripped] += 1
-        
-        # 计算噪音比例
-        total_lines = len([l for l in lines if l.strip()])
-        noise_ratio = len(noise_lines) / total_lines if total_lines > 0 else 0
-        
+            lines.append(line)
+            hits.append(search(line))
+
+        # 文内重复的短行(页眉页脚)
+        short = Counter(line.lower() for line in lines if len(line) < max_len)
+        repeated = {line for line, n in short.items() if n >= self.config.min_repeat}
+
+        noise_lines = []
+        for line, hit in zip(lines, hits):
+            if hit is not None:
+                self.pattern_hits[hit] += 1
+            if hit is not None or line.lower() in repeated:
+                noise_lines.append(line)
+
+        # 全库统计按文档频次计数
+        for line in short:
+            self.repeated.add(line)
+
+        total = len(lines)
+        noise_ratio = len(noise_lines) / total if total else 0.0
+        self.total_lines += total
+        self.noise_lines += len(noise_lines)
+        self.doc_count += 1
+        self.ratio_sum += noise_ratio
+        self.docs_with_noise += bool(noise_lines)
+
         return {
+            'line_count': total,
+            'noise_line_count': len(noise_lines),
             'noise_ratio': noise_ratio,
             'noise_lines': noise_lines[:10],  # 最多返回10条示例
         }
-    
-    def get_repeated_lines(self, min_count: int = 3) -> List[Tuple[str, int]]:
-        """获取重复出现的行(可能是页眉页脚)"""
-        return [(line, count) for line, count in self.line_counter.most_common(10) 
-                if count >= min_count]
-    
+
+    def get_repeated_lines(self, min_count: Optional[int] = None,
+                           limit: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """获取在多个文档中重复出现的短行(可能是页眉页脚): (行, 文档数, 误差上限)"""
+        return self.repeated.top(limit or self.config.top_repeated, min_count or self.config.min_repeat)
+
+    def result(self) -> NoiseStats:
+        """全库噪音统计"""
+        return NoiseStats(
+            total_lines=self.total_lines,
+            noise_lines=self.noise_lines,
+            noise_ratio=self.noise_lines / self.total_lines if self.total_lines else 0.0,
+            avg_doc_noise_ratio=self.ratio_sum / self.doc_count if self.doc_count else 0.0,
+            docs_with_noise=self.docs_with_noise,
+            pattern_hits={self.matcher.patterns[i]: n for i, n in self.pattern_hits.most_common()},
+            repeated_lines=[
+                RepeatedLine(text=line, doc_count=count, error=error)
+                for line, count, error in self.get_repeated_lines()
+            ],
+        )
+
     def reset(self):
         """重置状态"""
-        self.line_counter.clear()
+        self.repeated.clear()
+        self.pattern_hits: Counter = Counter()
+        self.total_lines = 0
+        self.noise_lines = 0
+        self.doc_count = 0
+        self.ratio_sum = 0.0
+        self.docs_with_noise = 0
@@ -0,0 +1,217 @@
+"""
+结果索引 - 扫描完成时为列式结果建立倒排表, 支撑文件清单/重复组/相似组的分页、筛选、排序和字段投影
+
+- 筛选: 分类/文件类型/质量标签/OCR/审核 各建一张 取值 -> 行号 的倒排表, 多条件取交集
+- 排序: 按列的行号排列在首次使用时计算, 之后复用
+- 投影: 只解码请求的列, 不构建 Pydantic 对象
+"""
+import math
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from models.schemas import (
+    ScanResult, FilePage, DuplicateGroupPage, SimilarGroupPage
+)
+from models.result_table import FileTable, KIND_OBJECT, KIND_STR, KIND_ENUM, KIND_TIME
+
+
+# 建倒排表的列
+FILTER_COLUMNS = ('category', 'file_type', 'quality_tag', 'needs_ocr', 'needs_review')
+
+# 摘要中不包含的大字段(改由分页接口获取)
+SUMMARY_EXCLUDE = {
+    'files': True,
+    'ocr_files': True,
+    'review_files': True,
+    'duplicate_groups': True,
+    'similar_groups': True,
+    'category_stats': {'simple_files', 'medium_files', 'complex_files'},
+}
+
+DUPLICATE_SORTS = ('count', 'size')
+SIMILAR_SORTS = ('similarity', 'count')
+
+
+class ResultIndex:
+    """单个任务的结果索引"""
+
+    def __init__(self, result: ScanResult):
+        self.result = result
+        self.table: FileTable = result.file_table
+        self.postings: Dict[str, Dict[Any, array]] = {}
+        self._orders: Dict[str, array] = {}
+        self._ranks: Dict[str, array] = {}
+        self._group_orders: Dict[str, List[int]] = {}
+        self._summary: Optional[Dict[str, Any]] = None
+
+        for name in FILTER_COLUMNS:
+            postings: Dict[Any, array] = {}
+            for row, value in enumerate(self.table.column(name)):
+                rows = postings.get(value)
+                if rows is None:
+                    rows = postings[value] = array('q')
+                rows.append(row)
+            self.postings[name] = postings
+
+    # ---- 文件清单 ----
+
+    def files(self, filters: Optional[Dict[str, Sequence[Any]]] = None,
+              min_size: Optional[int] = None, max_size: Optional[int] = None,
+              sort: Optional[str] = None, descending: bool = False,
+              offset: int = 0, limit: int = 100,
+              fields: Optional[List[str]] = None) -> FilePage:
+        """
+        分页获取文件清单
+
+        Args:
+            filters: 列名 -> 可选取值(同列取并集, 不同列取交集), 列须在 FILTER_COLUMNS 中
+            min_size / max_size: 文件大小范围(字节, 闭区间)
+            sort: 排序列名, 为空时按扫描顺序
+            fields: 投影的列名(扁平列名), 为空时返回完整 FileAnalysis
+
+        Raises:
+            ValueError: 未知的筛选/排序/投影列
+        """
+        table = self.table
+        self._check_columns(fields or [])
+        rows = self._filter(filters or {}, min_size, max_size)
+
+        if sort:
+            self._check_columns([sort])
+            if rows is None:
+                ordered: Sequence[int] = self._order(sort)
+                if descending:
+                    ordered = ordered[::-1]
+            else:
+                rank = self._rank(sort)
+                ordered = sorted(rows, key=rank.__getitem__, reverse=descending)
+        elif rows is None:
+            ordered = range(len(table))
+            if descending:
+                ordered = ordered[::-1]
+        else:
+            ordered = sorted(rows, reverse=descending)
+
+        page = ordered[offset:offset + limit] if limit > 0 else []
+        if fields:
+            items = [{f: table.value(f, row) for f in fields} for row in page]
+        else:
+            items = table.rows(page)
+        return FilePage(total=len(ordered), offset=offset, limit=limit, items=items)
+
+    def _filter(self, filters: Dict[str, Sequence[Any]], min_size: Optional[int],
+                max_size: Optional[int]) -> Optional[Set[int]]:
+        """返回满足条件的行号集合; 没有任何条件时返回 None"""
+        rows: Optional[Set[int]] = None
+        for name, values in filters.items():
+            if not values:
+                continue
+            postings = self.postings.get(name)
+            if postings is None:
+                raise ValueError(f"不支持按该列筛选: {name}")
+            matched: Set[int] = set()
+            for value in values:
+                key = value if isinstance(value, bool) else self.table.code(value)
+                matched.update(postings.get(key, ()))
+            rows = matched if rows is None else rows & matched
+
+        if min_size is not None or max_size is not None:
+            low = -math.inf if min_size is None else min_size
+            high = math.inf if max_size is None else max_size
+            sizes = self.table.column('size')
+            candidates: Iterable[int] = range(len(sizes)) if rows is None else rows
+            rows = {row for row in candidates if low <= sizes[row] <= high}
+        return rows
+
+    def _order(self, name: str) -> array:
+        """按列排序的行号(首次使用时计算)"""
+        order = self._orders.get(name)
+        if order is None:
+            table = self.table
+            col = table.columns[name]
+            data = col.data
+            if col.kind in (KIND_STR, KIND_ENUM):
+                strings = table.strings
+                key = lambda row: (data[row] < 0, (strings.get(data[row]) or '').lower())
+            elif col.kind == KIND_TIME:
+                key = lambda row: (math.isnan(data[row]), data[row])
+            else:
+                key = data.__getitem__
+            order = self._orders[name] = array('q', sorted(range(len(table)), key=key))
+        return order
+
+    def _rank(self, name: str) -> array:
+        """行号 -> 排序位置"""
+        rank = self._ranks.get(name)
+        if rank is None:
+            order = self._order(name)
+            rank = array('q', bytes(8 * len(order)))
+            for position, row in enumerate(order):
+                rank[row] = position
+            self._ranks[name] = rank
+        return rank
+
+    def _check_columns(self, names: Iterable[str]):
+        columns = self.table.columns
+        for name in names:
+            col = columns.get(name)
+            if col is None or col.kind == KIND_OBJECT:
+                raise ValueError(f"未知的列: {name}")
+
+    # ---- 摘要 ----
+
+    def summary(self) -> Dict[str, Any]:
+        """不含文件清单和分组明细的结果摘要"""
+        if self._summary is None:
+            result = self.result
+            summary = result.model_dump(mode='json', exclude=SUMMARY_EXCLUDE)
+            summary.update(
+                ocr_file_count=len(self.postings['needs_ocr'].get(True, ())),
+                review_file_count=len(self.postings['needs_review'].get(True, ())),
+                duplicate_group_count=len(result.duplicate_groups),
+                similar_group_count=len(result.similar_groups),
+            )
+            self._summary = summary
+        return self._summary
+
+    # ---- 重复/相似组 ----
+
+    def duplicate_groups(self, sort: str = 'count', offset: int = 0, limit: int = 50) -> DuplicateGroupPage:
+        """分页获取重复文件组(count: 按副本数; size: 按可节省的字节数)"""
+        groups = self.result.duplicate_groups
+        order = self._group_order(f'duplicate:{sort}', len(groups), self._duplicate_key(sort))
+        page = order[offset:offset + limit]
+        return DuplicateGroupPage(total=len(groups), offset=offset, limit=limit,
+                                  items=[groups[i] for i in page])
+
+    def similar_groups(self, sort: str = 'similarity', offset: int = 0, limit: int = 50) -> SimilarGroupPage:
+        """分页获取相似文档组(similarity: 按相似度; count: 按组内文件数)"""
+        groups = self.result.similar_groups
+        if sort == 'similarity':
+            key = lambda i: -groups[i].similarity
+        elif sort == 'count':
+            key = lambda i: -len(groups[i].files)
+        else:
+            raise ValueError(f"不支持的排序方式: {sort}")
+        order = self._group_order(f'similar:{sort}', len(groups), key)
+        page = order[offset:offset + limit]
+        return SimilarGroupPage(total=len(groups), offset=offset, limit=limit,
+                                items=[groups[i] for i in page])
+
+    def _duplicate_key(self, sort: str):
+        groups = self.result.duplicate_groups
+        if sort == 'count':
+            return lambda i: -groups[i].count
+        if sort == 'size':
+            table = self.table
+            paths = table.column('path')
+            sizes = table.column('size')
+            size_of = {table.strings.get(p): s for p, s in zip(paths, sizes)}
+            return lambda i: -size_of.get(groups[i].files[0], 0) * (groups[i].count - 1)
+        raise ValueError(f"不支持的排序方式: {sort}")
+
+    def _group_order(self, name: str, count: int, key) -> List[int]:
+        order = self._group_orders.get(name)
+        if order is None:
+            order = self._group_orders[name] = sorted(range(count), key=key)
+        return order
@@ -0,0 +1,248 @@
+"""
+抽样外推器 - 用分层样本估计总体的长度/结构/分类/PDF页面统计, 并给出置信区间
+
+总量采用分层估计 Σ N_h·ȳ_h, 方差含有限总体校正;
+比值(如平均长度、文字页占比)采用比估计, 方差按线性化近似。
+"""
+import math
+from collections import defaultdict
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models.schemas import (
+    FileAnalysis, FileType, DocumentCategory, Estimate,
+    LengthStats, StructureStats, CategoryStats, PageTypeStats, ChunkingStats, NoiseStats
+)
+from ..sampler import SampleFrame, Stratum
+from .chunk_analyzer import ChunkAnalyzer
+
+
+Metric = Callable[[FileAnalysis], float]
+
+# 长度分布区间(与 StatsAnalyzer 一致)
+LENGTH_BUCKETS = (
+    ('under_500', 0, 500),
+    ('range_500_2000', 500, 2000),
+    ('range_2000_5000', 2000, 5000),
+    ('range_5000_10000', 5000, 10000),
+    ('over_10000', 10000, math.inf),
+)
+
+
+class SampleEstimator:
+    """分层抽样外推器"""
+
+    def __init__(self, frame: SampleFrame, analyses: List[FileAnalysis], confidence: float = 0.95):
+        self.population = frame.population
+        self.population_size = frame.population_size
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+        # 按层归组(只统计能对应到层的样本)
+        self.groups: Dict[Stratum, List[FileAnalysis]] = defaultdict(list)
+        for a in analyses:
+            key = frame.stratum_of.get(a.file_info.path)
+            if key is not None:
+                self.groups[key].append(a)
+
+        self.estimates: Dict[str, Estimate] = {}
+
+    # ---- 基础估计量 ----
+
+    def total(self, metric: Metric) -> Tuple[float, float]:
+        """总体总量的估计值及方差"""
+        value = 0.0
+        variance = 0.0
+        for key, items in self.groups.items():
+            N = self.population[key]
+            n = len(items)
+            ys = [metric(a) for a in items]
+            mean = sum(ys) / n
+            value += N * mean
+            if n > 1:
+                s2 = sum((y - mean) ** 2 for y in ys) / (n - 1)
+                variance += N * N * (1 - n / N) * s2 / n
+        return value, variance
+
+    def ratio(self, numerator: Metric, denominator: Metric) -> Tuple[float, float]:
+        """比值 Y/X 的估计值及方差(线性化)"""
+        y_total, _ = self.total(numerator)
+        x_total, _ = self.total(denominator)
+        if x_total <= 0:
+            return 0.0, 0.0
+        r = y_total / x_total
+        _, residual_var = self.total(lambda a: numerator(a) - r * denominator(a))
+        return r, residual_var / (x_total * x_total)
+
+    def weighted_values(self, metric: Metric, where: Metric) -> List[Tuple[float, float]]:
+        """满足条件的样本值及其抽样权重 N_h/n_h"""
+        values = []
+        for key, items in self.groups.items():
+            weight = self.population[key] / len(items)
+            values.extend((metric(a), weight) for a in items if where(a))
+        return values
+
+    def _record(self, name: str, value: float, variance: float,
+                upper_bound: Optional[float] = None) -> Estimate:
+        margin = self.z * math.sqrt(max(variance, 0.0))
+        upper = value + margin
+        if upper_bound is not None:
+            upper = min(upper, upper_bound)
+        estimate = Estimate(
+            value=round(value, 4),
+            lower=round(max(0.0, value - margin), 4),
+            upper=round(upper, 4),
+        )
+        self.estimates[name] = estimate
+        return estimate
+
+    def _count(self, name: str, metric: Metric) -> int:
+        value, variance = self.total(metric)
+        return round(self._record(name, value, variance).value)
+
+    # ---- 外推各项统计 ----
+
+    def length_stats(self) -> LengthStats:
+        ok = _parsed
+        values = sorted(self.weighted_values(lambda a: a.metrics.char_count, ok))
+        if not values:
+            return LengthStats()
+
+        mean, mean_var = self.ratio(lambda a: a.metrics.char_count * ok(a), ok)
+        self._record('length_stats.mean', mean, mean_var)
+        weight_sum = sum(w for _, w in values)
+        std = math.sqrt(sum(w * (v - mean) ** 2 for v, w in values) / weight_sum)
+
+        stats = LengthStats(
+            min=int(values[0][0]),
+            max=int(values[-1][0]),
+            mean=mean,
+            std=std,
+            median=_weighted_percentile(values, 50),
+            p25=_weighted_percentile(values, 25),
+            p75=_weighted_percentile(values, 75),
+            p90=_weighted_percentile(values, 90),
+            p99=_weighted_percentile(values, 99),
+        )
+        for field, low, high in LENGTH_BUCKETS:
+            count = self._count(
+                f'length_stats.{field}',
+                lambda a, low=low, high=high: float(ok(a) and low <= a.metrics.char_count < high)
+            )
+            setattr(stats, field, count)
+        return stats
+
+    def structure_stats(self) -> StructureStats:
+        N = self.population_size
+        stats = StructureStats()
+        if N == 0:
+            return stats
+
+        stats.docs_with_tables = self._count('structure_stats.docs_with_tables',
+                                             lambda a: float(a.metrics.table_count > 0))
+        stats.docs_with_images = self._count('structure_stats.docs_with_images',
+                                             lambda a: float(a.metrics.image_count > 0))
+        stats.docs_with_headings = self._count('structure_stats.docs_with_headings',
+                                               lambda a: float(a.metrics.heading_count > 0))
+
+        # 总体文件数已知, 占比/均值的区间直接由总量区间除以 N 得到
+        stats.table_ratio = self._per_doc('structure_stats.table_ratio',
+                                          lambda a: float(a.metrics.table_count > 0), N, 1.0)
+        stats.image_ratio = self._per_doc('structure_stats.image_ratio',
+                                          lambda a: float(a.metrics.image_count > 0), N, 1.0)
+        stats.avg_tables_per_doc = self._per_doc('structure_stats.avg_tables_per_doc',
+                                                 lambda a: a.metrics.table_count, N)
+        stats.avg_images_per_doc = self._per_doc('structure_stats.avg_images_per_doc',
+                                                 lambda a: a.metrics.image_count, N)
+        stats.avg_paragraphs = self._per_doc('structure_stats.avg_paragraphs',
+                                             lambda a: a.metrics.paragraph_count, N)
+        return stats
+
+    def _per_doc(self, name: str, metric: Metric, N: int,
+                 upper_bound: Optional[float] = None) -> float:
+        value, variance = self.total(metric)
+        return self._record(name, value / N, variance / (N * N), upper_bound).value
+
+    def category_stats(self) -> CategoryStats:
+        """分类数量为外推值, 文件清单只列出样本"""
+        stats = CategoryStats()
+        fields = (
+            ('simple', DocumentCategory.SIMPLE),
+            ('medium', DocumentCategory.MEDIUM),
+            ('complex', DocumentCategory.COMPLEX),
+        )
+        for prefix, category in fields:
+            count = self._count(f'category_stats.{prefix}_count',
+                                lambda a, c=category: float(a.category == c))
+            setattr(stats, f'{prefix}_count', count)
+            setattr(stats, f'{prefix}_files', [
+                a.file_info.path for items in self.groups.values() for a in items
+                if a.category == category
+            ])
+        return stats
+
+    def pdf_page_stats(self) -> PageTypeStats:
+        def pages_of(pdf_type: Optional[str]) -> Metric:
+            def metric(a: FileAnalysis) -> float:
+                if a.file_info.file_type != FileType.PDF:
+                    return 0.0
+                if pdf_type is None:
+                    return a.metrics.page_count
+                actual = a.metrics.pdf_type.value if a.metrics.pdf_type else None
+                if pdf_type == 'low_density':
+                    return a.metrics.page_count if actual not in (None, 'text', 'scan') else 0.0
+                return a.metrics.page_count if actual == pdf_type else 0.0
+            return metric
+
+        stats = PageTypeStats(
+            text_pages=self._count('pdf_page_stats.text_pages', pages_of('text')),
+            scan_pages=self._count('pdf_page_stats.scan_pages', pages_of('scan')),
+            low_density_pages=self._count('pdf_page_stats.low_density_pages', pages_of('low_density')),
+            total_pages=self._count('pdf_page_stats.total_pages', pages_of(None)),
+        )
+        text_ratio, text_var = self.ratio(pages_of('text'), pages_of(None))
+        scan_ratio, scan_var = self.ratio(pages_of('scan'), pages_of(None))
+        stats.text_ratio = self._record('pdf_page_stats.text_ratio', text_ratio, text_var, 1.0).value
+        stats.scan_ratio = self._record('pdf_page_stats.scan_ratio', scan_ratio, scan_var, 1.0).value
+        return stats
+
+    def chunking_stats(self, chunker: ChunkAnalyzer) -> ChunkingStats:
+        """按格式外推 token 数和切块数"""
+        by_format = {}
+        for file_type in sorted({key[0] for key in self.population}):
+            files = sum(N for key, N in self.population.items() if key[0] == file_type)
+            tokens, _ = self.total(lambda a, t=file_type: a.metrics.token_count if a.file_info.file_type.value == t else 0.0)
+            chunks, _ = self.total(lambda a, t=file_type: a.metrics.chunk_count if a.file_info.file_type.value == t else 0.0)
+            by_format[file_type] = (files, round(tokens), round(chunks))
+        self._count('chunking_stats.tokens', lambda a: a.metrics.token_count)
+        self._count('chunking_stats.chunks', lambda a: a.metrics.chunk_count)
+        return chunker.summarize(by_format)
+
+    def noise_stats(self, sampled: NoiseStats) -> NoiseStats:
+        """行数/文档数外推到总体, 比例用比估计; 模式命中与重复行只列出样本内的情况"""
+        stats = sampled.model_copy()
+        stats.total_lines = self._count('noise_stats.total_lines', lambda a: a.metrics.line_count)
+        stats.noise_lines = self._count('noise_stats.noise_lines', lambda a: a.metrics.noise_line_count)
+        stats.docs_with_noise = self._count('noise_stats.docs_with_noise',
+                                            lambda a: float(a.metrics.noise_line_count > 0))
+        ratio, variance = self.ratio(lambda a: a.metrics.noise_line_count, lambda a: a.metrics.line_count)
+        stats.noise_ratio = self._record('noise_stats.noise_ratio', ratio, variance, 1.0).value
+        has_text = lambda a: float(a.metrics.line_count > 0)
+        mean, variance = self.ratio(lambda a: a.metrics.noise_ratio * has_text(a), has_text)
+        stats.avg_doc_noise_ratio = self._record('noise_stats.avg_doc_noise_ratio', mean, variance, 1.0).value
+        return stats
+
+
+def _parsed(a: FileAnalysis) -> float:
+    return float(a.file_info.parse_success)
+
+
+def _weighted_percentile(values: List[Tuple[float, float]], p: float) -> float:
+    """加权分位数(values 已按值排序)"""
+    target = sum(w for _, w in values) * p / 100
+    cumulative = 0.0
+    for value, weight in values:
+        cumulative += weight
+        if cumulative >= target:
+            return float(value)
+    return float(values[-1][0])
@@ -5,6 +5,9 @@ from typing import List, Dict, Tuple
 from collections import defaultdict
 import hashlib
 import re
+import time
+
+from utils.metrics import SIMHASH_SECONDS, SIMILARITY_GROUPING_SECONDS
 
 
 class SimHash:
@@ -106,7 +109,9 @@ class SimilarityAnalyzer:
         """
         # 截取前10000字符计算（避免超长文档影响性能）
         truncated_text = text[:10000] if len(text) > 10000 else text
+        started = time.perf_counter()
         hash_value = self.simhash.hash(truncated_text)
+        SIMHASH_SECONDS.observe(time.perf_counter() - started)
         self.file_hashes[file_path] = hash_value
         return hash_value
     
@@ -117,6 +122,13 @@ class SimilarityAnalyzer:
         Returns:
             相似文档组列表，每组包含 files(文件列表)、distance(最小汉明距离)、similarity(相似度估算)
         """
+        started = time.perf_counter()
+        try:
+            return self._find_similar_groups()
+        finally:
+            SIMILARITY_GROUPING_SECONDS.observe(time.perf_counter() - started)
+    
+    def _find_similar_groups(self) -> List[Dict]:
         if len(self.file_hashes) < 2:
             return []
         
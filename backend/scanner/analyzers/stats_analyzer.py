@@ -1,127 +1,258 @@
 """
 统计分析器 - 计算文档长度分布、结构复杂度
+
+逐文件流式累计, 不需要保留全部分析结果:
+- 均值/方差: Welford 在线算法(可按 Chan 公式合并)
+- 分位数: 对数分桶草图(DDSketch), 相对误差有界, 可合并
+- 长度区间: 固定分桶计数
+多个工作进程的部分结果可通过 merge 合并。
 """
 import math
-from typing import List
+from typing import Dict, List, Optional
 
 from models.schemas import FileAnalysis, LengthStats, StructureStats
+from config.settings import settings
+
+
+class RunningMoments:
+    """在线均值/方差(Welford)"""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+
+    def merge(self, other: 'RunningMoments'):
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """总体方差"""
+        return self.m2 / self.count if self.count > 1 else 0.0
+
+
+class QuantileSketch:
+    """
+    对数分桶分位数草图(DDSketch)
+
+    正值 x 落入桶 ceil(log_γ(x)), γ=(1+α)/(1-α), 桶内取代表值 2γ^k/(γ+1),
+    保证返回的分位数与真实值的相对误差不超过 α。零值单独计数。
+    桶数超过上限时合并最小的桶(只影响最低端分位数的精度)。
+    """
+
+    def __init__(self, relative_accuracy: Optional[float] = None, max_buckets: Optional[int] = None):
+        self.alpha = relative_accuracy or settings.stats.quantile_relative_accuracy
+        self.max_buckets = max_buckets or settings.stats.quantile_max_buckets
+        self.gamma = (1 + self.alpha) / (1 - self.alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, x: float):
+        self.count += 1
+        if x <= 0:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(x) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def merge(self, other: 'QuantileSketch'):
+        """合并另一个草图(须使用相同的相对误差)"""
+        if other.alpha != self.alpha:
+            raise ValueError("只能合并相对误差相同的分位数草图")
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        target = keys[excess]
+        for key in keys[:excess]:
+            self.buckets[target] += self.buckets.pop(key)
+
+    def quantile(self, q: float) -> float:
+        """q 取 [0, 1]"""
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class LengthHistogram:
+    """字符数固定区间计数"""
+
+    # (LengthStats 字段, 区间上界)
+    BINS = (
+        ('under_500', 500),
+        ('range_500_2000', 2000),
+        ('range_2000_5000', 5000),
+        ('range_5000_10000', 10000),
+        ('over_10000', math.inf),
+    )
+
+    def __init__(self):
+        self.counts: List[int] = [0] * len(self.BINS)
+
+    def add(self, x: float):
+        for i, (_, upper) in enumerate(self.BINS):
+            if x < upper:
+                self.counts[i] += 1
+                return
+
+    def merge(self, other: 'LengthHistogram'):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+
+class StatsAccumulator:
+    """逐文件累计的统计状态"""
+
+    def __init__(self):
+        # 长度统计(只统计解析成功的文件)
+        self.moments = RunningMoments()
+        self.sketch = QuantileSketch()
+        self.histogram = LengthHistogram()
+
+        # 结构统计(统计全部文件)
+        self.total_docs = 0
+        self.docs_with_tables = 0
+        self.docs_with_images = 0
+        self.docs_with_headings = 0
+        self.total_tables = 0
+        self.total_images = 0
+        self.total_paragraphs = 0
+
+    def add(self, analysis: FileAnalysis):
+        m = analysis.metrics
+        if analysis.file_info.parse_success:
+            self.moments.add(m.char_count)
+            self.sketch.add(m.char_count)
+            self.histogram.add(m.char_count)
+
+        self.total_docs += 1
+        if m.table_count > 0:
+            self.docs_with_tables += 1
+            self.total_tables += m.table_count
+        if m.image_count > 0:
+            self.docs_with_images += 1
+            self.total_images += m.image_count
+        if m.heading_count > 0:
+            self.docs_with_headings += 1
+        self.total_paragraphs += m.paragraph_count
+
+    def merge(self, other: 'StatsAccumulator'):
+        """合并其他工作进程的部分结果"""
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self.histogram.merge(other.histogram)
+        self.total_docs += other.total_docs
+        self.docs_with_tables += other.docs_with_tables
+        self.docs_with_images += other.docs_with_images
+        self.docs_with_headings += other.docs_with_headings
+        self.total_tables += other.total_tables
+        self.total_images += other.total_images
+        self.total_paragraphs += other.total_paragraphs
+
+    def length_stats(self) -> LengthStats:
+        """计算长度分布统计"""
+        moments = self.moments
+        if moments.count == 0:
+            return LengthStats()
+
+        def quantile(q: float) -> float:
+            # 桶代表值可能略超出实际观测范围, 限制在 [最小值, 最大值] 内
+            return min(max(self.sketch.quantile(q), moments.min), moments.max)
+
+        stats = LengthStats(
+            min=int(moments.min),
+            max=int(moments.max),
+            mean=moments.mean,
+            std=math.sqrt(moments.variance),
+            median=quantile(0.50),
+            p25=quantile(0.25),
+            p75=quantile(0.75),
+            p90=quantile(0.90),
+            p99=quantile(0.99),
+        )
+        for (field, _), count in zip(LengthHistogram.BINS, self.histogram.counts):
+            setattr(stats, field, count)
+        return stats
+
+    def structure_stats(self) -> StructureStats:
+        """计算结构复杂度统计"""
+        stats = StructureStats(
+            docs_with_tables=self.docs_with_tables,
+            docs_with_images=self.docs_with_images,
+            docs_with_headings=self.docs_with_headings,
+        )
+        total = self.total_docs
+        if total > 0:
+            stats.table_ratio = self.docs_with_tables / total
+            stats.image_ratio = self.docs_with_images / total
+            stats.avg_tables_per_doc = self.total_tables / total
+            stats.avg_images_per_doc = self.total_images / total
+            stats.avg_paragraphs = self.total_paragraphs / total
+        return stats
+
+    def result(self) -> dict:
+        return {
+            'length_stats': self.length_stats(),
+            'structure_stats': self.structure_stats()
+        }
 
 
 class StatsAnalyzer:
     """统计分析器"""
-    
+
+    def accumulator(self) -> StatsAccumulator:
+        """创建逐文件累计的统计状态"""
+        return StatsAccumulator()
+
     def analyze(self, analyses: List[FileAnalysis]) -> dict:
         """
         对所有文件分析结果进行统计
-        
+
         Returns:
             包含 length_stats, structure_stats 的字典
         """
-        if not analyses:
-            return {
-                'length_stats': LengthStats(),
-                'structure_stats': StructureStats()
-            }
-        
-        # 收集所有字符数
-        char_counts = [a.metrics.char_count for a in analyses if a.file_info.parse_success]
-        
-        # 计算长度统计
-        length_stats = self._calculate_length_stats(char_counts)
-        
-        # 计算结构复杂度
-        structure_stats = self._calculate_structure_stats(analyses)
-        
-        return {
-            'length_stats': length_stats,
-            'structure_stats': structure_stats
-        }
-    
-    def _calculate_length_stats(self, char_counts: List[int]) -> LengthStats:
-        """计算长度分布统计"""
-        if not char_counts:
-            return LengthStats()
-        
-        sorted_counts = sorted(char_counts)
-        n = len(sorted_counts)
-        
-        # 基础统计
-        stats = LengthStats(
-            min=sorted_counts[0],
-            max=sorted_counts[-1],
-            mean=sum(sorted_counts) / n,
-            median=self._percentile(sorted_counts, 50),
-            p25=self._percentile(sorted_counts, 25),
-            p75=self._percentile(sorted_counts, 75),
-            p90=self._percentile(sorted_counts, 90),
-            p99=self._percentile(sorted_counts, 99)
-        )
-        
-        # 标准差
-        if n > 1:
-            variance = sum((x - stats.mean) ** 2 for x in sorted_counts) / n
-            stats.std = math.sqrt(variance)
-        
-        # 长度分布区间
-        for count in char_counts:
-            if count < 500:
-                stats.under_500 += 1
-            elif count < 2000:
-                stats.range_500_2000 += 1
-            elif count < 5000:
-                stats.range_2000_5000 += 1
-            elif count < 10000:
-                stats.range_5000_10000 += 1
-            else:
-                stats.over_10000 += 1
-        
-        return stats
-    
-    def _percentile(self, sorted_data: List[int], p: float) -> float:
-        """计算分位数"""
-        if not sorted_data:
-            return 0
-        n = len(sorted_data)
-        idx = (n - 1) * p / 100
-        lower = int(idx)
-        upper = lower + 1
-        if upper >= n:
-            return float(sorted_data[-1])
-        weight = idx - lower
-        return sorted_data[lower] * (1 - weight) + sorted_data[upper] * weight
-    
-    def _calculate_structure_stats(self, analyses: List[FileAnalysis]) -> StructureStats:
-        """计算结构复杂度统计"""
-        stats = StructureStats()
-        
-        if not analyses:
-            return stats
-        
-        total = len(analyses)
-        total_tables = 0
-        total_images = 0
-        total_paragraphs = 0
-        
+        acc = self.accumulator()
         for a in analyses:
-            m = a.metrics
-            
-            if m.table_count > 0:
-                stats.docs_with_tables += 1
-                total_tables += m.table_count
-            
-            if m.image_count > 0:
-                stats.docs_with_images += 1
-                total_images += m.image_count
-            
-            if m.heading_count > 0:
-                stats.docs_with_headings += 1
-            
-            total_paragraphs += m.paragraph_count
-        
-        stats.table_ratio = stats.docs_with_tables / total if total > 0 else 0
-        stats.image_ratio = stats.docs_with_images / total if total > 0 else 0
-        stats.avg_tables_per_doc = total_tables / total if total > 0 else 0
-        stats.avg_images_per_doc = total_images / total if total > 0 else 0
-        stats.avg_paragraphs = total_paragraphs / total if total > 0 else 0
-        
-        return stats
+            acc.add(a)
+        return acc.result()
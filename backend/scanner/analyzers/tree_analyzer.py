@@ -0,0 +1,177 @@
+"""
+目录树汇总分析器 - 一次遍历扫描结果, 自底向上汇总每个目录的文件数/大小/分类/OCR/失败/重复
+
+归档成员的虚拟路径(/a/b.zip!/docs/x.docx)中, 归档本身作为一层目录。
+"""
+import os
+from collections import Counter
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from models.schemas import ScanResult, DocumentCategory, DirectoryRollup, DirectoryTreeView
+from models.result_table import FileTable
+from ..archive_reader import ARCHIVE_SEPARATOR
+from .chunk_analyzer import ChunkAnalyzer
+
+
+# 汇总计数字段
+ROLLUP_FIELDS = (
+    'file_count', 'total_size', 'simple_count', 'medium_count', 'complex_count',
+    'ocr_count', 'scan_pages', 'failed_count', 'duplicate_count',
+    'token_count', 'chunk_count',
+)
+
+SORT_KEYS = {
+    'name': lambda n: n.path.lower(),
+    'size': lambda n: -n.counts[1],
+    'files': lambda n: -n.counts[0],
+}
+
+
+class DirectoryNode:
+    """目录节点"""
+
+    __slots__ = ('path', 'parent', 'depth', 'children', 'files', 'counts')
+
+    def __init__(self, path: str, parent: Optional['DirectoryNode'], depth: int):
+        self.path = path
+        self.parent = parent
+        self.depth = depth
+        self.children: List['DirectoryNode'] = []
+        self.files = array('q')  # 直接位于该目录下的文件(列式表行号)
+        self.counts = [0] * len(ROLLUP_FIELDS)
+
+    @property
+    def name(self) -> str:
+        name = os.path.basename(self.path) or self.path
+        return name[:-1] if self.is_archive else name
+
+    @property
+    def is_archive(self) -> bool:
+        return self.path.endswith(ARCHIVE_SEPARATOR[0])
+
+    def rollup(self, chunker: Optional[ChunkAnalyzer] = None) -> DirectoryRollup:
+        counts = dict(zip(ROLLUP_FIELDS, self.counts))
+        cost = {}
+        if chunker is not None:
+            estimate = chunker.estimate(counts['file_count'], counts['token_count'], counts['chunk_count'])
+            cost = {'embedding_seconds': estimate.embedding_seconds, 'storage_bytes': estimate.storage_bytes}
+        return DirectoryRollup(
+            path=self.path,
+            name=self.name,
+            is_archive=self.is_archive,
+            subdir_count=len(self.children),
+            direct_file_count=len(self.files),
+            **counts,
+            **cost,
+        )
+
+
+class DirectoryTree:
+    """目录树汇总"""
+
+    def __init__(self, root: str, table: FileTable):
+        self.root_path = root
+        self.table = table
+        self.root = DirectoryNode(root, None, 0)
+        self.nodes: Dict[str, DirectoryNode] = {root: self.root}
+        self.chunker = ChunkAnalyzer()
+
+    @classmethod
+    def build(cls, result: ScanResult) -> 'DirectoryTree':
+        table = result.file_table
+        tree = cls(str(Path(result.scan_path)), table)
+
+        code = table.code
+        simple = code(DocumentCategory.SIMPLE.value)
+        medium = code(DocumentCategory.MEDIUM.value)
+        complex_ = code(DocumentCategory.COMPLEX.value)
+
+        # 内容哈希出现多次的文件即为重复
+        empty_hash = code("")
+        hash_counts = Counter(table.column('file_hash'))
+        duplicated = {h for h, n in hash_counts.items() if n > 1 and h >= 0 and h != empty_hash}
+
+        # 一次遍历: 每个文件计入其直接所在目录
+        paths = table.column('path')
+        columns = zip(
+            table.column('size'), table.column('category'), table.column('needs_ocr'),
+            table.column('scan_page_count'), table.column('parse_success'), table.column('file_hash'),
+            table.column('token_count'), table.column('chunk_count'),
+        )
+        for row, (size, category, needs_ocr, scan_pages, ok, file_hash, tokens, chunks) in enumerate(columns):
+            node = tree._node_for(os.path.dirname(table.strings.get(paths[row])))
+            node.files.append(row)
+            c = node.counts
+            c[0] += 1
+            c[1] += size
+            if category == simple:
+                c[2] += 1
+            elif category == medium:
+                c[3] += 1
+            elif category == complex_:
+                c[4] += 1
+            c[5] += needs_ocr
+            c[6] += scan_pages
+            c[7] += not ok
+            c[8] += file_hash in duplicated
+            c[9] += tokens
+            c[10] += chunks
+
+        # 自底向上: 子目录汇总累加到父目录
+        for node in sorted(tree.nodes.values(), key=lambda n: n.depth, reverse=True):
+            if node.parent is not None:
+                parent_counts = node.parent.counts
+                for i, v in enumerate(node.counts):
+                    parent_counts[i] += v
+        return tree
+
+    def _node_for(self, dir_path: str) -> DirectoryNode:
+        """查找或创建目录节点(连同缺失的上级目录)"""
+        node = self.nodes.get(dir_path)
+        if node is not None:
+            return node
+
+        # 向上找到已存在的祖先, 再依次创建中间目录
+        missing = []
+        current = dir_path
+        while current not in self.nodes:
+            parent = os.path.dirname(current)
+            if parent == current:
+                # 不在扫描根目录之下, 直接挂到根节点
+                return self.root
+            missing.append(current)
+            current = parent
+
+        node = self.nodes[current]
+        for path in reversed(missing):
+            child = DirectoryNode(path, node, node.depth + 1)
+            node.children.append(child)
+            self.nodes[path] = child
+            node = child
+        return node
+
+    def view(self, path: Optional[str] = None, offset: int = 0, limit: int = 100,
+             sort: str = 'name') -> Optional[DirectoryTreeView]:
+        """
+        获取目录树的一层
+
+        Args:
+            path: 目录路径, 为空时取扫描根目录
+            offset / limit: 直接文件的分页
+            sort: 子目录排序方式(name / size / files)
+        """
+        node = self.root if not path else self.nodes.get(path) or self.nodes.get(str(Path(path)))
+        if node is None:
+            return None
+
+        children = sorted(node.children, key=SORT_KEYS.get(sort, SORT_KEYS['name']))
+        rows = node.files[offset:offset + limit] if limit > 0 else []
+        return DirectoryTreeView(
+            node=node.rollup(self.chunker),
+            children=[c.rollup(self.chunker) for c in children],
+            files=self.table.rows(rows),
+            offset=offset,
+            limit=limit,
+        )
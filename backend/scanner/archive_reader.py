@@ -0,0 +1,182 @@
+"""
+归档读取器 - 将 ZIP 归档中的成员作为虚拟文件流式读出, 不解压到磁盘
+"""
+import io
+import zipfile
+import zlib
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import Generator, Iterable, Optional, Set
+
+from config.settings import settings
+
+
+# 虚拟路径分隔符: /data/bundle.zip!/docs/a.docx
+ARCHIVE_SEPARATOR = "!/"
+
+
+class ArchiveMember:
+    """归档成员(虚拟文件)"""
+
+    __slots__ = ('virtual_path', 'archive_path', 'name', 'extension', 'size',
+                 'modified_time', 'data', 'is_archive', 'is_encrypted', 'error')
+
+    def __init__(self, virtual_path: str, archive_path: str, info: zipfile.ZipInfo):
+        member = PurePosixPath(info.filename)
+        self.virtual_path = virtual_path
+        self.archive_path = archive_path
+        self.name = member.name
+        self.extension = member.suffix.lower()
+        self.size = info.file_size
+        self.modified_time = _zip_datetime(info)
+        self.data: Optional[bytes] = None
+        self.is_archive = False
+        self.is_encrypted = bool(info.flag_bits & 0x1)
+        self.error: Optional[str] = None
+
+
+class _Budget:
+    """单个顶层归档的成员数/解压字节数预算(含嵌套归档)"""
+
+    __slots__ = ('members', 'bytes')
+
+    def __init__(self, members: int, total_bytes: int):
+        self.members = members
+        self.bytes = total_bytes
+
+
+class ArchiveReader:
+    """ZIP 归档读取器(带成员数、解压总量、嵌套深度限制)"""
+
+    def __init__(self, member_extensions: Iterable[str]):
+        """
+        Args:
+            member_extensions: 需要读出的成员扩展名(其余成员直接跳过, 不解压)
+        """
+        self.config = settings.archive
+        self.member_extensions = set(member_extensions)
+        self.archive_extensions = set(self.config.extensions)
+
+    def is_archive(self, file_path: Path) -> bool:
+        return file_path.suffix.lower() in self.archive_extensions
+
+    def iter_members(self, archive_path: Path, only: Optional[Set[str]] = None
+                     ) -> Generator[ArchiveMember, None, None]:
+        """
+        逐个读出归档成员, 每次只在内存中保留一个成员的内容
+
+        Args:
+            only: 只读出这些顶层成员(归档内路径), 为 None 时读出全部
+
+        Raises:
+            zipfile.BadZipFile / OSError: 顶层归档无法打开
+        """
+        budget = _Budget(self.config.max_members, self.config.max_total_bytes)
+        with zipfile.ZipFile(archive_path) as zf:
+            yield from self._iter_zip(zf, str(archive_path), 1, budget, only)
+
+    def list_members(self, archive_path: Path) -> Generator[ArchiveMember, None, None]:
+        """
+        只读中央目录列出顶层成员, 不解压任何内容(嵌套归档作为单个成员列出)
+
+        Raises:
+            zipfile.BadZipFile / OSError: 顶层归档无法打开
+        """
+        budget = self.config.max_members
+        prefix = str(archive_path)
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                member_path = PurePosixPath(info.filename)
+                if any(p.startswith('.') or p == '__MACOSX' for p in member_path.parts):
+                    continue
+                ext = member_path.suffix.lower()
+                nested = ext in self.archive_extensions
+                if not nested and ext not in self.member_extensions:
+                    continue
+                if budget <= 0:
+                    return
+                budget -= 1
+
+                member = ArchiveMember(f"{prefix}{ARCHIVE_SEPARATOR}{info.filename}", prefix, info)
+                member.is_archive = nested
+                if member.is_encrypted:
+                    member.error = "归档成员已加密"
+                yield member
+
+    def _iter_zip(self, zf: zipfile.ZipFile, prefix: str, depth: int, budget: _Budget,
+                  only: Optional[Set[str]] = None) -> Generator[ArchiveMember, None, None]:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            if only is not None and info.filename not in only:
+                continue
+            parts = PurePosixPath(info.filename).parts
+            # 跳过隐藏文件和 macOS 资源目录
+            if any(p.startswith('.') or p == '__MACOSX' for p in parts):
+                continue
+
+            ext = PurePosixPath(info.filename).suffix.lower()
+            nested = ext in self.archive_extensions
+            if not nested and ext not in self.member_extensions:
+                continue
+
+            if budget.members <= 0:
+                return
+            budget.members -= 1
+
+            member = ArchiveMember(f"{prefix}{ARCHIVE_SEPARATOR}{info.filename}", prefix, info)
+            member.is_archive = nested
+
+            if member.is_encrypted:
+                member.error = "归档成员已加密"
+                yield member
+                continue
+            if nested and depth >= self.config.max_depth:
+                member.error = "归档嵌套层数超过限制"
+                yield member
+                continue
+
+            data = self._read_member(zf, info, member, budget)
+            if data is None:
+                yield member
+                continue
+
+            if nested:
+                try:
+                    with zipfile.ZipFile(io.BytesIO(data)) as inner:
+                        yield from self._iter_zip(inner, member.virtual_path, depth + 1, budget)
+                except zipfile.BadZipFile:
+                    member.error = "嵌套归档损坏"
+                    yield member
+                continue
+
+            member.data = data
+            yield member
+
+    def _read_member(self, zf: zipfile.ZipFile, info: zipfile.ZipInfo,
+                     member: ArchiveMember, budget: _Budget) -> Optional[bytes]:
+        """按上限读取成员内容; 不信任头部声明的大小, 读取时同样限流(防zip炸弹)"""
+        limit = min(self.config.max_member_bytes, budget.bytes)
+        if info.file_size > limit:
+            member.error = "超出归档解压大小限制"
+            return None
+        try:
+            with zf.open(info) as f:
+                data = f.read(limit + 1)
+        except (zipfile.BadZipFile, zlib.error, NotImplementedError, RuntimeError, EOFError) as e:
+            member.error = f"归档成员读取失败: {str(e)[:40]}"
+            return None
+        if len(data) > limit:
+            member.error = "超出归档解压大小限制"
+            return None
+        budget.bytes -= len(data)
+        return data
+
+
+def _zip_datetime(info: zipfile.ZipInfo) -> Optional[datetime]:
+    try:
+        return datetime(*info.date_time)
+    except ValueError:
+        return None
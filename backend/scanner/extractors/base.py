@@ -2,10 +2,52 @@
 提取器基类
 """
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from pathlib import Path
+from typing import BinaryIO, Iterator, List, Tuple, Union
 from models.schemas import FileInfo, DocumentMetrics
 
 
+# 提取器输入: 磁盘文件路径, 或归档成员的内存缓冲区(可seek的二进制文件对象)
+Source = Union[Path, BinaryIO]
+
+
+def source_arg(source: Source):
+    """转换为同时接受路径和文件对象的解析库参数(python-docx/openpyxl/python-pptx)"""
+    if isinstance(source, Path):
+        return str(source)
+    source.seek(0)
+    return source
+
+
+class SegmentedText(str):
+    """
+    带分段边界的文本(PDF按页, PPT按幻灯片)
+
+    字符串值与非空分段以空行拼接的结果相同, 其余分析照常使用;
+    segments 保留全部分段(含空页), 下标即页码/幻灯片序号, 供文本库按页存储。
+    """
+    segments: List[str]
+    unit: str
+
+    def __new__(cls, segments: List[str], unit: str):
+        text = super().__new__(cls, '\n\n'.join(s for s in segments if s))
+        text.segments = list(segments)
+        text.unit = unit
+        return text
+
+
+@contextmanager
+def open_source(source: Source) -> Iterator[BinaryIO]:
+    """以二进制方式打开输入; 内存缓冲区不会被关闭"""
+    if isinstance(source, Path):
+        with open(source, 'rb') as f:
+            yield f
+    else:
+        source.seek(0)
+        yield source
+
+
 class BaseExtractor(ABC):
     """文档提取器基类"""
     
@@ -15,10 +57,22 @@ class BaseExtractor(ABC):
         pass
     
     @abstractmethod
-    def extract(self, file_path: Path, file_info: FileInfo) -> DocumentMetrics:
+    def extract(self, source: Source, file_info: FileInfo) -> DocumentMetrics:
         """提取文档指标"""
         pass
     
-    def extract_text(self, file_path: Path) -> str:
+    def extract_text(self, source: Source) -> str:
         """提取文本内容(用于敏感信息检测等)"""
         return ""
+    
+    def extract_with_text(self, source: Source, file_info: FileInfo) -> Tuple[DocumentMetrics, str]:
+        """
+        同时提取指标和文本
+        
+        默认分别调用 extract 和 extract_text; 能一次解析得到两者的提取器应重写此方法,
+        避免同一文件被解析两遍。
+        """
+        metrics = self.extract(source, file_info)
+        if not file_info.parse_success:
+            return metrics, ""
+        return metrics, self.extract_text(source)
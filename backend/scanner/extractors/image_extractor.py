@@ -0,0 +1,96 @@
+"""
+图片提取器 - 只读取文件头获取尺寸, 不解码像素
+"""
+import struct
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+from .base import BaseExtractor, Source, open_source
+from models.schemas import FileInfo, DocumentMetrics
+
+
+# JPEG 中不带长度字段的标记
+_JPEG_STANDALONE = {0x01} | set(range(0xD0, 0xDA))
+# SOF 标记(排除 DHT/JPG/DAC)
+_JPEG_SOF = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class ImageExtractor(BaseExtractor):
+    """图片提取器(PNG/JPEG/GIF/BMP)"""
+
+    def can_handle(self, file_path: Path) -> bool:
+        return file_path.suffix.lower() in ['.jpg', '.jpeg', '.png', '.gif', '.bmp']
+
+    def extract(self, source: Source, file_info: FileInfo) -> DocumentMetrics:
+        """提取图片尺寸"""
+        metrics = DocumentMetrics()
+
+        try:
+            with open_source(source) as f:
+                size = self.read_dimensions(f)
+            if size is None:
+                file_info.is_corrupted = True
+                file_info.parse_success = False
+                file_info.parse_error = "无法识别图片尺寸"
+                return metrics
+
+            width, height = size
+            metrics.image_width = width
+            metrics.image_height = height
+            metrics.pixel_count = width * height
+            metrics.page_count = 1
+        except Exception as e:
+            file_info.parse_success = False
+            file_info.parse_error = str(e)
+
+        return metrics
+
+    @classmethod
+    def read_dimensions(cls, f: BinaryIO) -> Optional[Tuple[int, int]]:
+        """按文件头魔数读取宽高, 无法识别时返回 None"""
+        head = f.read(32)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', head[6:10])
+        if head.startswith(b'BM') and len(head) >= 26:
+            dib_size = struct.unpack_from('<I', head, 14)[0]
+            if dib_size == 12:  # BITMAPCOREHEADER
+                return struct.unpack_from('<HH', head, 18)
+            width, height = struct.unpack_from('<ii', head, 18)
+            return abs(width), abs(height)
+        if head.startswith(b'\xff\xd8'):
+            return cls._jpeg_dimensions(f)
+        return None
+
+    @staticmethod
+    def _jpeg_dimensions(f: BinaryIO) -> Optional[Tuple[int, int]]:
+        """逐段跳过JPEG标记, 直到SOF段读取尺寸"""
+        f.seek(2)
+        while True:
+            byte = f.read(1)
+            if not byte:
+                return None
+            if byte != b'\xff':
+                continue
+            marker = f.read(1)
+            while marker == b'\xff':  # 填充字节
+                marker = f.read(1)
+            if not marker:
+                return None
+            code = marker[0]
+            if code in _JPEG_STANDALONE:
+                continue
+            if code == 0xD9:  # EOI
+                return None
+            length_bytes = f.read(2)
+            if len(length_bytes) < 2:
+                return None
+            length = struct.unpack('>H', length_bytes)[0]
+            if code in _JPEG_SOF:
+                data = f.read(5)
+                if len(data) < 5:
+                    return None
+                height, width = struct.unpack('>HH', data[1:5])
+                return width, height
+            f.seek(length - 2, 1)
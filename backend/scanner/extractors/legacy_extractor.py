@@ -0,0 +1,466 @@
+"""
+老版Office文档提取器 - 支持 .doc/.xls/.ppt (OLE2 二进制格式)
+
+直接在进程内读取复合文档中的 WordDocument / Workbook / PowerPoint Document 流,
+不再依赖 antiword/textutil 等外部命令。
+"""
+import re
+import struct
+from pathlib import Path
+from typing import List, Tuple
+
+from .base import BaseExtractor, Source, open_source
+from .ole_reader import OleFileReader, OleFormatError
+from models.schemas import FileInfo, DocumentMetrics
+
+
+# Word 控制字符
+_FIELD_MARKS = re.compile('([\x13\x14\x15])')
+_DOC_CONTROL = re.compile('[\x00-\x06\x08\x0e-\x1f]')
+
+# BIFF 记录类型
+_BIFF_BOF = 0x0809
+_BIFF_FILEPASS = 0x002F
+_BIFF_BOUNDSHEET = 0x0085
+_BIFF_SST = 0x00FC
+_BIFF_CONTINUE = 0x003C
+_BIFF_LABELSST = 0x00FD
+_BIFF_LABEL = 0x0204
+_BIFF_NUMBER = 0x0203
+_BIFF_RK = 0x027E
+_BIFF_MULRK = 0x00BD
+_BIFF_FORMULA = 0x0006
+_BIFF_STRING = 0x0207
+_BIFF_BOOLERR = 0x0205
+_BIFF_MERGECELLS = 0x00E5
+
+# PowerPoint 记录类型
+_PPT_SLIDE = 0x03EE
+_PPT_NOTES = 0x03F0
+_PPT_SLIDE_PERSIST = 0x03F3
+_PPT_MAIN_MASTER = 0x03F8
+_PPT_HANDOUT = 0x0FC9
+_PPT_SLIDE_LIST = 0x0FF0
+_PPT_TEXT_CHARS = 0x0FA0
+_PPT_TEXT_BYTES = 0x0FA8
+_PPT_CRYPT_SESSION = 0x2F14
+_PPT_SKIP_CONTAINERS = (_PPT_NOTES, _PPT_MAIN_MASTER, _PPT_HANDOUT)
+
+
+class LegacyOfficeExtractor(BaseExtractor):
+    """老版Office(OLE2)文档提取器"""
+
+    def can_handle(self, file_path: Path) -> bool:
+        return file_path.suffix.lower() in ['.doc', '.xls', '.ppt']
+
+    def extract(self, source: Source, file_info: FileInfo) -> DocumentMetrics:
+        """提取老版Office文档指标"""
+        metrics, _ = self.extract_with_text(source, file_info)
+        return metrics
+
+    def extract_text(self, source: Source) -> str:
+        """提取文本内容"""
+        try:
+            _, text = self._parse(source, DocumentMetrics())
+            return text
+        except Exception:
+            return ""
+
+    def extract_with_text(self, source: Source, file_info: FileInfo) -> Tuple[DocumentMetrics, str]:
+        """一次解析同时得到指标和文本"""
+        metrics = DocumentMetrics()
+        try:
+            encrypted, text = self._parse(source, metrics)
+            if encrypted:
+                file_info.is_encrypted = True
+                file_info.parse_success = False
+                file_info.parse_error = "文件已加密"
+                return metrics, ""
+            return metrics, text
+        except OleFormatError:
+            file_info.is_corrupted = True
+            file_info.parse_success = False
+            file_info.parse_error = "文件损坏或格式不正确"
+        except Exception as e:
+            file_info.parse_success = False
+            file_info.parse_error = f"老版{file_info.extension}格式: {str(e)[:30]}"
+        return metrics, ""
+
+    def _parse(self, source: Source, metrics: DocumentMetrics) -> Tuple[bool, str]:
+        """
+        解析复合文档
+
+        Returns:
+            (是否加密, 文本内容)
+        """
+        with open_source(source) as f:
+            ole = OleFileReader(f)
+            # 按复合文档中的流判断实际格式, 不依赖扩展名
+            if ole.exists('WordDocument'):
+                return self._parse_doc(ole, metrics)
+            if ole.exists('Workbook') or ole.exists('Book'):
+                return self._parse_xls(ole, metrics)
+            if ole.exists('PowerPoint Document'):
+                return self._parse_ppt(ole, metrics)
+            if ole.exists('EncryptedPackage'):
+                return True, ""
+            raise OleFormatError("未知的OLE2文档类型")
+
+    # ---- Word (.doc) ----
+
+    def _parse_doc(self, ole: OleFileReader, metrics: DocumentMetrics) -> Tuple[bool, str]:
+        """解析 WordDocument 流, 通过FIB定位片段表(Clx)还原正文"""
+        word = ole.open_stream('WordDocument')
+        if len(word) < 0x200 or struct.unpack_from('<H', word, 0)[0] != 0xA5EC:
+            raise OleFormatError("WordDocument流无效")
+
+        flags = struct.unpack_from('<H', word, 0x0A)[0]
+        if flags & 0x0100:  # fEncrypted
+            return True, ""
+
+        # FibRgW97 -> FibRgLw97 -> FibRgFcLcb97
+        csw = struct.unpack_from('<H', word, 32)[0]
+        rglw = 34 + csw * 2
+        cslw = struct.unpack_from('<H', word, rglw)[0]
+        ccp_text = struct.unpack_from('<i', word, rglw + 2 + 12)[0]
+        fc_lcb = rglw + 2 + cslw * 4 + 2
+        fc_clx, lcb_clx = struct.unpack_from('<II', word, fc_lcb + 33 * 8)
+
+        table = ole.open_stream('1Table' if flags & 0x0200 else '0Table')
+        clx = table[fc_clx:fc_clx + lcb_clx]
+
+        # 跳过 Prc, 定位 Pcdt
+        pos = 0
+        while pos < len(clx) and clx[pos] == 0x01:
+            pos += 3 + struct.unpack_from('<h', clx, pos + 1)[0]
+        if pos + 5 > len(clx) or clx[pos] != 0x02:
+            raise OleFormatError("片段表损坏")
+        lcb = struct.unpack_from('<I', clx, pos + 1)[0]
+        plc = clx[pos + 5:pos + 5 + lcb]
+        n = (len(plc) - 4) // 12
+        cps = struct.unpack_from(f'<{n + 1}I', plc, 0)
+
+        pieces = []
+        for i in range(n):
+            cp_start, cp_end = cps[i], min(cps[i + 1], ccp_text)
+            if cp_start >= cp_end:
+                continue
+            fc = struct.unpack_from('<I', plc, (n + 1) * 4 + i * 8 + 2)[0]
+            count = cp_end - cp_start
+            if fc & 0x40000000:
+                offset = (fc & 0x3FFFFFFF) // 2
+                pieces.append(word[offset:offset + count].decode('cp1252', errors='replace'))
+            else:
+                pieces.append(word[fc:fc + count * 2].decode('utf-16-le', errors='replace'))
+        raw = self._strip_fields(''.join(pieces))
+
+        # 统计: \r 段落结束, \x07 单元格/行结束, \x01 \x08 图片/绘图对象
+        metrics.image_count = raw.count('\x01') + raw.count('\x08')
+
+        paragraphs = []
+        table_count = 0
+        in_table = False
+        for para in raw.split('\r'):
+            is_cell = '\x07' in para
+            if is_cell and not in_table:
+                table_count += 1
+            in_table = is_cell
+            for line in re.split('[\x07\x0b\x0c]', para):
+                line = _DOC_CONTROL.sub('', line).strip()
+                if line:
+                    paragraphs.append(line)
+
+        text = '\n'.join(paragraphs)
+        metrics.table_count = table_count
+        metrics.paragraph_count = len(paragraphs)
+        metrics.char_count = len(text)
+        metrics.word_count = len(text.split())
+        return False, text
+
+    @staticmethod
+    def _strip_fields(text: str) -> str:
+        """去掉域代码(\\x13...\\x14), 保留域结果(\\x14...\\x15)"""
+        if '\x13' not in text:
+            return text
+        out = []
+        stack: List[bool] = []  # True 表示处于域代码部分
+        for token in _FIELD_MARKS.split(text):
+            if token == '\x13':
+                stack.append(True)
+            elif token == '\x14':
+                if stack:
+                    stack[-1] = False
+            elif token == '\x15':
+                if stack:
+                    stack.pop()
+            elif not any(stack):
+                out.append(token)
+        return ''.join(out)
+
+    # ---- Excel (.xls) ----
+
+    def _parse_xls(self, ole: OleFileReader, metrics: DocumentMetrics) -> Tuple[bool, str]:
+        """解析 BIFF8(Workbook) / BIFF5(Book) 记录流"""
+        if ole.exists('Workbook'):
+            data, biff8 = ole.open_stream('Workbook'), True
+        else:
+            data, biff8 = ole.open_stream('Book'), False
+
+        sst: List[str] = []
+        sst_segments: List[bytes] = []
+        rows: List[str] = []
+        row_cells: List[str] = []
+        row_key = None
+        substream = -1
+        pending_formula = None
+        total_cells = 0
+        total_chars = 0
+
+        def add_cell(row: int, value: str):
+            nonlocal row_key, total_cells, total_chars
+            key = (substream, row)
+            if key != row_key and row_cells:
+                rows.append(' '.join(row_cells))
+                row_cells.clear()
+            row_key = key
+            total_cells += 1
+            total_chars += len(value)
+            row_cells.append(value)
+
+        pos = 0
+        size = len(data)
+        prev_type = None
+        while pos + 4 <= size:
+            rtype, rlen = struct.unpack_from('<HH', data, pos)
+            body = data[pos + 4:pos + 4 + rlen]
+            pos += 4 + rlen
+
+            if rtype == _BIFF_CONTINUE and prev_type == _BIFF_SST:
+                sst_segments.append(body)
+                continue
+            if prev_type == _BIFF_SST and sst_segments:
+                sst = self._parse_sst(sst_segments)
+                sst_segments = []
+            prev_type = rtype
+
+            if rtype == _BIFF_FILEPASS:
+                return True, ""
+            elif rtype == _BIFF_BOF:
+                substream += 1
+            elif rtype == _BIFF_BOUNDSHEET:
+                metrics.sheet_count += 1
+            elif rtype == _BIFF_SST:
+                sst_segments = [body]
+            elif rtype == _BIFF_LABELSST and len(body) >= 10:
+                row, _, _, isst = struct.unpack_from('<HHHI', body, 0)
+                add_cell(row, sst[isst] if isst < len(sst) else '')
+            elif rtype == _BIFF_LABEL and len(body) >= 8:
+                row = struct.unpack_from('<H', body, 0)[0]
+                add_cell(row, self._read_xl_string(body, 6, biff8))
+            elif rtype == _BIFF_NUMBER and len(body) >= 14:
+                row = struct.unpack_from('<H', body, 0)[0]
+                add_cell(row, self._format_number(struct.unpack_from('<d', body, 6)[0]))
+            elif rtype == _BIFF_RK and len(body) >= 10:
+                row = struct.unpack_from('<H', body, 0)[0]
+                add_cell(row, self._format_number(self._decode_rk(struct.unpack_from('<I', body, 6)[0])))
+            elif rtype == _BIFF_MULRK and len(body) >= 6:
+                row = struct.unpack_from('<H', body, 0)[0]
+                for offset in range(4, len(body) - 2, 6):
+                    rk = struct.unpack_from('<I', body, offset + 2)[0]
+                    add_cell(row, self._format_number(self._decode_rk(rk)))
+            elif rtype == _BIFF_FORMULA and len(body) >= 14:
+                row = struct.unpack_from('<H', body, 0)[0]
+                if body[12:14] != b'\xff\xff':
+                    add_cell(row, self._format_number(struct.unpack_from('<d', body, 6)[0]))
+                elif body[6] == 0:  # 字符串结果在随后的 STRING 记录中
+                    pending_formula = row
+                elif body[6] == 1:
+                    add_cell(row, 'TRUE' if body[8] else 'FALSE')
+            elif rtype == _BIFF_STRING and pending_formula is not None:
+                add_cell(pending_formula, self._read_xl_string(body, 0, biff8))
+                pending_formula = None
+            elif rtype == _BIFF_BOOLERR and len(body) >= 8:
+                row = struct.unpack_from('<H', body, 0)[0]
+                if body[7] == 0:
+                    add_cell(row, 'TRUE' if body[6] else 'FALSE')
+            elif rtype == _BIFF_MERGECELLS and len(body) >= 2:
+                metrics.merged_cell_count += struct.unpack_from('<H', body, 0)[0]
+
+        if row_cells:
+            rows.append(' '.join(row_cells))
+
+        metrics.char_count = total_chars
+        # 与 .xlsx 保持一致, 用非空单元格数作为"行数"的替代指标
+        metrics.paragraph_count = total_cells
+        return False, '\n'.join(rows)
+
+    @staticmethod
+    def _decode_rk(rk: int) -> float:
+        """解码RK压缩数值"""
+        if rk & 0x02:
+            value = float(struct.unpack('<i', struct.pack('<I', rk))[0] >> 2)
+        else:
+            value = struct.unpack('<d', struct.pack('<Q', (rk & 0xFFFFFFFC) << 32))[0]
+        return value / 100 if rk & 0x01 else value
+
+    @staticmethod
+    def _format_number(value: float) -> str:
+        if value == value and value not in (float('inf'), float('-inf')) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    @staticmethod
+    def _read_xl_string(body: bytes, offset: int, biff8: bool) -> str:
+        """读取 LABEL/STRING 记录中的字符串"""
+        if len(body) < offset + 2:
+            return ''
+        cch = struct.unpack_from('<H', body, offset)[0]
+        if not biff8:
+            return body[offset + 2:offset + 2 + cch].decode('cp1252', errors='replace')
+        flags = body[offset + 2]
+        start = offset + 3
+        if flags & 0x01:
+            return body[start:start + cch * 2].decode('utf-16-le', errors='replace')
+        return body[start:start + cch].decode('latin-1')
+
+    @staticmethod
+    def _parse_sst(segments: List[bytes]) -> List[str]:
+        """解析共享字符串表(SST), 处理跨 CONTINUE 记录的字符串"""
+        strings: List[str] = []
+        seg = 0
+        buf = segments[0]
+        pos = 8
+        count = struct.unpack_from('<I', buf, 4)[0] if len(buf) >= 8 else 0
+
+        def read(n: int) -> bytes:
+            nonlocal seg, buf, pos
+            out = b''
+            while n > 0:
+                if pos >= len(buf):
+                    seg += 1
+                    if seg >= len(segments):
+                        raise IndexError
+                    buf, pos = segments[seg], 0
+                chunk = buf[pos:pos + n]
+                pos += len(chunk)
+                n -= len(chunk)
+                out += chunk
+            return out
+
+        def read_chars(cch: int, high: bool) -> str:
+            nonlocal seg, buf, pos
+            parts = []
+            while cch > 0:
+                if pos >= len(buf):
+                    # 字符数据跨记录时, 续记录以新的选项字节开头
+                    seg += 1
+                    if seg >= len(segments):
+                        raise IndexError
+                    buf, pos = segments[seg], 1
+                    high = bool(segments[seg][0] & 0x01)
+                width = 2 if high else 1
+                take = min(cch, (len(buf) - pos) // width)
+                if take <= 0:
+                    pos = len(buf)
+                    continue
+                raw = buf[pos:pos + take * width]
+                parts.append(raw.decode('utf-16-le', errors='replace') if high else raw.decode('latin-1'))
+                pos += take * width
+                cch -= take
+            return ''.join(parts)
+
+        try:
+            for _ in range(count):
+                cch, flags = struct.unpack('<HB', read(3))
+                runs = struct.unpack('<H', read(2))[0] if flags & 0x08 else 0
+                ext = struct.unpack('<I', read(4))[0] if flags & 0x04 else 0
+                strings.append(read_chars(cch, bool(flags & 0x01)))
+                if runs or ext:
+                    read(runs * 4 + ext)
+        except (IndexError, struct.error):
+            pass
+        return strings
+
+    # ---- PowerPoint (.ppt) ----
+
+    def _parse_ppt(self, ole: OleFileReader, metrics: DocumentMetrics) -> Tuple[bool, str]:
+        """解析 PowerPoint Document 流中的幻灯片与文本原子"""
+        if ole.exists('EncryptedSummary'):
+            return True, ""
+        data = ole.open_stream('PowerPoint Document')
+
+        outline_texts: List[List[str]] = []   # SlideListWithText 中的占位符文本
+        shape_texts: List[List[str]] = []     # 幻灯片绘图中的文本框
+        slide_count = 0
+
+        # (结束位置, 记录类型)
+        stack: List[Tuple[int, int]] = []
+        pos = 0
+        size = len(data)
+        while pos + 8 <= size:
+            while stack and pos >= stack[-1][0]:
+                stack.pop()
+            ver_inst, rtype, rlen = struct.unpack_from('<HHI', data, pos)
+            body_start = pos + 8
+            end = min(body_start + rlen, size)
+
+            if rtype == _PPT_CRYPT_SESSION:
+                return True, ""
+
+            if (ver_inst & 0x0F) == 0x0F:
+                instance = ver_inst >> 4
+                # 跳过母版/备注/讲义中的文本
+                if rtype in _PPT_SKIP_CONTAINERS or (rtype == _PPT_SLIDE_LIST and instance != 0):
+                    pos = end
+                    continue
+                if rtype == _PPT_SLIDE:
+                    slide_count += 1
+                    shape_texts.append([])
+                stack.append((end, rtype))
+                pos = body_start
+                continue
+
+            parents = [t for _, t in stack]
+            if rtype == _PPT_SLIDE_PERSIST and _PPT_SLIDE_LIST in parents:
+                outline_texts.append([])
+            elif rtype in (_PPT_TEXT_CHARS, _PPT_TEXT_BYTES):
+                raw = data[body_start:end]
+                text = raw.decode('utf-16-le', errors='replace') if rtype == _PPT_TEXT_CHARS \
+                    else raw.decode('cp1252', errors='replace')
+                text = text.replace('\r', '\n').replace('\x0b', '\n').strip()
+                if text:
+                    if _PPT_SLIDE_LIST in parents and outline_texts:
+                        outline_texts[-1].append(text)
+                    elif _PPT_SLIDE in parents and shape_texts:
+                        shape_texts[-1].append(text)
+            pos = end
+
+        slides = []
+        total_chars = 0
+        for idx in range(max(len(outline_texts), len(shape_texts))):
+            parts = (outline_texts[idx] if idx < len(outline_texts) else []) + \
+                    (shape_texts[idx] if idx < len(shape_texts) else [])
+            total_chars += sum(len(p.replace('\n', '')) for p in parts)
+            if parts:
+                slides.append('\n'.join(parts))
+
+        metrics.slide_count = slide_count
+        metrics.page_count = slide_count
+        metrics.char_count = total_chars
+        metrics.image_count = self._count_ppt_pictures(ole)
+        return False, '\n\n'.join(slides)
+
+    @staticmethod
+    def _count_ppt_pictures(ole: OleFileReader) -> int:
+        """统计 Pictures 流中的 BLIP 记录数"""
+        if not ole.exists('Pictures'):
+            return 0
+        data = ole.open_stream('Pictures')
+        count = 0
+        pos = 0
+        while pos + 8 <= len(data):
+            _, rtype, rlen = struct.unpack_from('<HHI', data, pos)
+            if 0xF018 <= rtype <= 0xF117:
+                count += 1
+            pos += 8 + rlen
+        return count
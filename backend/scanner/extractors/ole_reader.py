@@ -0,0 +1,245 @@
+"""
+OLE2 复合文档读取器 - 纯Python实现, 用于解析老版 .doc/.xls/.ppt
+
+只实现读取所需的最小子集: 文件头、DIFAT/FAT、MiniFAT、目录项和流读取。
+"""
+import struct
+from typing import BinaryIO, Dict, List, Optional
+
+
+OLE2_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# 特殊扇区编号
+FREESECT = 0xFFFFFFFF
+ENDOFCHAIN = 0xFFFFFFFE
+FATSECT = 0xFFFFFFFD
+DIFSECT = 0xFFFFFFFC
+MAXREGSECT = 0xFFFFFFFA
+
+# 目录项类型
+STGTY_EMPTY = 0
+STGTY_STORAGE = 1
+STGTY_STREAM = 2
+STGTY_ROOT = 5
+
+NOSTREAM = 0xFFFFFFFF
+
+
+class OleFormatError(Exception):
+    """OLE2 复合文档格式错误(文件损坏或不是OLE2文件)"""
+    pass
+
+
+class OleDirEntry:
+    """目录项"""
+
+    __slots__ = ('name', 'entry_type', 'left', 'right', 'child', 'start_sector', 'size')
+
+    def __init__(self, name: str, entry_type: int, left: int, right: int,
+                 child: int, start_sector: int, size: int):
+        self.name = name
+        self.entry_type = entry_type
+        self.left = left
+        self.right = right
+        self.child = child
+        self.start_sector = start_sector
+        self.size = size
+
+
+class OleFileReader:
+    """OLE2 复合文档读取器"""
+
+    def __init__(self, fp: BinaryIO):
+        """
+        Args:
+            fp: 以二进制方式打开、可seek的文件对象
+        """
+        self.fp = fp
+        fp.seek(0, 2)
+        self.file_size = fp.tell()
+
+        self._read_header()
+        self._fat: Optional[List[int]] = None
+        self._minifat: Optional[List[int]] = None
+        self._ministream: Optional[bytes] = None
+        self._entries: Optional[List[OleDirEntry]] = None
+        self._paths: Optional[Dict[str, OleDirEntry]] = None
+
+    @staticmethod
+    def is_ole2(header: bytes) -> bool:
+        """判断文件头是否为OLE2复合文档"""
+        return header[:8] == OLE2_MAGIC
+
+    def _read_header(self):
+        """读取并校验512字节文件头"""
+        self.fp.seek(0)
+        header = self.fp.read(512)
+        if len(header) < 512 or not self.is_ole2(header):
+            raise OleFormatError("不是OLE2复合文档")
+
+        (sector_shift, mini_sector_shift) = struct.unpack_from('<HH', header, 0x1E)
+        if sector_shift not in (9, 12) or mini_sector_shift != 6:
+            raise OleFormatError("OLE2扇区大小非法")
+
+        self.sector_size = 1 << sector_shift
+        self.mini_sector_size = 1 << mini_sector_shift
+        (self.num_fat_sectors, self.first_dir_sector, _,
+         self.mini_stream_cutoff, self.first_minifat_sector, self.num_minifat_sectors,
+         self.first_difat_sector, self.num_difat_sectors) = struct.unpack_from('<IIIIIIII', header, 0x2C)
+        self._header_difat = list(struct.unpack_from('<109I', header, 0x4C))
+
+    # ---- 扇区 & FAT ----
+
+    def _read_sector(self, sector: int) -> bytes:
+        """读取一个常规扇区"""
+        offset = (sector + 1) * self.sector_size
+        if sector > MAXREGSECT or offset >= self.file_size:
+            raise OleFormatError(f"扇区编号越界: {sector}")
+        self.fp.seek(offset)
+        data = self.fp.read(self.sector_size)
+        # 最后一个扇区可能被截断, 补齐
+        if len(data) < self.sector_size:
+            data += b'\x00' * (self.sector_size - len(data))
+        return data
+
+    @property
+    def fat(self) -> List[int]:
+        """延迟加载FAT表"""
+        if self._fat is None:
+            self._fat = self._load_fat()
+        return self._fat
+
+    def _load_fat(self) -> List[int]:
+        fat_sectors = [s for s in self._header_difat if s <= MAXREGSECT]
+
+        # 额外的DIFAT扇区链
+        ints_per_sector = self.sector_size // 4
+        difat_sector = self.first_difat_sector
+        seen = set()
+        while difat_sector <= MAXREGSECT and len(seen) < self.num_difat_sectors:
+            if difat_sector in seen:
+                raise OleFormatError("DIFAT存在循环引用")
+            seen.add(difat_sector)
+            values = struct.unpack(f'<{ints_per_sector}I', self._read_sector(difat_sector))
+            fat_sectors.extend(s for s in values[:-1] if s <= MAXREGSECT)
+            difat_sector = values[-1]
+
+        fat: List[int] = []
+        for sector in fat_sectors[:self.num_fat_sectors or len(fat_sectors)]:
+            fat.extend(struct.unpack(f'<{ints_per_sector}I', self._read_sector(sector)))
+        if not fat:
+            raise OleFormatError("FAT表为空")
+        return fat
+
+    def _chain(self, start: int, table: List[int]) -> List[int]:
+        """沿分配表获取扇区链"""
+        chain = []
+        sector = start
+        limit = len(table)
+        while sector <= MAXREGSECT:
+            if sector >= limit or len(chain) > limit:
+                raise OleFormatError("扇区链损坏")
+            chain.append(sector)
+            sector = table[sector]
+        return chain
+
+    def _read_chain(self, start: int, size: Optional[int] = None) -> bytes:
+        """读取常规扇区链的内容(指定size时只读取所需的扇区)"""
+        if start > MAXREGSECT:
+            return b''
+        chain = self._chain(start, self.fat)
+        if size is not None:
+            chain = chain[:(size + self.sector_size - 1) // self.sector_size]
+        data = b''.join(self._read_sector(s) for s in chain)
+        return data if size is None else data[:size]
+
+    # ---- MiniFAT ----
+
+    def _load_mini(self):
+        root = self.entries[0]
+        raw = self._read_chain(self.first_minifat_sector) if self.num_minifat_sectors else b''
+        self._minifat = list(struct.unpack(f'<{len(raw) // 4}I', raw[:len(raw) // 4 * 4]))
+        self._ministream = self._read_chain(root.start_sector, root.size)
+
+    def _read_mini_chain(self, start: int, size: int) -> bytes:
+        if self._minifat is None:
+            self._load_mini()
+        parts = []
+        for sector in self._chain(start, self._minifat):
+            offset = sector * self.mini_sector_size
+            parts.append(self._ministream[offset:offset + self.mini_sector_size])
+        return b''.join(parts)[:size]
+
+    # ---- 目录 ----
+
+    @property
+    def entries(self) -> List[OleDirEntry]:
+        """目录项列表(索引0为根存储)"""
+        if self._entries is None:
+            self._entries = self._load_directory()
+        return self._entries
+
+    def _load_directory(self) -> List[OleDirEntry]:
+        raw = self._read_chain(self.first_dir_sector)
+        entries = []
+        for offset in range(0, len(raw) - 127, 128):
+            name_len = struct.unpack_from('<H', raw, offset + 0x40)[0]
+            entry_type = raw[offset + 0x42]
+            name = raw[offset:offset + max(0, min(name_len, 64) - 2)].decode('utf-16-le', errors='replace')
+            left, right, child = struct.unpack_from('<III', raw, offset + 0x44)
+            start_sector, size_low, size_high = struct.unpack_from('<III', raw, offset + 0x74)
+            size = size_low if self.sector_size == 512 else size_low | (size_high << 32)
+            entries.append(OleDirEntry(name, entry_type, left, right, child, start_sector, size))
+        if not entries or entries[0].entry_type != STGTY_ROOT:
+            raise OleFormatError("缺少根目录项")
+        return entries
+
+    def _build_paths(self) -> Dict[str, OleDirEntry]:
+        """遍历红黑树, 构建 '存储/流' 路径索引(名称不区分大小写)"""
+        paths: Dict[str, OleDirEntry] = {}
+        entries = self.entries
+        stack = [(entries[0].child, '')]
+        visited = set()
+        while stack:
+            sid, prefix = stack.pop()
+            if sid == NOSTREAM or sid >= len(entries) or sid in visited:
+                continue
+            visited.add(sid)
+            entry = entries[sid]
+            path = f"{prefix}{entry.name}"
+            paths[path.lower()] = entry
+            stack.append((entry.left, prefix))
+            stack.append((entry.right, prefix))
+            if entry.entry_type == STGTY_STORAGE:
+                stack.append((entry.child, path + '/'))
+        return paths
+
+    def list_streams(self) -> List[str]:
+        """列出所有流路径(小写)"""
+        if self._paths is None:
+            self._paths = self._build_paths()
+        return [p for p, e in self._paths.items() if e.entry_type == STGTY_STREAM]
+
+    def exists(self, name: str) -> bool:
+        """判断流或存储是否存在"""
+        if self._paths is None:
+            self._paths = self._build_paths()
+        return name.lower() in self._paths
+
+    def open_stream(self, name: str, max_bytes: Optional[int] = None) -> bytes:
+        """
+        读取指定流的内容
+
+        Args:
+            name: 流路径, 如 'WordDocument'
+            max_bytes: 只读取开头的若干字节(用于快速嗅探)
+        """
+        if self._paths is None:
+            self._paths = self._build_paths()
+        entry = self._paths.get(name.lower())
+        if entry is None or entry.entry_type != STGTY_STREAM:
+            raise KeyError(name)
+        size = entry.size if max_bytes is None else min(entry.size, max_bytes)
+        if entry.size < self.mini_stream_cutoff:
+            return self._read_mini_chain(entry.start_sector, size)
+        return self._read_chain(entry.start_sector, size)
@@ -4,7 +4,7 @@ PDF文档提取器 - 支持文字型/扫描型分流
 from pathlib import Path
 import fitz  # PyMuPDF
 
-from .base import BaseExtractor
+from .base import BaseExtractor, Source, SegmentedText
 from models.schemas import FileInfo, DocumentMetrics, PDFType
 from config.settings import settings
 
@@ -15,12 +15,19 @@ class PdfExtractor(BaseExtractor):
     def can_handle(self, file_path: Path) -> bool:
         return file_path.suffix.lower() == '.pdf'
     
-    def extract(self, file_path: Path, file_info: FileInfo) -> DocumentMetrics:
+    def extract(self, source: Source, file_info: FileInfo) -> DocumentMetrics:
         """提取PDF文档指标，并判断是文字型还是扫描型"""
         metrics = DocumentMetrics()
         
         try:
-            doc = fitz.open(str(file_path))
+            doc = self._open(source)
+            
+            if doc.needs_pass:
+                file_info.is_encrypted = True
+                file_info.parse_success = False
+                file_info.parse_error = "PDF已加密"
+                doc.close()
+                return metrics
             
             page_count = len(doc)
             metrics.page_count = page_count
@@ -33,6 +40,7 @@ class PdfExtractor(BaseExtractor):
             total_chars = 0
             total_images = 0
             scan_pages = 0  # 扫描页计数
+            scan_pixels = 0  # 扫描页像素数(OCR工作量)
             
             config = settings.pdf_detection
             
@@ -42,16 +50,19 @@ class PdfExtractor(BaseExtractor):
                 page_chars = len(text.strip())
                 total_chars += page_chars
                 
-                # 判断是否为扫描页
-                if page_chars < config.min_text_chars_per_page:
-                    scan_pages += 1
-                
                 # 统计图片
                 images = page.get_images()
                 total_images += len(images)
+                
+                # 判断是否为扫描页
+                if page_chars < config.min_text_chars_per_page:
+                    scan_pages += 1
+                    scan_pixels += self._page_pixels(page, images)
             
             metrics.char_count = total_chars
             metrics.image_count = total_images
+            metrics.scan_page_count = scan_pages
+            metrics.pixel_count = scan_pixels
             
             # 计算文本密度
             metrics.text_density = total_chars / page_count if page_count > 0 else 0
@@ -84,18 +95,32 @@ class PdfExtractor(BaseExtractor):
         
         return metrics
     
-    def extract_text(self, file_path: Path) -> str:
+    @staticmethod
+    def _open(source: Source):
+        """打开PDF(磁盘路径或内存缓冲区)"""
+        if isinstance(source, Path):
+            return fitz.open(str(source))
+        return fitz.open(stream=source.getvalue(), filetype='pdf')
+    
+    @staticmethod
+    def _page_pixels(page, images) -> int:
+        """扫描页像素数: 取内嵌图片的原始尺寸, 没有图片时按页面尺寸和假定DPI估算"""
+        pixels = sum(img[2] * img[3] for img in images)
+        if pixels:
+            return pixels
+        scale = settings.pdf_detection.ocr_assumed_dpi / 72
+        return int(page.rect.width * scale) * int(page.rect.height * scale)
+    
+    def extract_text(self, source: Source) -> str:
         """提取文本内容"""
         try:
-            doc = fitz.open(str(file_path))
+            doc = self._open(source)
             texts = []
             
             for page in doc:
-                text = page.get_text().strip()
-                if text:
-                    texts.append(text)
+                texts.append(page.get_text().strip())
             
             doc.close()
-            return '\n\n'.join(texts)
+            return SegmentedText(texts, 'page')
         except Exception:
             return ""
@@ -5,7 +5,7 @@ from pathlib import Path
 from pptx import Presentation
 from pptx.util import Inches
 
-from .base import BaseExtractor
+from .base import BaseExtractor, Source, SegmentedText, source_arg
 from models.schemas import FileInfo, DocumentMetrics
 
 
@@ -13,14 +13,14 @@ class PptxExtractor(BaseExtractor):
     """PowerPoint文档提取器"""
     
     def can_handle(self, file_path: Path) -> bool:
-        return file_path.suffix.lower() in ['.pptx', '.ppt']
+        return file_path.suffix.lower() == '.pptx'
     
-    def extract(self, file_path: Path, file_info: FileInfo) -> DocumentMetrics:
+    def extract(self, source: Source, file_info: FileInfo) -> DocumentMetrics:
         """提取PPT文档指标"""
         metrics = DocumentMetrics()
         
         try:
-            prs = Presentation(str(file_path))
+            prs = Presentation(source_arg(source))
             
             # 幻灯片数
             metrics.slide_count = len(prs.slides)
@@ -60,10 +60,10 @@ class PptxExtractor(BaseExtractor):
         
         return metrics
     
-    def extract_text(self, file_path: Path) -> str:
+    def extract_text(self, source: Source) -> str:
         """提取文本内容"""
         try:
-            prs = Presentation(str(file_path))
+            prs = Presentation(source_arg(source))
             texts = []
             
             for slide in prs.slides:
@@ -79,9 +79,8 @@ class PptxExtractor(BaseExtractor):
                             for cell in row.cells:
                                 if cell.text.strip():
                                     slide_texts.append(cell.text)
-                if slide_texts:
-                    texts.append('\n'.join(slide_texts))
+                texts.append('\n'.join(slide_texts))
             
-            return '\n\n'.join(texts)
+            return SegmentedText(texts, 'slide')
         except Exception:
             return ""
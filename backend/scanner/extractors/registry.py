@@ -0,0 +1,146 @@
+"""
+提取器注册表 - 按扩展名直接定位提取器, 首次使用某格式时才导入对应的解析库
+"""
+import importlib
+import threading
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from .base import BaseExtractor
+
+
+# 第三方提取器入口点分组
+#   名称为逗号分隔的扩展名, 值指向 BaseExtractor 子类或返回实例的工厂函数, 例如:
+#   [project.entry-points."ragfile_workbench.extractors"]
+#   ".epub" = "my_pkg.epub:EpubExtractor"
+ENTRY_POINT_GROUP = "ragfile_workbench.extractors"
+
+# 内置提取器: 扩展名 -> (模块, 类名)
+BUILTIN_EXTRACTORS: Dict[str, tuple] = {
+    '.docx': ('.docx_extractor', 'DocxExtractor'),
+    '.xlsx': ('.xlsx_extractor', 'XlsxExtractor'),
+    '.pptx': ('.pptx_extractor', 'PptxExtractor'),
+    '.pdf': ('.pdf_extractor', 'PdfExtractor'),
+    '.txt': ('.text_extractor', 'TextExtractor'),
+    '.md': ('.text_extractor', 'TextExtractor'),
+    '.markdown': ('.text_extractor', 'TextExtractor'),
+    '.rst': ('.text_extractor', 'TextExtractor'),
+    '.log': ('.text_extractor', 'TextExtractor'),
+    '.doc': ('.legacy_extractor', 'LegacyOfficeExtractor'),
+    '.xls': ('.legacy_extractor', 'LegacyOfficeExtractor'),
+    '.ppt': ('.legacy_extractor', 'LegacyOfficeExtractor'),
+    '.jpg': ('.image_extractor', 'ImageExtractor'),
+    '.jpeg': ('.image_extractor', 'ImageExtractor'),
+    '.png': ('.image_extractor', 'ImageExtractor'),
+    '.gif': ('.image_extractor', 'ImageExtractor'),
+    '.bmp': ('.image_extractor', 'ImageExtractor'),
+}
+
+ExtractorSpec = Union[tuple, Callable[[], BaseExtractor]]
+
+
+class ExtractorRegistry:
+    """扩展名索引的提取器注册表(延迟加载)"""
+
+    def __init__(self, load_entry_points: bool = True):
+        self._specs: Dict[str, ExtractorSpec] = {}
+        self._instances: Dict[object, BaseExtractor] = {}
+        self._by_extension: Dict[str, Optional[BaseExtractor]] = {}
+        self._lock = threading.Lock()
+
+        for ext, spec in BUILTIN_EXTRACTORS.items():
+            self._specs[ext] = spec
+        if load_entry_points:
+            self._discover_entry_points()
+
+    def register(self, extensions: Iterable[str], factory: ExtractorSpec):
+        """
+        注册提取器(会覆盖同扩展名的已有注册)
+
+        Args:
+            extensions: 扩展名列表, 如 ['.epub']
+            factory: BaseExtractor 子类/工厂函数, 或 (模块路径, 类名) 元组
+        """
+        with self._lock:
+            for ext in extensions:
+                ext = self._normalize(ext)
+                self._specs[ext] = factory
+                self._by_extension.pop(ext, None)
+
+    def extensions(self) -> List[str]:
+        """所有已注册的扩展名"""
+        return list(self._specs.keys())
+
+    def plugin_extensions(self) -> List[str]:
+        """第三方/运行时注册(非内置)的扩展名"""
+        return [ext for ext, spec in self._specs.items() if BUILTIN_EXTRACTORS.get(ext) != spec]
+
+    def get(self, extension: str) -> Optional[BaseExtractor]:
+        """按扩展名获取提取器实例, 首次访问时才导入并实例化"""
+        ext = self._normalize(extension)
+        try:
+            return self._by_extension[ext]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if ext not in self._by_extension:
+                spec = self._specs.get(ext)
+                self._by_extension[ext] = self._instantiate(spec) if spec is not None else None
+            return self._by_extension[ext]
+
+    def get_for_path(self, file_path: Path) -> Optional[BaseExtractor]:
+        """按文件路径获取提取器"""
+        return self.get(file_path.suffix)
+
+    def _instantiate(self, spec: ExtractorSpec) -> BaseExtractor:
+        """同一个提取器类只实例化一次"""
+        key = spec
+        if key in self._instances:
+            return self._instances[key]
+
+        if isinstance(spec, tuple):
+            module_name, class_name = spec
+            module = importlib.import_module(module_name, package=__package__)
+            instance = getattr(module, class_name)()
+        else:
+            instance = spec()
+
+        self._instances[key] = instance
+        return instance
+
+    def _discover_entry_points(self):
+        """从已安装包的入口点发现第三方提取器(仅登记, 不导入)"""
+        try:
+            eps = entry_points(group=ENTRY_POINT_GROUP)
+        except Exception:
+            return
+
+        for ep in eps:
+            loader = _EntryPointFactory(ep)
+            for ext in ep.name.split(','):
+                if ext.strip():
+                    self._specs[self._normalize(ext)] = loader
+
+    @staticmethod
+    def _normalize(ext: str) -> str:
+        ext = ext.strip().lower()
+        return ext if ext.startswith('.') else f'.{ext}'
+
+
+class _EntryPointFactory:
+    """入口点工厂: 首次调用时才加载第三方模块"""
+
+    def __init__(self, ep):
+        self.ep = ep
+
+    def __call__(self) -> BaseExtractor:
+        target = self.ep.load()
+        return target() if callable(target) else target
+
+    def __hash__(self):
+        return hash(self.ep.value)
+
+    def __eq__(self, other):
+        return isinstance(other, _EntryPointFactory) and other.ep.value == self.ep.value
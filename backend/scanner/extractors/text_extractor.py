@@ -1,80 +1,203 @@
 """
 纯文本文件提取器
 """
+import codecs
+import io
+import mmap
 from pathlib import Path
+from typing import Optional, Tuple
 import chardet
 
-from .base import BaseExtractor
+from .base import BaseExtractor, Source, open_source
 from models.schemas import FileInfo, DocumentMetrics
+from config.settings import settings
+
+
+# 严格解码失败时依次尝试的编码
+FALLBACK_ENCODINGS = ['utf-8', 'gbk', 'gb2312', 'latin-1']
 
 
 class TextExtractor(BaseExtractor):
     """纯文本文件提取器"""
-    
+
     def can_handle(self, file_path: Path) -> bool:
         return file_path.suffix.lower() in ['.txt', '.md', '.markdown', '.rst', '.log']
-    
-    def extract(self, file_path: Path, file_info: FileInfo) -> DocumentMetrics:
+
+    def extract(self, source: Source, file_info: FileInfo) -> DocumentMetrics:
         """提取文本文件指标"""
+        metrics, _ = self.extract_with_text(source, file_info)
+        return metrics
+
+    def extract_text(self, source: Source) -> str:
+        """提取文本内容"""
+        try:
+            _, text = self._process(source, DocumentMetrics())
+            return text or ""
+        except Exception:
+            return ""
+
+    def extract_with_text(self, source: Source, file_info: FileInfo) -> Tuple[DocumentMetrics, str]:
+        """一次读取同时得到指标和文本"""
         metrics = DocumentMetrics()
-        
         try:
-            # 检测编码
-            with open(file_path, 'rb') as f:
-                raw_data = f.read()
-            
-            detected = chardet.detect(raw_data)
-            encoding = detected.get('encoding', 'utf-8') or 'utf-8'
-            
-            try:
-                text = raw_data.decode(encoding)
-            except (UnicodeDecodeError, LookupError):
-                # 尝试常用编码
-                for enc in ['utf-8', 'gbk', 'gb2312', 'latin-1']:
-                    try:
-                        text = raw_data.decode(enc)
-                        break
-                    except:
-                        continue
-                else:
-                    file_info.parse_success = False
-                    file_info.parse_error = "无法识别文件编码"
-                    return metrics
-            
-            # 字符统计
-            metrics.char_count = len(text)
-            metrics.word_count = len(text.split())
-            
-            # 行数统计
-            lines = text.split('\n')
-            metrics.paragraph_count = len([l for l in lines if l.strip()])
-            
-            # 对于Markdown,统计标题数
-            if file_path.suffix.lower() in ['.md', '.markdown']:
-                heading_count = 0
-                for line in lines:
-                    if line.strip().startswith('#'):
-                        heading_count += 1
-                metrics.heading_count = heading_count
-            
+            is_markdown = file_info.extension in ['.md', '.markdown']
+            _, text = self._process(source, metrics, is_markdown)
+            if text is None:
+                file_info.parse_success = False
+                file_info.parse_error = "无法识别文件编码"
+                return metrics, ""
+            return metrics, text
         except Exception as e:
             file_info.parse_success = False
             file_info.parse_error = str(e)
-        
-        return metrics
-    
-    def extract_text(self, file_path: Path) -> str:
-        """提取文本内容"""
-        try:
-            with open(file_path, 'rb') as f:
+            return metrics, ""
+
+    def _process(self, source: Source, metrics: DocumentMetrics,
+                 is_markdown: bool = False) -> Tuple[str, Optional[str]]:
+        """
+        读取文件并统计指标
+
+        小文件整体读入后解码; 大文件使用mmap(内存缓冲区直接取视图)分块增量解码,
+        只保留前 max_text_bytes 的文本。
+
+        Returns:
+            (编码, 文本内容); 无法解码时文本为 None
+        """
+        config = settings.text
+
+        with open_source(source) as f:
+            size = f.seek(0, 2)
+            f.seek(0)
+
+            if size <= config.mmap_threshold:
                 raw_data = f.read()
-            
-            detected = chardet.detect(raw_data)
-            encoding = detected.get('encoding', 'utf-8') or 'utf-8'
-            
+                sample = raw_data[:config.detect_sample_bytes]
+                encoding = detect_encoding(sample, complete=len(sample) == len(raw_data))
+                text, encoding = self._decode(raw_data, encoding)
+                if text is None:
+                    return encoding, None
+                self._count_text(text, metrics, is_markdown)
+                return encoding, text
+
+            if isinstance(f, io.BytesIO):
+                buffer = f.getbuffer()
+            else:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with buffer:
+                encoding = detect_encoding(bytes(buffer[:config.detect_sample_bytes]), complete=False)
+                return encoding, self._stream_count(buffer, size, encoding, metrics, is_markdown)
+
+    @staticmethod
+    def _decode(raw_data: bytes, encoding: str) -> Tuple[Optional[str], str]:
+        """按探测到的编码严格解码, 失败时尝试常用编码"""
+        try:
+            return raw_data.decode(encoding), encoding
+        except (UnicodeDecodeError, LookupError):
+            pass
+        for enc in FALLBACK_ENCODINGS:
             try:
-                return raw_data.decode(encoding)
-            except:
-                return raw_data.decode('utf-8', errors='ignore')
-        except Exception:
-            return ""
+                return raw_data.decode(enc), enc
+            except UnicodeDecodeError:
+                continue
+        return None, encoding
+
+    @staticmethod
+    def _count_text(text: str, metrics: DocumentMetrics, is_markdown: bool):
+        """统计已完整解码的文本"""
+        # 字符统计
+        metrics.char_count = len(text)
+        metrics.word_count = len(text.split())
+
+        # 行数统计
+        lines = text.split('\n')
+        metrics.paragraph_count = len([l for l in lines if l.strip()])
+
+        # 对于Markdown,统计标题数
+        if is_markdown:
+            metrics.heading_count = sum(1 for l in lines if l.lstrip().startswith('#'))
+
+    @staticmethod
+    def _stream_count(mm, size: int, encoding: str,
+                      metrics: DocumentMetrics, is_markdown: bool) -> str:
+        """分块增量解码并统计, 返回截断后的文本"""
+        config = settings.text
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+        char_count = 0
+        word_count = 0
+        paragraph_count = 0
+        heading_count = 0
+        prev_ends_in_word = False
+        carry = ''
+        kept = []
+        kept_bytes = 0
+
+        def count_lines(lines):
+            nonlocal paragraph_count, heading_count
+            for line in lines:
+                stripped = line.lstrip()
+                if stripped:
+                    paragraph_count += 1
+                    if is_markdown and stripped.startswith('#'):
+                        heading_count += 1
+
+        offset = 0
+        while offset < size:
+            end = min(offset + config.chunk_bytes, size)
+            piece = decoder.decode(mm[offset:end], final=end >= size)
+            if kept_bytes < config.max_text_bytes:
+                kept.append(piece)
+                kept_bytes += end - offset
+            offset = end
+            if not piece:
+                continue
+
+            char_count += len(piece)
+
+            # 跨块的单词只计一次
+            words = len(piece.split())
+            if words and prev_ends_in_word and not piece[0].isspace():
+                words -= 1
+            word_count += words
+            prev_ends_in_word = not piece[-1].isspace()
+
+            lines = (carry + piece).split('\n')
+            carry = lines.pop()
+            count_lines(lines)
+
+        count_lines([carry])
+
+        metrics.char_count = char_count
+        metrics.word_count = word_count
+        metrics.paragraph_count = paragraph_count
+        if is_markdown:
+            metrics.heading_count = heading_count
+        return ''.join(kept)
+
+
+def detect_encoding(sample: bytes, complete: bool = True) -> str:
+    """
+    快速探测编码: BOM -> 严格UTF-8 -> chardet(仅对有限采样)
+
+    Args:
+        sample: 文件开头的采样字节
+        complete: 采样是否为文件全部内容(否则允许末尾截断的多字节字符)
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=complete)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    detected = chardet.detect(sample)
+    encoding = detected.get('encoding') or 'utf-8'
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        encoding = 'utf-8'
+    return encoding
@@ -5,7 +5,7 @@ from pathlib import Path
 from openpyxl import load_workbook
 from openpyxl.utils.exceptions import InvalidFileException
 
-from .base import BaseExtractor
+from .base import BaseExtractor, Source, source_arg
 from models.schemas import FileInfo, DocumentMetrics
 
 
@@ -13,14 +13,14 @@ class XlsxExtractor(BaseExtractor):
     """Excel文档提取器"""
     
     def can_handle(self, file_path: Path) -> bool:
-        return file_path.suffix.lower() in ['.xlsx', '.xls']
+        return file_path.suffix.lower() == '.xlsx'
     
-    def extract(self, file_path: Path, file_info: FileInfo) -> DocumentMetrics:
+    def extract(self, source: Source, file_info: FileInfo) -> DocumentMetrics:
         """提取Excel文档指标"""
         metrics = DocumentMetrics()
         
         try:
-            wb = load_workbook(str(file_path), read_only=True, data_only=True)
+            wb = load_workbook(source_arg(source), read_only=True, data_only=True)
             
             # Sheet统计
             metrics.sheet_count = len(wb.sheetnames)
@@ -62,10 +62,10 @@ class XlsxExtractor(BaseExtractor):
         
         return metrics
     
-    def extract_text(self, file_path: Path) -> str:
+    def extract_text(self, source: Source) -> str:
         """提取文本内容"""
         try:
-            wb = load_workbook(str(file_path), read_only=True, data_only=True)
+            wb = load_workbook(source_arg(source), read_only=True, data_only=True)
             texts = []
             
             for sheet_name in wb.sheetnames:
@@ -1,20 +1,35 @@
 """
 文件夹扫描器
 """
+import io
 import os
+import zipfile
 from pathlib import Path
 from datetime import datetime
-from typing import List, Generator, Callable, Optional
+from collections import defaultdict
+from typing import Dict, List, Generator, Callable, Optional, Iterable, Set, Tuple
 
 from models.schemas import FileInfo, FileType
 from config.settings import settings
+from .sniffer import FileSniffer, SniffResult
+from .archive_reader import ArchiveReader, ArchiveMember, ARCHIVE_SEPARATOR
+from .extractors.base import Source
 
 
 class FileScanner:
     """文件夹递归扫描器"""
     
-    def __init__(self):
+    def __init__(self, extra_extensions: Iterable[str] = ()):
+        """
+        Args:
+            extra_extensions: 额外需要收集的扩展名(如第三方提取器注册的格式)
+        """
         self.supported_extensions = settings.supported_extensions
+        self.extra_extensions = set(extra_extensions)
+        self.sniffer = FileSniffer() if settings.scanner.sniff_headers else None
+        self.archive_reader = ArchiveReader(
+            list(self.supported_extensions) + list(self.extra_extensions)
+        ) if settings.archive.enabled else None
     
     def scan(self, root_path: str, 
              progress_callback: Optional[Callable[[str, int, int], None]] = None
@@ -29,11 +44,22 @@ class FileScanner:
         Yields:
             FileInfo对象
         """
-        root = Path(root_path)
-        if not root.exists():
-            raise ValueError(f"路径不存在: {root_path}")
-        if not root.is_dir():
-            raise ValueError(f"路径不是目录: {root_path}")
+        for file_info, _ in self.iter_sources(root_path, progress_callback):
+            yield file_info
+    
+    def iter_sources(self, root_path: str,
+                     progress_callback: Optional[Callable[[str, int, int], None]] = None
+                     ) -> Generator[Tuple[FileInfo, Optional[Source]], None, None]:
+        """
+        递归扫描文件夹, 同时给出可供提取器读取的输入
+        
+        普通文件的输入为磁盘路径; 归档成员的输入为内存缓冲区;
+        无法读取的归档成员输入为 None(FileInfo 已标记解析失败)。
+        
+        Yields:
+            (FileInfo, 输入)
+        """
+        root = self._check_root(root_path)
         
         # 先收集所有文件
         all_files = list(self._collect_files(root))
@@ -43,10 +69,106 @@ class FileScanner:
             if progress_callback:
                 progress_callback(str(file_path), idx + 1, total)
             
+            if self.archive_reader and self.archive_reader.is_archive(file_path):
+                yield from self._iter_archive(file_path, None, progress_callback, idx + 1, total)
+                continue
+            
             file_info = self._create_file_info(file_path)
+            if file_info:
+                yield file_info, file_path
+    
+    def walk(self, root_path: str, sniff: bool = False,
+             progress_callback: Optional[Callable[[str, int, int], None]] = None
+             ) -> Generator[FileInfo, None, None]:
+        """
+        快速遍历: 只做 stat(可选文件头嗅探), 不读取文件内容
+        
+        归档只读取中央目录列出成员, 不解压。
+        
+        Args:
+            root_path: 根目录路径
+            sniff: 是否嗅探文件头识别加密/损坏文件
+            progress_callback: 进度回调函数(current_file, processed, total)
+        """
+        root = self._check_root(root_path)
+        all_files = list(self._collect_files(root))
+        total = len(all_files)
+        
+        for idx, file_path in enumerate(all_files):
+            if progress_callback:
+                progress_callback(str(file_path), idx + 1, total)
+            
+            if self.archive_reader and self.archive_reader.is_archive(file_path):
+                yield from self._list_archive(file_path)
+                continue
+            
+            file_info = self._create_file_info(file_path, sniff=sniff)
             if file_info:
                 yield file_info
     
+    def iter_walk_sources(self, walked: List[FileInfo],
+                          progress_callback: Optional[Callable[[str, int, int], None]] = None,
+                          members_only: bool = False
+                          ) -> Generator[Tuple[FileInfo, Optional[Source]], None, None]:
+        """
+        复用快速遍历的结果给出提取输入, 不再重新遍历目录
+        
+        普通文件沿用已有的 FileInfo(未嗅探过的补做嗅探); 归档按顶层归档重新展开。
+        
+        Args:
+            members_only: 只读出 walked 中列出的归档成员(抽样用), 否则完整展开归档
+        """
+        selected: Dict[str, Set[str]] = defaultdict(set)
+        if members_only:
+            for f in walked:
+                if f.archive_path:
+                    top, _, member = f.path.partition(ARCHIVE_SEPARATOR)
+                    selected[top].add(member)
+        
+        archives = {self._top_archive(f) for f in walked if self._top_archive(f)}
+        total = sum(1 for f in walked if not self._top_archive(f)) + len(archives)
+        expanded = set()
+        processed = 0
+        
+        for file_info in walked:
+            top = self._top_archive(file_info)
+            if top is None:
+                processed += 1
+                if progress_callback:
+                    progress_callback(file_info.path, processed, total)
+                file_path = Path(file_info.path)
+                if self.sniffer and file_info.container is None and file_info.parse_success:
+                    self._apply_sniff(file_path, file_info)
+                yield file_info, file_path
+                continue
+            
+            if top in expanded:
+                continue
+            expanded.add(top)
+            processed += 1
+            if progress_callback:
+                progress_callback(top, processed, total)
+            yield from self._iter_archive(Path(top), selected.get(top) if members_only else None,
+                                          progress_callback, processed, total)
+    
+    @staticmethod
+    def _top_archive(file_info: FileInfo) -> Optional[str]:
+        """归档成员(或无法打开的顶层归档)所属的顶层归档路径, 普通文件返回 None"""
+        if file_info.archive_path:
+            return file_info.archive_path.split(ARCHIVE_SEPARATOR, 1)[0]
+        if file_info.file_type == FileType.ARCHIVE:
+            return file_info.path
+        return None
+    
+    @staticmethod
+    def _check_root(root_path: str) -> Path:
+        root = Path(root_path)
+        if not root.exists():
+            raise ValueError(f"路径不存在: {root_path}")
+        if not root.is_dir():
+            raise ValueError(f"路径不是目录: {root_path}")
+        return root
+    
     def _collect_files(self, root: Path) -> Generator[Path, None, None]:
         """收集所有文件路径"""
         for dirpath, dirnames, filenames in os.walk(root):
@@ -62,10 +184,12 @@ class FileScanner:
                 ext = file_path.suffix.lower()
                 
                 # 只处理支持的格式
-                if ext in self.supported_extensions or ext in ['.txt', '.md']:
+                if ext in self.supported_extensions or ext in self.extra_extensions:
+                    yield file_path
+                elif self.archive_reader and self.archive_reader.is_archive(file_path):
                     yield file_path
     
-    def _create_file_info(self, file_path: Path) -> Optional[FileInfo]:
+    def _create_file_info(self, file_path: Path, sniff: bool = True) -> Optional[FileInfo]:
         """创建文件信息对象"""
         try:
             stat = file_path.stat()
@@ -74,7 +198,7 @@ class FileScanner:
             # 确定文件类型
             file_type = self._get_file_type(ext)
             
-            return FileInfo(
+            file_info = FileInfo(
                 path=str(file_path),
                 name=file_path.name,
                 extension=ext,
@@ -88,6 +212,101 @@ class FileScanner:
         except Exception as e:
             # 文件可能已被删除或无权访问
             return None
+        
+        if sniff and self.sniffer:
+            self._apply_sniff(file_path, file_info)
+        return file_info
+    
+    def _iter_archive(self, archive_path: Path, only: Optional[Set[str]] = None,
+                      progress_callback: Optional[Callable[[str, int, int], None]] = None,
+                      processed: int = 0, total: int = 0
+                      ) -> Generator[Tuple[FileInfo, Optional[Source]], None, None]:
+        """
+        展开归档, 成员作为虚拟文件逐个产出
+
+        每个成员(含嵌套归档中的成员)产出前都回调一次进度, 计数沿用所属顶层归档的序号,
+        使进度回调中的取消检查在归档成员之间也能生效。
+        """
+        try:
+            for member in self.archive_reader.iter_members(archive_path, only):
+                file_info, source = self._create_member_info(member)
+                if progress_callback:
+                    progress_callback(file_info.path, processed, total)
+                yield file_info, source
+        except (zipfile.BadZipFile, OSError) as e:
+            # 顶层归档本身无法打开
+            file_info = self._broken_archive_info(archive_path, e)
+            if file_info:
+                yield file_info, None
+    
+    def _list_archive(self, archive_path: Path) -> Generator[FileInfo, None, None]:
+        """只读中央目录列出归档成员(快速遍历用)"""
+        try:
+            for member in self.archive_reader.list_members(archive_path):
+                file_info, _ = self._create_member_info(member)
+                yield file_info
+        except (zipfile.BadZipFile, OSError) as e:
+            file_info = self._broken_archive_info(archive_path, e)
+            if file_info:
+                yield file_info
+    
+    def _broken_archive_info(self, archive_path: Path, error: Exception) -> Optional[FileInfo]:
+        try:
+            stat = archive_path.stat()
+        except OSError:
+            return None
+        return FileInfo(
+            path=str(archive_path),
+            name=archive_path.name,
+            extension=archive_path.suffix.lower(),
+            size=stat.st_size,
+            modified_time=datetime.fromtimestamp(stat.st_mtime),
+            file_type=FileType.ARCHIVE,
+            is_corrupted=True,
+            parse_success=False,
+            parse_error=f"归档损坏: {str(error)[:40]}",
+        )
+    
+    def _create_member_info(self, member: ArchiveMember) -> Tuple[FileInfo, Optional[Source]]:
+        """创建归档成员的文件信息对象"""
+        file_info = FileInfo(
+            path=member.virtual_path,
+            name=member.name,
+            extension=member.extension,
+            size=member.size,
+            modified_time=member.modified_time,
+            file_type=FileType.ARCHIVE if member.is_archive else self._get_file_type(member.extension),
+            archive_path=member.archive_path,
+            is_encrypted=member.is_encrypted,
+            parse_success=member.error is None,
+            parse_error=member.error,
+        )
+        if member.data is None:
+            return file_info, None
+        
+        buffer = io.BytesIO(member.data)
+        if self.sniffer:
+            self._apply_sniff_result(file_info, self.sniffer.sniff_stream(buffer, member.extension, member.size))
+        return file_info, buffer
+    
+    def _apply_sniff(self, file_path: Path, file_info: FileInfo):
+        """嗅探文件头, 加密/损坏的文件直接标记为解析失败, 不再交给解析器"""
+        try:
+            result = self.sniffer.sniff(file_path, file_info.size)
+        except OSError:
+            return
+        self._apply_sniff_result(file_info, result)
+    
+    @staticmethod
+    def _apply_sniff_result(file_info: FileInfo, result: SniffResult):
+        file_info.container = result.container
+        file_info.is_encrypted = result.is_encrypted
+        file_info.is_corrupted = result.is_corrupted
+        
+        # 加密PDF只打标记: 仅设置所有者密码的PDF仍可正常提取
+        if result.is_corrupted or (result.is_encrypted and result.container != 'pdf'):
+            file_info.parse_success = False
+            file_info.parse_error = result.reason
     
     def _get_file_type(self, ext: str) -> FileType:
         """根据扩展名判断文件类型"""
@@ -101,6 +320,7 @@ class FileScanner:
             'txt': FileType.TXT,
             'md': FileType.MD,
             'image': FileType.IMAGE,
+            'archive': FileType.ARCHIVE,
         }
         
         return type_map.get(type_str, FileType.OTHER)
@@ -0,0 +1,299 @@
+"""
+扫描任务执行器 - 扫描在独立的子进程中执行, API 进程只做调度, 重负载扫描不与请求处理争抢 GIL
+
+- JobRunner: 每个执行槽位一个调度线程 + 一个常驻子进程(spawn 启动);
+  调度线程按优先级从状态后端领取任务交给子进程, 并把子进程回传的进度写入状态后端
+- 子进程只持有内存中的临时结果库, 完成后把结果编码回传, 由调度线程写入共享结果库(单一写入者);
+  完成事件在结果写入之后才发布, 订阅者收到完成事件时一定能取到结果
+- 取消: 调度线程轮询任务的取消请求并置位子进程的取消事件, 子进程在处理文件(含归档成员)之间检查后中止
+- 子进程异常退出时任务记为失败, 领取下一个任务前重新启动; 启动失败时退避重试, 期间不领取任务
+- 运行指标: 子进程定期把指标增量回传, 由调度线程合并进本进程的注册表
+
+API 进程按 settings.state.local_workers 启动执行槽位; 多进程部署时也可单独运行(python cli.py worker)。
+"""
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+from models.schemas import ScanJob, ScanProgress
+from config.settings import settings, Settings
+from storage import ResultStore, StateBackend, encode_result, decode_result
+from utils.metrics import REGISTRY, SCANS, SCAN_SECONDS, WORKER_SLOTS, WORKER_BUSY, WORKER_BUSY_SECONDS
+from .pipeline import ScanPipeline
+from .progress import ProgressThrottle, ScanCancelled
+
+
+# 调度线程检查取消请求/子进程存活的间隔(秒)
+CANCEL_POLL_SECONDS = 0.25
+
+# 子进程回传指标增量的最短间隔(秒)
+METRICS_FLUSH_SECONDS = 1.0
+
+# 子进程启动失败/状态库不可用时的重试间隔(秒), 连续失败时倍增到上限
+RETRY_SECONDS = 1.0
+MAX_RETRY_SECONDS = 30.0
+
+
+class _WorkerLost(Exception):
+    """任务交给子进程之前子进程已退出"""
+
+
+class JobRunner:
+    """本地扫描任务执行器"""
+
+    def __init__(self, backend: StateBackend, store: ResultStore, processes: int,
+                 name: Optional[str] = None):
+        """
+        Args:
+            store: 完成的结果写入的结果库
+            processes: 并行执行的扫描数(子进程数)
+        """
+        self.backend = backend
+        self.store = store
+        self.processes = processes
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        # 执行槽位 -> 正在执行的 task_id(空闲时为 None)
+        self.running: Dict[int, Optional[str]] = {slot: None for slot in range(processes)}
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "JobRunner":
+        WORKER_SLOTS.labels().inc(self.processes)
+        for slot in range(self.processes):
+            thread = threading.Thread(target=self._serve, args=(slot,), name=f"scan-runner-{slot}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """停止领取新任务; 等待执行中的任务结束, 最多 timeout 秒(所有槽位合计)"""
+        self._stop.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+
+    def wait(self):
+        """阻塞到 stop 被调用(独立扫描进程的主线程)"""
+        while not self._stop.wait(1.0):
+            pass
+
+    def _serve(self, slot: int):
+        """调度循环: 启动子进程 -> 领取任务 -> 交给子进程 -> 转发进度 -> 记录结束状态"""
+        name = f"{self.name}:{slot}"
+        worker: Optional[_WorkerProcess] = None
+        backoff = RETRY_SECONDS
+        try:
+            while not self._stop.is_set():
+                # 先确保子进程可用再领取任务, 子进程无法启动时不会有任务滞留在本槽位
+                if worker is None or not worker.alive():
+                    if worker is not None:
+                        worker.stop()
+                    worker = self._spawn()
+                    if worker is None:
+                        self._stop.wait(backoff)
+                        backoff = min(backoff * 2, MAX_RETRY_SECONDS)
+                        continue
+                    backoff = RETRY_SECONDS
+                try:
+                    version = self.backend.version()
+                    job = self.backend.claim(name)
+                    if job is None:
+                        self.backend.wait(version, 1.0)
+                        continue
+                except Exception:
+                    # 状态库暂时不可用(如被锁), 稍后重试
+                    traceback.print_exc()
+                    self._stop.wait(RETRY_SECONDS)
+                    continue
+                self._handle(slot, worker, job)
+        finally:
+            WORKER_SLOTS.labels().dec()
+            if worker is not None:
+                worker.stop()
+
+    def _spawn(self) -> Optional["_WorkerProcess"]:
+        try:
+            return _WorkerProcess(self._context)
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def _handle(self, slot: int, worker: "_WorkerProcess", job: ScanJob):
+        """执行领取的任务; 任务尚未交给子进程时子进程已退出, 则放回队列"""
+        self.running[slot] = job.task_id
+        WORKER_BUSY.labels().inc()
+        started = time.monotonic()
+        status = "error"
+        try:
+            status = self._run(worker, job)
+        except _WorkerLost:
+            status = "requeued"
+            self.backend.submit(job.model_copy(update={"worker": None, "started_at": None}))
+        except Exception as e:
+            traceback.print_exc()
+            self._finish_with(job.task_id, "error", f"扫描失败: {str(e)[:200]}")
+        finally:
+            self.running[slot] = None
+            elapsed = time.monotonic() - started
+            WORKER_BUSY.labels().dec()
+            WORKER_BUSY_SECONDS.inc(elapsed)
+            if status != "requeued":
+                SCANS.labels(job.mode, status).inc()
+                SCAN_SECONDS.labels(job.mode).observe(elapsed)
+
+    def _run(self, worker: "_WorkerProcess", job: ScanJob) -> str:
+        """执行一个任务, 返回结束状态"""
+        payload = None
+        if job.mode == "upgrade":
+            quick = self.store.get(job.task_id)
+            payload = encode_result(quick) if quick is not None else None
+
+        worker.cancel.clear()
+        try:
+            worker.conn.send((job.model_dump_json(), payload))
+        except (OSError, ValueError):
+            raise _WorkerLost()
+        next_check = time.monotonic() + CANCEL_POLL_SECONDS
+        while True:
+            message = None
+            if worker.conn.poll(CANCEL_POLL_SECONDS):
+                try:
+                    message = worker.conn.recv()
+                except (EOFError, OSError):
+                    message = ("error", "扫描进程意外退出")
+            elif not worker.alive():
+                message = ("error", "扫描进程意外退出")
+
+            if message is not None:
+                kind = message[0]
+                if kind == "progress":
+                    self.backend.publish(ScanProgress.model_validate_json(message[1]))
+                elif kind == "metrics":
+                    REGISTRY.merge(message[1])
+                elif kind == "done":
+                    _, summary, table, final = message
+                    self.store.put(decode_result(summary, table))
+                    if final:
+                        self.backend.publish(ScanProgress.model_validate_json(final))
+                    self.backend.finish(job.task_id, "completed")
+                    return "completed"
+                elif kind == "cancelled":
+                    self._finish_with(job.task_id, "cancelled", "扫描已取消")
+                    return "cancelled"
+                else:
+                    self._finish_with(job.task_id, "error", message[1])
+                    return "error"
+
+            if time.monotonic() >= next_check:
+                current = self.backend.get_job(job.task_id)
+                if current is None or current.cancel_requested:
+                    worker.cancel.set()
+                next_check = time.monotonic() + CANCEL_POLL_SECONDS
+
+    def _finish_with(self, task_id: str, status: str, message: str):
+        """发布结束进度(沿用最后一次的计数)并记录任务结束"""
+        latest = self.backend.latest(task_id)
+        progress = latest[1] if latest else ScanProgress(task_id=task_id, status=status)
+        self.backend.publish(progress.model_copy(update={"status": status, "message": message}))
+        self.backend.finish(task_id, status, None if status == "cancelled" else message)
+
+
+class _WorkerProcess:
+    """常驻的扫描子进程及其通信管道"""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        try:
+            self.cancel = context.Event()
+            self.process = context.Process(
+                target=_child_main, args=(child_conn, self.cancel, settings.model_dump()),
+                name="scan-worker", daemon=True,
+            )
+            self.process.start()
+        except BaseException:
+            self.conn.close()
+            raise
+        finally:
+            child_conn.close()
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self):
+        self.conn.close()
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+# ---- 子进程 ----
+
+def _child_main(conn, cancel, settings_data: dict):
+    """子进程入口: 依次执行调度线程发来的任务, 每个任务回传一条结束消息"""
+    # spawn 启动的子进程重新导入配置, 沿用父进程运行时的配置
+    loaded = Settings.model_validate(settings_data)
+    for name in Settings.model_fields:
+        setattr(settings, name, getattr(loaded, name))
+
+    pipeline = ScanPipeline(store=ResultStore(":memory:", memory_results=1, max_results=1))
+    while True:
+        try:
+            job_json, payload = conn.recv()
+        except (EOFError, OSError, KeyboardInterrupt):
+            return
+        conn.send(_execute(pipeline, ScanJob.model_validate_json(job_json), payload, cancel, conn))
+
+
+def _flush_metrics(conn):
+    """把上次回传以来的指标增量发给调度线程"""
+    conn.send(("metrics", REGISTRY.snapshot(reset=True, include_gauges=False)))
+
+
+def _execute(pipeline: ScanPipeline, job: ScanJob, payload: Optional[Tuple[bytes, bytes]], cancel, conn) -> tuple:
+    final: List[ScanProgress] = []
+    throttle = ProgressThrottle(lambda progress: conn.send(("progress", progress.model_dump_json())))
+    next_flush = time.monotonic() + METRICS_FLUSH_SECONDS
+
+    def on_progress(progress: ScanProgress):
+        nonlocal next_flush
+        # 处理文件(含归档成员)之间检查取消请求
+        if progress.status == "scanning" and cancel.is_set():
+            raise ScanCancelled()
+        now = time.monotonic()
+        if now >= next_flush:
+            _flush_metrics(conn)
+            next_flush = now + METRICS_FLUSH_SECONDS
+        # 完成事件等结果写入共享结果库后由调度线程发布
+        if progress.status == "completed":
+            final.append(progress.model_copy())
+            return
+        throttle(progress)
+
+    try:
+        if payload is not None:
+            pipeline.store.put(decode_result(*payload))
+        if job.mode == "quick":
+            pipeline.start_quick_scan(job.path, job.sniff, on_progress, task_id=job.task_id)
+        elif job.mode == "sample":
+            pipeline.start_sample_scan(job.path, job.sample_rate, job.seed, on_progress, task_id=job.task_id)
+        elif job.mode == "upgrade":
+            pipeline.upgrade_scan(job.task_id, on_progress)
+        else:
+            pipeline.start_scan(job.path, on_progress, task_id=job.task_id)
+        summary, table = encode_result(pipeline.get_result(job.task_id))
+        return "done", summary, table, final[-1].model_dump_json() if final else None
+    except ScanCancelled:
+        return ("cancelled",)
+    except Exception as e:
+        traceback.print_exc()
+        return "error", f"扫描失败: {str(e)[:200]}"
+    finally:
+        # 子进程不保留任何任务状态; 结束消息之前回传剩余的指标增量
+        pipeline.store.delete(job.task_id)
+        pipeline.progress.pop(job.task_id, None)
+        _flush_metrics(conn)
@@ -1,44 +1,67 @@
 """
 扫描管线 - 编排整个扫描流程
 """
+import heapq
+import time
 import uuid
 from pathlib import Path
 from datetime import datetime
-from typing import Callable, Optional, Dict, List, Set
+from typing import Callable, Optional, Dict, Iterable, List, Set, Tuple
 from collections import defaultdict
 
 from models.schemas import (
-    FileInfo, FileAnalysis, DocumentMetrics,
+    FileInfo, FileAnalysis, DocumentMetrics, FileTiming, TimingStats, TimingBreakdown, SlowFile,
     ScanProgress, ScanResult, FileType, DuplicateGroup, 
-    PageTypeStats, SimilarGroup, DocumentCategory,
-    CategoryStats
+    PageTypeStats, SimilarGroup, DocumentCategory, PDFType,
+    CategoryStats, OCRWorkload, SampleEstimate, ChunkingStats
 )
+from models.result_table import FileTable
 from config.settings import settings
+from storage import ResultStore, TextStore
+from utils.metrics import FILES_PROCESSED, BYTES_PROCESSED, EXTRACT_SECONDS, cache_lookup
 from .file_scanner import FileScanner
-from .extractors.docx_extractor import DocxExtractor
-from .extractors.xlsx_extractor import XlsxExtractor
-from .extractors.pptx_extractor import PptxExtractor
-from .extractors.pdf_extractor import PdfExtractor
-from .extractors.text_extractor import TextExtractor
+from .sampler import StratifiedSampler
+from .extractors.base import BaseExtractor, Source
+from .extractors.registry import ExtractorRegistry
 from .analyzers.duplicate_analyzer import DuplicateAnalyzer
 from .analyzers.similarity_analyzer import SimilarityAnalyzer
-from .analyzers.stats_analyzer import StatsAnalyzer
+from .analyzers.stats_analyzer import StatsAnalyzer, StatsAccumulator
+from .analyzers.chunk_analyzer import ChunkAnalyzer
+from .analyzers.noise_analyzer import NoiseAnalyzer
+from .analyzers.sample_estimator import SampleEstimator
+from .analyzers.tree_analyzer import DirectoryTree
+from .analyzers.result_index import ResultIndex
+
+
+def new_task_id() -> str:
+    return str(uuid.uuid4())[:8]
+
+
+# 提取器类 -> 指标标签(类名去掉 Extractor 后缀, 如 PdfExtractor -> pdf)
+_extractor_labels: Dict[type, str] = {}
+
+
+def _extractor_label(extractor) -> str:
+    cls = type(extractor)
+    label = _extractor_labels.get(cls)
+    if label is None:
+        name = cls.__name__
+        label = _extractor_labels[cls] = (name[:-len('Extractor')] if name.endswith('Extractor') else name).lower()
+    return label
 
 
 class ScanPipeline:
     """扫描管线"""
     
-    def __init__(self):
-        self.file_scanner = FileScanner()
-        
-        # 初始化提取器
-        self.extractors = [
-            DocxExtractor(),
-            XlsxExtractor(),
-            PptxExtractor(),
-            PdfExtractor(),
-            TextExtractor(),
-        ]
+    def __init__(self, store: Optional[ResultStore] = None, text_store: Optional[TextStore] = None):
+        """
+        Args:
+            store: 结果存储; 同一进程内的多个管线(并行执行扫描)共用一个
+            text_store: 提取文本库
+        """
+        # 初始化提取器注册表(解析库在首次遇到对应格式时才导入)
+        self.extractors = ExtractorRegistry()
+        self.file_scanner = FileScanner(extra_extensions=self.extractors.plugin_extensions())
         
         # 初始化分析器
         self.duplicate_analyzer = DuplicateAnalyzer()
@@ -46,47 +69,214 @@ class ScanPipeline:
             distance_threshold=settings.similarity.simhash_distance_threshold
         )
         self.stats_analyzer = StatsAnalyzer()
-        
-        # 任务状态存储
-        self.tasks: Dict[str, ScanResult] = {}
+        self.chunk_analyzer = ChunkAnalyzer()
+        self.noise_analyzer = NoiseAnalyzer()
+        
+        # 任务状态存储: 完成的结果持久化到 SQLite, 内存中只保留最近使用的若干份
+        self.store = store or ResultStore()
+        self.store.add_evict_listener(self._on_result_evicted)
+        # 提取文本库(settings.text_store.enabled 时在解析过程中写入)
+        self.text_store = text_store or TextStore()
         self.progress: Dict[str, ScanProgress] = {}
+        # 快速扫描的遍历结果(升级为完整扫描时复用)
+        self.walks: Dict[str, List[FileInfo]] = {}
+        # 目录树汇总(首次请求时构建)
+        self.trees: Dict[str, DirectoryTree] = {}
+        # 结果索引(首次查询时构建, 支撑分页/筛选/排序接口)
+        self.indexes: Dict[str, ResultIndex] = {}
     
     def start_scan(self, scan_path: str, 
-                   progress_callback: Optional[Callable[[ScanProgress], None]] = None
-                   ) -> str:
-        """启动扫描任务"""
-        task_id = str(uuid.uuid4())[:8]
+                   progress_callback: Optional[Callable[[ScanProgress], None]] = None,
+                   task_id: Optional[str] = None) -> str:
+        """启动扫描任务(task_id 由调用方预先分配时沿用, 否则新生成)"""
+        task_id = task_id or new_task_id()
+        progress = self._init_progress(task_id, "正在扫描文件夹...")
+        
+        # 统计文件总数
+        progress.total_count = self.file_scanner.count_files(scan_path)
+        
+        return self._run_deep_scan(
+            task_id, scan_path,
+            lambda on_file: self.file_scanner.iter_sources(scan_path, on_file),
+            progress, progress_callback,
+        )
+    
+    def start_quick_scan(self, scan_path: str, sniff: bool = False,
+                         progress_callback: Optional[Callable[[ScanProgress], None]] = None,
+                         task_id: Optional[str] = None) -> str:
+        """
+        快速扫描: 只遍历目录和 stat(可选文件头嗅探), 不解析内容
+        
+        结果只含文件数、大小、格式分布等元数据; 遍历结果会保留下来,
+        之后可通过 upgrade_scan 在同一任务上补做完整解析。
+        """
+        task_id = task_id or new_task_id()
         start_time = datetime.now()
+        progress = self._init_progress(task_id, "正在快速遍历文件夹...")
         
-        # 初始化进度
-        progress = ScanProgress(
+        if progress_callback:
+            progress_callback(progress)
+        
+        on_file = self._file_progress_callback(progress, progress_callback)
+        walked = list(self.file_scanner.walk(scan_path, sniff, on_file))
+        
+        format_distribution: Dict[str, int] = defaultdict(int)
+        table = FileTable()
+        for file_info in walked:
+            format_distribution[file_info.file_type.value] += 1
+            analysis = FileAnalysis(file_info=file_info, metrics=DocumentMetrics())
+            # 未解析的文件不做分类, 仅标记嗅探阶段发现的加密/损坏文件
+            if not file_info.parse_success:
+                analysis = self._set_category(analysis)
+            table.append(analysis)
+        
+        result = ScanResult(
             task_id=task_id,
-            status="scanning",
-            message="正在扫描文件夹..."
+            scan_path=scan_path,
+            scan_time=start_time,
+            duration_seconds=(datetime.now() - start_time).total_seconds(),
+            scan_mode="quick",
+            total_files=len(table),
+            total_size=sum(f.size for f in walked),
+            format_distribution=dict(format_distribution),
+        ).attach_table(table)
+        self._store_result(result)
+        self.walks[task_id] = walked
+        
+        progress.status = "completed"
+        progress.percentage = 100
+        progress.message = "快速扫描完成"
+        if progress_callback:
+            progress_callback(progress)
+        
+        return task_id
+    
+    def upgrade_scan(self, task_id: str,
+                     progress_callback: Optional[Callable[[ScanProgress], None]] = None
+                     ) -> str:
+        """
+        将快速扫描升级为完整扫描: 复用已有遍历结果, 结果覆盖同一 task_id
+        
+        快速扫描由其他进程执行时, 遍历结果从结果库中的文件清单还原。
+        
+        Raises:
+            ValueError: 任务不存在或不是快速扫描
+        """
+        quick_result = self.store.get(task_id)
+        if quick_result is None or quick_result.scan_mode != "quick":
+            raise ValueError(f"任务不存在或不是快速扫描: {task_id}")
+        walked = self.walks.get(task_id)
+        if walked is None:
+            walked = [analysis.file_info for analysis in quick_result.file_table.iter_rows()]
+        
+        progress = self._init_progress(task_id, "正在解析文件...")
+        self._run_deep_scan(
+            task_id, quick_result.scan_path,
+            lambda on_file: self.file_scanner.iter_walk_sources(walked, on_file),
+            progress, progress_callback,
         )
-        self.progress[task_id] = progress
+        self.walks.pop(task_id, None)
+        return task_id
+    
+    def start_sample_scan(self, scan_path: str, sample_rate: Optional[float] = None,
+                          seed: Optional[int] = None,
+                          progress_callback: Optional[Callable[[ScanProgress], None]] = None,
+                          task_id: Optional[str] = None) -> str:
+        """
+        抽样扫描: 遍历全部文件后按 文件类型×大小区间 分层抽样, 只解析样本
         
-        # 重置分析器状态
-        self.duplicate_analyzer.reset()
-        self.similarity_analyzer.reset()
+        文件数/大小/格式分布为精确值; 长度、结构、分类、PDF页面统计
+        为外推到总体的估计值, 置信区间见 result.sample_estimate。
+        重复/相似检测只在样本内进行意义不大, 抽样模式下不做。
+        """
+        sampler = StratifiedSampler(sample_rate, seed)
+        task_id = task_id or new_task_id()
+        start_time = datetime.now()
+        progress = self._init_progress(task_id, "正在遍历文件夹...")
+        
+        if progress_callback:
+            progress_callback(progress)
+        
+        # 遍历阶段同样按文件回调进度(也是检查取消请求的时机)
+        on_file_progress = self._file_progress_callback(progress, progress_callback)
+        walked = list(self.file_scanner.walk(scan_path, progress_callback=on_file_progress))
+        frame = sampler.sample(walked)
         
-        # 收集所有文件分析结果
-        analyses: List[FileAnalysis] = []
         format_distribution: Dict[str, int] = defaultdict(int)
+        for file_info in walked:
+            format_distribution[file_info.file_type.value] += 1
         
-        # 统计文件总数
-        total_files = self.file_scanner.count_files(scan_path)
-        progress.total_count = total_files
+        # 只解析样本
+        progress.message = f"正在解析样本({len(frame.samples)}/{len(walked)})..."
+        table, _, _ = self._analyze_sources(
+            self.file_scanner.iter_walk_sources(frame.samples, on_file_progress, members_only=True)
+        )
+        analyses = list(table.iter_rows())
         
+        progress.status = "analyzing"
+        progress.message = "正在外推统计..."
         if progress_callback:
             progress_callback(progress)
         
-        processed = 0
+        confidence = settings.sampling.confidence
+        estimator = SampleEstimator(frame, analyses, confidence)
+        length_stats = estimator.length_stats()
+        structure_stats = estimator.structure_stats()
+        category_stats = estimator.category_stats()
+        pdf_page_stats = estimator.pdf_page_stats()
+        chunking_stats = estimator.chunking_stats(self.chunk_analyzer)
+        noise_stats = estimator.noise_stats(self.noise_analyzer.result())
         
-        # 扫描并处理每个文件
+        result = ScanResult(
+            task_id=task_id,
+            scan_path=scan_path,
+            scan_time=start_time,
+            duration_seconds=(datetime.now() - start_time).total_seconds(),
+            scan_mode="sample",
+            total_files=len(walked),
+            total_size=sum(f.size for f in walked),
+            format_distribution=dict(format_distribution),
+            pdf_page_stats=pdf_page_stats,
+            category_stats=category_stats,
+            length_stats=length_stats,
+            structure_stats=structure_stats,
+            chunking_stats=chunking_stats,
+            noise_stats=noise_stats,
+            timing_stats=self._calculate_timing_stats(table),
+            sample_estimate=SampleEstimate(
+                population_files=frame.population_size,
+                sampled_files=len(analyses),
+                unsampled_files=frame.unsampled,
+                confidence=confidence,
+                strata=sampler.strata_info(frame),
+                estimates=estimator.estimates,
+            ),
+        ).attach_table(table)
+        self._store_result(result)
+        
+        progress.status = "completed"
+        progress.percentage = 100
+        progress.message = "抽样扫描完成"
+        if progress_callback:
+            progress_callback(progress)
+        
+        return task_id
+    
+    def _init_progress(self, task_id: str, message: str) -> ScanProgress:
+        progress = ScanProgress(
+            task_id=task_id,
+            status="scanning",
+            message=message
+        )
+        self.progress[task_id] = progress
+        return progress
+    
+    @staticmethod
+    def _file_progress_callback(progress: ScanProgress,
+                                progress_callback: Optional[Callable[[ScanProgress], None]]
+                                ) -> Callable[[str, int, int], None]:
+        """把文件级进度 (current_file, processed, total) 转换为 ScanProgress 回调"""
         def on_file_progress(current_file: str, processed_count: int, total: int):
-            nonlocal processed
-            processed = processed_count
             progress.current_file = Path(current_file).name
             progress.processed_count = processed_count
             progress.total_count = total
@@ -94,34 +284,28 @@ class ScanPipeline:
             progress.message = f"正在处理: {progress.current_file}"
             if progress_callback:
                 progress_callback(progress)
+        return on_file_progress
+    
+    def _run_deep_scan(self, task_id: str, scan_path: str,
+                       iter_sources: Callable[[Callable[[str, int, int], None]],
+                                              Iterable[Tuple[FileInfo, Optional[Source]]]],
+                       progress: ScanProgress,
+                       progress_callback: Optional[Callable[[ScanProgress], None]] = None
+                       ) -> str:
+        """
+        完整扫描: 逐个解析文件并生成结果
         
-        for file_info in self.file_scanner.scan(scan_path, on_file_progress):
-            # 更新格式分布
-            format_distribution[file_info.file_type.value] += 1
-            
-            # 提取文档指标
-            metrics = self._extract_metrics(file_info)
-            
-            # 计算文件哈希(MD5用于重复检测)
-            file_hash = self.duplicate_analyzer.add_file(Path(file_info.path))
-            
-            # 提取文本
-            text = self._extract_text(file_info)
-                        
-            # 添加到相似度分析器
-            if text:
-                self.similarity_analyzer.add_document(file_info.path, text)
-            
-            # 创建分析结果
-            analysis = FileAnalysis(
-                file_info=file_info,
-                metrics=metrics,
-                file_hash=file_hash
-            )
-            
-            # 设置分类标签（三档分类）
-            analysis = self._set_category(analysis)
-            analyses.append(analysis)
+        Args:
+            iter_sources: 接收文件级进度回调, 返回 (FileInfo, 输入) 序列
+        """
+        start_time = datetime.now()
+        
+        if progress_callback:
+            progress_callback(progress)
+        
+        # 扫描并处理每个文件
+        on_file_progress = self._file_progress_callback(progress, progress_callback)
+        table, format_distribution, stats_acc = self._analyze_sources(iter_sources(on_file_progress))
         
         # 进入分析阶段
         progress.status = "analyzing"
@@ -144,17 +328,22 @@ class ScanPipeline:
         ]
         
         # 统计文档分类
-        category_stats = self._calculate_category_stats(analyses)
+        category_stats = self._calculate_category_stats(table)
 
         # 统计PDF页面类型
-        pdf_page_stats = self._calculate_pdf_page_stats(analyses)
+        pdf_page_stats = self._calculate_pdf_page_stats(table)
+        
+        # 估算OCR工作量
+        ocr_workload = self._calculate_ocr_workload(table)
         
-        # 计算统计分析
-        stats = self.stats_analyzer.analyze(analyses)
+        # 切块预演与向量化成本
+        chunking_stats = self._calculate_chunking_stats(table)
         
-        # 筛选需特殊处理的文件
-        ocr_files = [a for a in analyses if a.needs_ocr]
-        review_files = [a for a in analyses if a.needs_review]
+        # 逐文件阶段耗时
+        timing_stats = self._calculate_timing_stats(table)
+        
+        # 统计分析(已在解析过程中逐文件累计)
+        stats = stats_acc.result()
         
         # 计算耗时
         end_time = datetime.now()
@@ -166,21 +355,22 @@ class ScanPipeline:
             scan_path=scan_path,
             scan_time=start_time,
             duration_seconds=duration,
-            total_files=len(analyses),
-            total_size=sum(a.file_info.size for a in analyses),
-            format_distribution=dict(format_distribution),
+            total_files=len(table),
+            total_size=sum(table.column('size')),
+            format_distribution=format_distribution,
             pdf_page_stats=pdf_page_stats,
+            ocr_workload=ocr_workload,
+            chunking_stats=chunking_stats,
+            noise_stats=self.noise_analyzer.result(),
+            timing_stats=timing_stats,
             category_stats=category_stats,
             duplicate_groups=duplicates,
             similar_groups=similar_groups,
             length_stats=stats['length_stats'],
             structure_stats=stats['structure_stats'],
-            files=analyses,
-            ocr_files=ocr_files,
-            review_files=review_files,
-        )
+        ).attach_table(table)
         
-        self.tasks[task_id] = result
+        self._store_result(result)
         
         # 完成
         progress.status = "completed"
@@ -191,32 +381,147 @@ class ScanPipeline:
         
         return task_id
     
-    def _extract_metrics(self, file_info: FileInfo) -> DocumentMetrics:
-        """使用合适的提取器提取文档指标"""
-        file_path = Path(file_info.path)
+    def _analyze_sources(self, sources: Iterable[Tuple[FileInfo, Optional[Source]]]
+                         ) -> Tuple[FileTable, Dict[str, int], StatsAccumulator]:
+        """
+        逐个解析文件, 返回列式分析结果、格式分布和逐文件累计的统计
         
-        for extractor in self.extractors:
-            if extractor.can_handle(file_path):
-                return extractor.extract(file_path, file_info)
+        各阶段耗时用单调时钟(perf_counter)记录, 与分析结果一起写入列式表;
+        stat 阶段为从上一个文件处理完到输入产出的时间(遍历/stat/嗅探在输入迭代器中完成)。
+        """
+        # 重置分析器状态
+        self.duplicate_analyzer.reset()
+        self.similarity_analyzer.reset()
+        self.noise_analyzer.reset()
         
-        return DocumentMetrics()
-    
-    def _extract_text(self, file_info: FileInfo) -> str:
-        """提取文本内容"""
-        file_path = Path(file_info.path)
+        # 收集所有文件分析结果(列式存储, 不保留逐文件的对象)
+        table = FileTable()
+        format_distribution: Dict[str, int] = defaultdict(int)
+        stats_acc = self.stats_analyzer.accumulator()
+        clock = time.perf_counter
         
-        for extractor in self.extractors:
-            if extractor.can_handle(file_path):
-                return extractor.extract_text(file_path)
+        mark = clock()
+        for file_info, source in sources:
+            started = clock()
+            
+            # 更新格式分布与吞吐计数
+            file_type = file_info.file_type.value
+            format_distribution[file_type] += 1
+            FILES_PROCESSED.labels(file_type).inc()
+            BYTES_PROCESSED.labels(file_type).inc(file_info.size)
+            
+            # 提取文档指标和文本(一次解析)
+            metrics, text, extract_seconds, text_seconds = self._extract(file_info, source)
+            
+            # 计算文件哈希(MD5用于重复检测)
+            t1 = clock()
+            file_hash = self._hash(file_info, source)
+                        
+            # 添加到相似度分析器
+            t2 = clock()
+            if text:
+                self.similarity_analyzer.add_document(file_info.path, text)
+            
+            # 切块预演(复用同一份文本)
+            t3 = clock()
+            if text and settings.chunking.enabled:
+                metrics.token_count, metrics.chunk_count = self.chunk_analyzer.analyze(text, metrics.char_count)
+            
+            # 噪音检测(同上)
+            if text and settings.noise.enabled:
+                noise = self.noise_analyzer.analyze_text(text)
+                metrics.line_count = noise['line_count']
+                metrics.noise_line_count = noise['noise_line_count']
+                metrics.noise_ratio = noise['noise_ratio']
+            
+            # 保存提取的文本, 下游入库直接复用(同上)
+            if text and file_hash and settings.text_store.enabled:
+                cache_lookup('texts', not self.text_store.put(file_hash, text))
+            t4 = clock()
+            
+            # 创建分析结果
+            analysis = FileAnalysis(
+                file_info=file_info,
+                metrics=metrics,
+                file_hash=file_hash
+            )
+            
+            # 设置分类标签（三档分类）
+            analysis = self._set_category(analysis)
+            end = clock()
+            analysis.timing = FileTiming(
+                stat_seconds=started - mark,
+                extract_seconds=extract_seconds,
+                text_seconds=text_seconds,
+                hash_seconds=t2 - t1,
+                fingerprint_seconds=t3 - t2,
+                postprocess_seconds=t4 - t3,
+                total_seconds=end - mark,
+            )
+            stats_acc.add(analysis)
+            table.append(analysis)
+            mark = clock()
         
-        return ""
+        return table, dict(format_distribution), stats_acc
+    
+    def _extract(self, file_info: FileInfo, source: Optional[Source]
+                 ) -> Tuple[DocumentMetrics, str, float, float]:
+        """
+        使用合适的提取器提取文档指标和文本内容
+        
+        Returns:
+            (指标, 文本, 指标解析耗时, 文本提取耗时); 重写了 extract_with_text 的提取器
+            一次解析得到两者, 耗时全部计入指标解析
+        """
+        # 嗅探阶段已判定为加密/损坏的文件不再解析
+        if source is None or not file_info.parse_success:
+            return DocumentMetrics(), "", 0.0, 0.0
+        
+        # 首次遇到某格式时导入解析库的耗时也计入解析
+        clock = time.perf_counter
+        started = parsed = clock()
+        extractor = self.extractors.get(self._effective_extension(file_info))
+        if extractor is None:
+            return DocumentMetrics(), "", 0.0, 0.0
+        
+        try:
+            if type(extractor).extract_with_text is BaseExtractor.extract_with_text:
+                # 与 BaseExtractor.extract_with_text 相同, 分开计时
+                metrics = extractor.extract(source, file_info)
+                parsed = clock()
+                text = extractor.extract_text(source) if file_info.parse_success else ""
+            else:
+                metrics, text = extractor.extract_with_text(source, file_info)
+                parsed = clock()
+        finally:
+            end = clock()
+            EXTRACT_SECONDS.labels(_extractor_label(extractor)).observe(end - started)
+        return metrics, text, parsed - started, end - parsed
+    
+    def _hash(self, file_info: FileInfo, source: Optional[Source]) -> str:
+        """计算文件内容哈希; 归档成员直接对内存缓冲区计算"""
+        if source is None:
+            return ""
+        if isinstance(source, Path):
+            return self.duplicate_analyzer.add_file(source)
+        return self.duplicate_analyzer.add_data(file_info.path, source.getvalue())
+    
+    @staticmethod
+    def _effective_extension(file_info: FileInfo) -> str:
+        """按嗅探到的真实容器修正Office扩展名(如实为OOXML的 .doc)"""
+        ext = file_info.extension
+        if file_info.container == 'zip' and ext in ('.doc', '.xls', '.ppt'):
+            return ext + 'x'
+        if file_info.container == 'ole2' and ext in ('.docx', '.xlsx', '.pptx'):
+            return ext[:-1]
+        return ext
     
     def _set_category(self, analysis: FileAnalysis) -> FileAnalysis:
         """
         设置文档三档分类：
         - SIMPLE: 纯文字，无表格无图片
         - MEDIUM: 含表格或图片
-        - COMPLEX: 扫描PDF/解析失败
+        - COMPLEX: 扫描PDF/图片/解析失败
         """
         metrics = analysis.metrics
         file_info = analysis.file_info
@@ -228,6 +533,13 @@ class ScanPipeline:
             analysis.needs_review = True
             return analysis
         
+        # 复杂：图片(需OCR)
+        if file_info.file_type == FileType.IMAGE:
+            analysis.category = DocumentCategory.COMPLEX
+            analysis.quality_tag = "Image_OCR"
+            analysis.needs_ocr = True
+            return analysis
+        
         # 复杂：扫描型PDF
         if file_info.file_type == FileType.PDF:
             if metrics.pdf_type and metrics.pdf_type.value == 'scan':
@@ -255,49 +567,51 @@ class ScanPipeline:
         analysis.quality_tag = "Pure_Text"
         return analysis
     
-    def _calculate_category_stats(self, analyses: List[FileAnalysis]) -> CategoryStats:
-        """统计三档分类"""
-        simple_files = []
-        medium_files = []
-        complex_files = []
-        
-        for a in analyses:
-            path = a.file_info.path
-            if a.category == DocumentCategory.SIMPLE:
-                simple_files.append(path)
-            elif a.category == DocumentCategory.MEDIUM:
-                medium_files.append(path)
-            else:
-                complex_files.append(path)
+    def _calculate_category_stats(self, table: FileTable) -> CategoryStats:
+        """统计三档分类(文件清单保存在列式表中, 按需构建)"""
+        code = table.code
+        simple = code(DocumentCategory.SIMPLE.value)
+        medium = code(DocumentCategory.MEDIUM.value)
+        
+        simple_count = medium_count = 0
+        for category in table.column('category'):
+            if category == simple:
+                simple_count += 1
+            elif category == medium:
+                medium_count += 1
         
         return CategoryStats(
-            simple_count=len(simple_files),
-            medium_count=len(medium_files),
-            complex_count=len(complex_files),
-            simple_files=simple_files,
-            medium_files=medium_files,
-            complex_files=complex_files,
+            simple_count=simple_count,
+            medium_count=medium_count,
+            complex_count=len(table) - simple_count - medium_count,
         )
     
-    def _calculate_pdf_page_stats(self, analyses: List[FileAnalysis]) -> PageTypeStats:
+    def _calculate_pdf_page_stats(self, table: FileTable) -> PageTypeStats:
         """统计PDF页面类型分布"""
         text_pages = 0
         scan_pages = 0
         low_density_pages = 0
         total_pages = 0
         
-        for a in analyses:
-            if a.file_info.file_type == FileType.PDF:
-                pages = a.metrics.page_count
-                total_pages += pages
-                
-                if a.metrics.pdf_type:
-                    if a.metrics.pdf_type.value == 'text':
-                        text_pages += pages
-                    elif a.metrics.pdf_type.value == 'scan':
-                        scan_pages += pages
-                    else:
-                        low_density_pages += pages
+        code = table.code
+        pdf = code(FileType.PDF.value)
+        text = code(PDFType.TEXT.value)
+        scan = code(PDFType.SCAN.value)
+        
+        for file_type, pages, pdf_type in zip(table.column('file_type'),
+                                              table.column('page_count'),
+                                              table.column('pdf_type')):
+            if file_type != pdf:
+                continue
+            total_pages += pages
+            
+            if pdf_type >= 0:
+                if pdf_type == text:
+                    text_pages += pages
+                elif pdf_type == scan:
+                    scan_pages += pages
+                else:
+                    low_density_pages += pages
         
         return PageTypeStats(
             text_pages=text_pages,
@@ -308,9 +622,121 @@ class ScanPipeline:
             scan_ratio=scan_pages / total_pages if total_pages > 0 else 0
         )
     
+    def _calculate_ocr_workload(self, table: FileTable) -> OCRWorkload:
+        """估算OCR工作量: 图片文件 + 所有PDF中的扫描页"""
+        workload = OCRWorkload()
+        image_pixels = 0
+        scan_pixels = 0
+        
+        code = table.code
+        image = code(FileType.IMAGE.value)
+        pdf = code(FileType.PDF.value)
+        
+        for ok, file_type, pixels, scan_pages in zip(table.column('parse_success'),
+                                                     table.column('file_type'),
+                                                     table.column('pixel_count'),
+                                                     table.column('scan_page_count')):
+            if not ok:
+                continue
+            if file_type == image:
+                workload.image_files += 1
+                image_pixels += pixels
+            elif file_type == pdf:
+                workload.scan_pdf_pages += scan_pages
+                scan_pixels += pixels
+        
+        workload.image_megapixels = round(image_pixels / 1e6, 2)
+        workload.scan_pdf_megapixels = round(scan_pixels / 1e6, 2)
+        workload.total_pages = workload.image_files + workload.scan_pdf_pages
+        workload.total_megapixels = round((image_pixels + scan_pixels) / 1e6, 2)
+        return workload
+    
+    def _calculate_chunking_stats(self, table: FileTable) -> ChunkingStats:
+        """按格式汇总切块预演结果"""
+        by_format: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+        strings = table.strings
+        for file_type, tokens, chunks in zip(table.column('file_type'),
+                                             table.column('token_count'),
+                                             table.column('chunk_count')):
+            entry = by_format[strings.get(file_type)]
+            entry[0] += 1
+            entry[1] += tokens
+            entry[2] += chunks
+        return self.chunk_analyzer.summarize({k: tuple(v) for k, v in by_format.items()})
+    
+    def _calculate_timing_stats(self, table: FileTable) -> TimingStats:
+        """按文件类型汇总阶段耗时, 并列出总耗时最长的文件"""
+        stages = list(FileTiming.model_fields)
+        columns = [table.column(name) for name in stages]
+        by_type: Dict[int, List[float]] = defaultdict(lambda: [0] + [0.0] * len(stages))
+        for file_type, *seconds in zip(table.column('file_type'), *columns):
+            entry = by_type[file_type]
+            entry[0] += 1
+            for i, value in enumerate(seconds, 1):
+                entry[i] += value
+        
+        def breakdown(entry: List[float]) -> TimingBreakdown:
+            return TimingBreakdown(files=entry[0], **{name: round(v, 6) for name, v in zip(stages, entry[1:])})
+        
+        total = [0] + [0.0] * len(stages)
+        for entry in by_type.values():
+            total = [a + b for a, b in zip(total, entry)]
+        
+        totals = table.column('total_seconds')
+        slowest = heapq.nlargest(settings.stats.slowest_files, range(len(table)), key=totals.__getitem__)
+        strings = table.strings
+        return TimingStats(
+            total=breakdown(total),
+            by_type={strings.get(code): breakdown(entry) for code, entry in by_type.items()},
+            slowest_files=[
+                SlowFile(
+                    path=table.value('path', row),
+                    file_type=strings.get(table.column('file_type')[row]),
+                    size=table.value('size', row),
+                    timing=FileTiming(**{name: round(table.value(name, row), 6) for name in stages}),
+                )
+                for row in slowest
+            ],
+        )
+    
     def get_result(self, task_id: str) -> Optional[ScanResult]:
         """获取扫描结果"""
-        return self.tasks.get(task_id)
+        return self.store.get(task_id)
+    
+    def _store_result(self, result: ScanResult):
+        """保存扫描结果(结果索引在首次查询时建立)"""
+        self.store.put(result)
+    
+    def _on_result_evicted(self, task_id: str):
+        """结果移出内存或被删除时, 清理按任务缓存的派生数据"""
+        self.indexes.pop(task_id, None)
+        self.trees.pop(task_id, None)
+        self.walks.pop(task_id, None)
+        progress = self.progress.get(task_id)
+        if progress is not None and progress.status in ("completed", "error"):
+            del self.progress[task_id]
+    
+    def get_index(self, task_id: str) -> Optional[ResultIndex]:
+        """获取结果索引(结果从存储重新加载后按需重建)"""
+        result = self.store.get(task_id)
+        if result is None:
+            return None
+        index = self.indexes.get(task_id)
+        if index is None or index.result is not result:
+            index = ResultIndex(result)
+            self.indexes[task_id] = index
+        return index
+    
+    def get_tree(self, task_id: str) -> Optional[DirectoryTree]:
+        """获取目录树汇总(首次访问时一次遍历结果构建, 之后复用)"""
+        result = self.store.get(task_id)
+        if result is None:
+            return None
+        tree = self.trees.get(task_id)
+        if tree is None or tree.table is not result.file_table:
+            tree = DirectoryTree.build(result)
+            self.trees[task_id] = tree
+        return tree
     
     def get_progress(self, task_id: str) -> Optional[ScanProgress]:
         """获取扫描进度"""
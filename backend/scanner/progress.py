@@ -0,0 +1,47 @@
+"""
+扫描进度采样 - 扫描线程每处理一个文件就回调一次进度, 按频率/文件数采样后再发布
+"""
+import time
+from typing import Callable, Optional
+
+from models.schemas import ScanProgress
+from config.settings import settings
+
+
+# 结束状态: 该事件必须送达, 之后关闭事件流
+TERMINAL_STATUSES = ("completed", "error", "cancelled")
+
+
+class ScanCancelled(Exception):
+    """扫描收到取消请求(在处理文件之间的进度回调中抛出, 中止扫描)"""
+
+
+class ProgressThrottle:
+    """扫描线程侧的进度采样: 状态变化和结束事件总是放行"""
+
+    def __init__(self, publish: Callable[[ScanProgress], None],
+                 rate_hz: Optional[float] = None, every_n: Optional[int] = None):
+        config = settings.progress
+        rate_hz = config.rate_hz if rate_hz is None else rate_hz
+        self.publish = publish
+        self.interval = 1.0 / rate_hz if rate_hz > 0 else 0.0
+        self.every_n = config.every_n if every_n is None else every_n
+        self._last_time = 0.0
+        self._last_count = 0
+        self._last_status: Optional[str] = None
+
+    def __call__(self, progress: ScanProgress):
+        now = time.monotonic()
+        due = (
+            progress.status in TERMINAL_STATUSES
+            or progress.status != self._last_status
+            or now - self._last_time >= self.interval
+            or (self.every_n > 0 and progress.processed_count - self._last_count >= self.every_n)
+        )
+        if not due:
+            return
+        self._last_time = now
+        self._last_count = progress.processed_count
+        self._last_status = progress.status
+        # 管线复用同一个进度对象, 发布时取快照
+        self.publish(progress.model_copy())
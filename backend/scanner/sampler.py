@@ -0,0 +1,106 @@
+"""
+分层抽样器 - 按文件类型 × 大小区间分层, 从遍历结果中抽取随机样本
+"""
+import bisect
+import random
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from models.schemas import FileInfo, FileType, StratumInfo
+from config.settings import settings
+
+
+Stratum = Tuple[str, int]  # (文件类型, 大小区间序号)
+
+
+class SampleFrame:
+    """抽样结果: 样本及其所在层的总体/样本规模"""
+
+    def __init__(self):
+        self.samples: List[FileInfo] = []
+        self.stratum_of: Dict[str, Stratum] = {}   # 样本路径 -> 层
+        self.population: Dict[Stratum, int] = {}
+        self.sampled: Dict[Stratum, int] = {}
+        self.unsampled = 0
+
+    @property
+    def population_size(self) -> int:
+        return sum(self.population.values())
+
+
+class StratifiedSampler:
+    """分层随机抽样(按比例分配, 每层保底)"""
+
+    def __init__(self, sample_rate: Optional[float] = None, seed: Optional[int] = None):
+        config = settings.sampling
+        self.sample_rate = sample_rate if sample_rate is not None else config.sample_rate
+        if not 0 < self.sample_rate <= 1:
+            raise ValueError(f"抽样比例须在(0, 1]之间: {self.sample_rate}")
+        self.min_per_stratum = config.min_per_stratum
+        self.max_samples = config.max_samples
+        self.size_buckets = sorted(config.size_buckets)
+        self.rng = random.Random(seed)
+
+    def sample(self, files: List[FileInfo]) -> SampleFrame:
+        """从遍历结果中抽样; 归档本身(嵌套或无法打开的归档)不参与抽样"""
+        frame = SampleFrame()
+        strata: Dict[Stratum, List[FileInfo]] = defaultdict(list)
+        for file_info in files:
+            if file_info.file_type == FileType.ARCHIVE:
+                frame.unsampled += 1
+                continue
+            strata[self.stratum(file_info)].append(file_info)
+
+        allocation = self._allocate({k: len(v) for k, v in strata.items()})
+        for key in sorted(strata):
+            members = strata[key]
+            chosen = self.rng.sample(members, allocation[key])
+            frame.population[key] = len(members)
+            frame.sampled[key] = len(chosen)
+            for file_info in chosen:
+                frame.stratum_of[file_info.path] = key
+            frame.samples.extend(chosen)
+        return frame
+
+    def stratum(self, file_info: FileInfo) -> Stratum:
+        return file_info.file_type.value, bisect.bisect_right(self.size_buckets, file_info.size)
+
+    def _allocate(self, sizes: Dict[Stratum, int]) -> Dict[Stratum, int]:
+        """按比例分配样本数; 超出总数上限时等比缩减(保底数不缩减)"""
+        floor = {k: min(n, self.min_per_stratum) for k, n in sizes.items()}
+        alloc = {k: min(n, max(floor[k], round(n * self.sample_rate))) for k, n in sizes.items()}
+
+        total = sum(alloc.values())
+        if total > self.max_samples:
+            extra = total - sum(floor.values())
+            budget = max(0, self.max_samples - sum(floor.values()))
+            scale = budget / extra if extra else 0
+            alloc = {k: floor[k] + int((alloc[k] - floor[k]) * scale) for k in alloc}
+        return alloc
+
+    def bucket_label(self, index: int) -> str:
+        """大小区间的可读标签"""
+        bounds = [0] + self.size_buckets
+        low = _format_size(bounds[index])
+        if index >= len(self.size_buckets):
+            return f">={low}"
+        return f"{low}-{_format_size(bounds[index + 1])}"
+
+    def strata_info(self, frame: SampleFrame) -> List[StratumInfo]:
+        return [
+            StratumInfo(
+                file_type=file_type,
+                size_bucket=self.bucket_label(bucket),
+                population=frame.population[(file_type, bucket)],
+                sampled=frame.sampled[(file_type, bucket)],
+            )
+            for file_type, bucket in sorted(frame.population)
+        ]
+
+
+def _format_size(size: int) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size}{unit}"
+        size //= 1024
+    return f"{size}GB"
@@ -0,0 +1,189 @@
+"""
+文件头嗅探器 - 只读取文件头/尾的少量字节, 识别真实容器类型、加密与截断
+
+在进入重量级解析器之前过滤掉加密或损坏的文件。
+"""
+import struct
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from config.settings import settings
+from .extractors.ole_reader import OleFileReader, OleFormatError, OLE2_MAGIC
+
+
+# 容器类型
+CONTAINER_ZIP = "zip"
+CONTAINER_OLE2 = "ole2"
+CONTAINER_PDF = "pdf"
+CONTAINER_IMAGE = "image"
+CONTAINER_UNKNOWN = "unknown"
+
+# 扩展名期望的容器类型
+EXPECTED_CONTAINERS = {
+    '.docx': CONTAINER_ZIP,
+    '.xlsx': CONTAINER_ZIP,
+    '.pptx': CONTAINER_ZIP,
+    '.zip': CONTAINER_ZIP,
+    '.doc': CONTAINER_OLE2,
+    '.xls': CONTAINER_OLE2,
+    '.ppt': CONTAINER_OLE2,
+    '.pdf': CONTAINER_PDF,
+    '.jpg': CONTAINER_IMAGE,
+    '.jpeg': CONTAINER_IMAGE,
+    '.png': CONTAINER_IMAGE,
+    '.gif': CONTAINER_IMAGE,
+    '.bmp': CONTAINER_IMAGE,
+}
+
+OFFICE_EXTENSIONS = ('.docx', '.xlsx', '.pptx', '.doc', '.xls', '.ppt')
+
+IMAGE_MAGICS = (b'\x89PNG\r\n\x1a\n', b'\xff\xd8\xff', b'GIF87a', b'GIF89a', b'BM')
+
+ZIP_LOCAL_HEADER = b'PK\x03\x04'
+ZIP_EMPTY_ARCHIVE = b'PK\x05\x06'
+ZIP_EOCD = b'PK\x05\x06'
+ZIP_EOCD_MAX_SEARCH = 22 + 65535  # EOCD(22字节) + 最长注释
+
+# BIFF 记录
+_BIFF_FILEPASS = 0x002F
+_BIFF_BOUNDSHEET = 0x0085
+
+
+class SniffResult:
+    """嗅探结果"""
+
+    __slots__ = ('container', 'is_encrypted', 'is_corrupted', 'reason')
+
+    def __init__(self, container: str = CONTAINER_UNKNOWN, is_encrypted: bool = False,
+                 is_corrupted: bool = False, reason: Optional[str] = None):
+        self.container = container
+        self.is_encrypted = is_encrypted
+        self.is_corrupted = is_corrupted
+        self.reason = reason
+
+
+class FileSniffer:
+    """文件头嗅探器"""
+
+    def __init__(self, head_bytes: Optional[int] = None, tail_bytes: Optional[int] = None):
+        self.head_bytes = head_bytes or settings.scanner.sniff_head_bytes
+        self.tail_bytes = tail_bytes or settings.scanner.sniff_tail_bytes
+
+    def sniff(self, file_path: Path, size: int) -> SniffResult:
+        """
+        嗅探文件
+
+        Args:
+            file_path: 文件路径
+            size: 文件大小(已通过stat获取)
+        """
+        ext = file_path.suffix.lower()
+        if ext not in EXPECTED_CONTAINERS:
+            # 纯文本等无魔数格式不做嗅探
+            return SniffResult()
+
+        with open(file_path, 'rb') as f:
+            return self.sniff_stream(f, ext, size)
+
+    def sniff_stream(self, f: BinaryIO, ext: str, size: int) -> SniffResult:
+        """
+        嗅探已打开的二进制流(磁盘文件或归档成员的内存缓冲区)
+
+        Args:
+            f: 可seek的二进制文件对象
+            ext: 小写扩展名
+            size: 流的总字节数
+        """
+        expected = EXPECTED_CONTAINERS.get(ext)
+        if expected is None:
+            return SniffResult()
+
+        if size == 0:
+            return SniffResult(is_corrupted=True, reason="空文件")
+
+        f.seek(0)
+        head = f.read(self.head_bytes)
+        container = self.detect_container(head)
+
+        # Office 文档允许 OOXML(ZIP) 与老版(OLE2) 互相错用扩展名, 按真实容器处理
+        office_swap = ext in OFFICE_EXTENSIONS and container in (CONTAINER_ZIP, CONTAINER_OLE2)
+        if container != expected and not office_swap:
+            return SniffResult(container=container, is_corrupted=True, reason="文件头与扩展名不符")
+
+        if container == CONTAINER_ZIP:
+            return self._sniff_zip(f, size)
+        if container == CONTAINER_OLE2:
+            return self._sniff_ole2(f)
+        if container == CONTAINER_PDF:
+            return self._sniff_pdf(f, head, size)
+        return SniffResult(container=container)
+
+    @staticmethod
+    def detect_container(head: bytes) -> str:
+        """根据文件头魔数识别容器类型"""
+        if head.startswith((ZIP_LOCAL_HEADER, ZIP_EMPTY_ARCHIVE)):
+            return CONTAINER_ZIP
+        if head.startswith(OLE2_MAGIC):
+            return CONTAINER_OLE2
+        # PDF 规范允许 %PDF 出现在前1024字节内
+        if b'%PDF-' in head[:1024]:
+            return CONTAINER_PDF
+        if head.startswith(IMAGE_MAGICS):
+            return CONTAINER_IMAGE
+        return CONTAINER_UNKNOWN
+
+    def _sniff_zip(self, f, size: int) -> SniffResult:
+        """ZIP/OOXML: 通过文件尾的中央目录结束记录判断是否被截断"""
+        search = min(size, ZIP_EOCD_MAX_SEARCH)
+        f.seek(size - search)
+        tail = f.read(search)
+        pos = tail.rfind(ZIP_EOCD)
+        if pos < 0 or pos + 22 > len(tail):
+            return SniffResult(container=CONTAINER_ZIP, is_corrupted=True, reason="ZIP归档被截断")
+
+        # 中央目录必须完整落在EOCD之前
+        cd_size, cd_offset = struct.unpack_from('<II', tail, pos + 12)
+        eocd_offset = size - search + pos
+        if cd_offset != 0xFFFFFFFF and cd_offset + cd_size > eocd_offset:
+            return SniffResult(container=CONTAINER_ZIP, is_corrupted=True, reason="ZIP中央目录损坏")
+        return SniffResult(container=CONTAINER_ZIP)
+
+    def _sniff_ole2(self, f) -> SniffResult:
+        """OLE2: 识别加密的OOXML(EncryptedPackage)及 .doc/.xls/.ppt 的加密标记"""
+        try:
+            ole = OleFileReader(f)
+            if ole.exists('EncryptedPackage') or ole.exists('EncryptedSummary'):
+                return SniffResult(container=CONTAINER_OLE2, is_encrypted=True, reason="文件已加密")
+
+            if ole.exists('WordDocument'):
+                fib = ole.open_stream('WordDocument', max_bytes=32)
+                if len(fib) >= 12 and struct.unpack_from('<H', fib, 0x0A)[0] & 0x0100:
+                    return SniffResult(container=CONTAINER_OLE2, is_encrypted=True, reason="文件已加密")
+            elif ole.exists('Workbook'):
+                if self._biff_has_filepass(ole.open_stream('Workbook', max_bytes=self.head_bytes)):
+                    return SniffResult(container=CONTAINER_OLE2, is_encrypted=True, reason="文件已加密")
+        except OleFormatError:
+            return SniffResult(container=CONTAINER_OLE2, is_corrupted=True, reason="OLE2复合文档损坏")
+        return SniffResult(container=CONTAINER_OLE2)
+
+    @staticmethod
+    def _biff_has_filepass(data: bytes) -> bool:
+        """FILEPASS 记录位于工作簿全局子流开头, BOUNDSHEET 之前"""
+        pos = 0
+        while pos + 4 <= len(data):
+            rtype, rlen = struct.unpack_from('<HH', data, pos)
+            if rtype == _BIFF_FILEPASS:
+                return True
+            if rtype == _BIFF_BOUNDSHEET:
+                return False
+            pos += 4 + rlen
+        return False
+
+    def _sniff_pdf(self, f, head: bytes, size: int) -> SniffResult:
+        """PDF: 在文件头(线性化PDF)和文件尾的trailer中查找 /Encrypt"""
+        search = min(size, self.tail_bytes)
+        f.seek(size - search)
+        tail = f.read(search)
+        # 仅打标记, 仍交给解析器: 只有所有者密码的PDF可以正常读取
+        encrypted = b'/Encrypt' in head or b'/Encrypt' in tail
+        return SniffResult(container=CONTAINER_PDF, is_encrypted=encrypted)
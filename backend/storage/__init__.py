@@ -0,0 +1,6 @@
+# Storage package
+from .result_store import ResultStore, encode_result, decode_result
+from .text_store import TextStore, iter_result_texts
+from .state_backend import StateBackend, create_state_backend
+
+__all__ = ['ResultStore', 'encode_result', 'decode_result', 'TextStore', 'iter_result_texts', 'StateBackend', 'create_state_backend']
@@ -0,0 +1,204 @@
+"""
+扫描结果存储 - 完成的扫描持久化到本地 SQLite, 内存中只保留最近使用的若干份
+
+- 每份结果存两段: 统计部分(ScanResult JSON, 不含文件清单) + 列式文件表(FileTable.dump)
+- 内存 LRU: 超出容量的结果只从内存移除, 再次访问时从 SQLite 惰性加载
+- 保留策略: 按数量 / 按天数清理最旧的结果
+- 结果移出内存或被删除时通知监听者, 以便清理按任务缓存的派生数据
+- 多进程共享同一个结果库时, 内存中的结果按写入时间校验版本, 被其他进程覆盖或删除后重新加载
+"""
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models.schemas import ScanResult
+from models.result_table import FileTable
+from config.settings import settings
+from utils.metrics import cache_lookup
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    task_id     TEXT PRIMARY KEY,
+    scan_path   TEXT NOT NULL,
+    scan_mode   TEXT NOT NULL,
+    scan_time   TEXT NOT NULL,
+    total_files INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    summary     BLOB NOT NULL,
+    file_table  BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_created ON results(created_at);
+"""
+
+
+def encode_result(result: ScanResult) -> Tuple[bytes, bytes]:
+    """编码为 (统计部分 JSON, 列式文件表), 用于持久化和跨进程传递"""
+    summary = result.model_dump_json(exclude={'files', 'ocr_files', 'review_files'}).encode('utf-8')
+    return summary, result.file_table.dump()
+
+
+def decode_result(summary: bytes, table: bytes) -> ScanResult:
+    return ScanResult.model_validate_json(summary).attach_table(FileTable.load(table))
+
+
+class ResultStore:
+    """SQLite 结果存储 + 内存 LRU"""
+
+    def __init__(self, db_path: Optional[str] = None, memory_results: Optional[int] = None,
+                 max_results: Optional[int] = None, max_age_days: Optional[float] = None):
+        config = settings.storage
+        self.db_path = db_path or config.db_path
+        self.memory_results = config.memory_results if memory_results is None else memory_results
+        self.max_results = config.max_results if max_results is None else max_results
+        self.max_age_days = config.max_age_days if max_age_days is None else max_age_days
+
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        # 扫描线程与事件循环线程共用同一连接, 由锁串行化
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._shared = self.db_path != ":memory:"
+        if self._shared:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        self._memory: "OrderedDict[str, ScanResult]" = OrderedDict()
+        self._versions: Dict[str, float] = {}  # task_id -> 内存中结果的写入时间
+        self._listeners: List[Callable[[str], None]] = []
+
+    def add_evict_listener(self, listener: Callable[[str], None]):
+        """注册监听者: 结果移出内存或被删除时以 task_id 调用"""
+        self._listeners.append(listener)
+
+    # ---- 读写 ----
+
+    def put(self, result: ScanResult):
+        """保存结果(同一 task_id 覆盖), 并放入内存"""
+        summary, table = (zlib.compress(part) for part in encode_result(result))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (result.task_id, result.scan_path, result.scan_mode, result.scan_time.isoformat(),
+                 result.total_files, now, now, summary, table),
+            )
+            self._conn.commit()
+            self._remember(result, now)
+        self.enforce_retention()
+
+    def get(self, task_id: str) -> Optional[ScanResult]:
+        """获取结果: 先查内存(共享结果库时校验版本), 否则从 SQLite 加载"""
+        with self._lock:
+            result = self._memory.get(task_id)
+            if result is not None and not self._shared:
+                self._memory.move_to_end(task_id)
+                cache_lookup('results', True)
+                return result
+            row = self._conn.execute(
+                "SELECT created_at FROM results WHERE task_id = ?", (task_id,)
+            ).fetchone()
+            if row is None:
+                if result is not None:
+                    self._forget(task_id)
+                return None
+            created_at = row[0]
+            if result is not None and self._versions.get(task_id) == created_at:
+                self._memory.move_to_end(task_id)
+                cache_lookup('results', True)
+                return result
+            row = self._conn.execute(
+                "SELECT summary, file_table FROM results WHERE task_id = ?", (task_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE task_id = ?", (time.time(), task_id))
+            self._conn.commit()
+        cache_lookup('results', False)
+
+        summary, table = row
+        result = decode_result(zlib.decompress(summary), zlib.decompress(table))
+        with self._lock:
+            # 加载期间可能已被其他线程放入
+            existing = self._memory.get(task_id)
+            if existing is not None and self._versions.get(task_id) == created_at:
+                return existing
+            self._remember(result, created_at)
+        return result
+
+    def __contains__(self, task_id: str) -> bool:
+        with self._lock:
+            if task_id in self._memory:
+                return True
+            return self._conn.execute(
+                "SELECT 1 FROM results WHERE task_id = ?", (task_id,)
+            ).fetchone() is not None
+
+    def delete(self, task_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM results WHERE task_id = ?", (task_id,))
+            self._conn.commit()
+            self._memory.pop(task_id, None)
+            self._versions.pop(task_id, None)
+        self._notify([task_id])
+
+    def list(self, limit: int = 50) -> List[dict]:
+        """最近的结果(不加载内容)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_id, scan_path, scan_mode, scan_time, total_files FROM results "
+                "ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        keys = ('task_id', 'scan_path', 'scan_mode', 'scan_time', 'total_files')
+        return [dict(zip(keys, row)) for row in rows]
+
+    # ---- 容量与保留 ----
+
+    def enforce_retention(self) -> List[str]:
+        """按数量和天数清理旧结果, 返回被删除的 task_id"""
+        with self._lock:
+            expired = []
+            if self.max_age_days > 0:
+                cutoff = time.time() - self.max_age_days * 86400
+                expired += [r[0] for r in self._conn.execute(
+                    "SELECT task_id FROM results WHERE created_at < ?", (cutoff,))]
+            if self.max_results > 0:
+                expired += [r[0] for r in self._conn.execute(
+                    "SELECT task_id FROM results ORDER BY created_at DESC LIMIT -1 OFFSET ?",
+                    (self.max_results,))]
+            expired = list(dict.fromkeys(expired))
+            if expired:
+                self._conn.executemany("DELETE FROM results WHERE task_id = ?", [(t,) for t in expired])
+                self._conn.commit()
+                for task_id in expired:
+                    self._memory.pop(task_id, None)
+                    self._versions.pop(task_id, None)
+        self._notify(expired)
+        return expired
+
+    def _remember(self, result: ScanResult, created_at: float):
+        """放入内存 LRU(调用方持有锁), 超出容量时移出最久未用的结果"""
+        self._memory[result.task_id] = result
+        self._memory.move_to_end(result.task_id)
+        self._versions[result.task_id] = created_at
+        evicted = []
+        while len(self._memory) > max(self.memory_results, 1):
+            task_id, _ = self._memory.popitem(last=False)
+            self._versions.pop(task_id, None)
+            evicted.append(task_id)
+        self._notify(evicted)
+
+    def _forget(self, task_id: str):
+        """其他进程已删除的结果移出内存(调用方持有锁)"""
+        self._memory.pop(task_id, None)
+        self._versions.pop(task_id, None)
+        self._notify([task_id])
+
+    def _notify(self, task_ids: List[str]):
+        for task_id in task_ids:
+            for listener in self._listeners:
+                listener(task_id)
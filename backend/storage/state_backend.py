@@ -0,0 +1,483 @@
+"""
+任务状态后端 - 扫描任务队列与进度快照, 让多个 API 进程和独立的扫描进程服务同一部署
+
+- StateBackend: 接口; 任务提交/按优先级领取/取消/结束, 进度事件发布/读取, 变更版本号与等待
+- MemoryStateBackend: 单进程(默认), 进程内字典 + 条件变量
+- SQLiteStateBackend: 多个进程共享同一个 SQLite 文件; 其他进程的提交通过
+  PRAGMA data_version 感知, 等待方按固定间隔轮询版本号(不读数据页, 开销可忽略)
+
+各进程的运行指标快照也保存在状态后端, /api/metrics 由任一 API 进程合并输出。
+
+完成的结果仍由 ResultStore 持久化, 各进程共享同一个结果库。
+"""
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
+
+from datetime import datetime
+
+from models.schemas import ScanJob, ScanProgress
+from config.settings import settings
+from utils.json_utils import dumps, loads
+
+
+# (事件编号, 进度); 编号在后端内单调递增, 用作 SSE 的事件 id
+ProgressEvent = Tuple[int, ScanProgress]
+
+class StateBackend(ABC):
+    """任务状态后端接口"""
+
+    def __init__(self, replay_size: Optional[int] = None, max_finished_tasks: Optional[int] = None):
+        self.replay_size = replay_size or settings.progress.replay_size
+        self.max_finished_tasks = (settings.state.max_finished_tasks
+                                   if max_finished_tasks is None else max_finished_tasks)
+        self.poll_interval = settings.state.poll_interval
+
+    # ---- 任务队列 ----
+
+    def submit(self, job: ScanJob):
+        """登记任务并放入队列, 同时发布排队中的进度(同一 task_id 再次提交时先清除之前的进度)"""
+        job.status = "queued"
+        self._enqueue(job)
+        self.publish(ScanProgress(task_id=job.task_id, status="queued", message="排队等待执行..."))
+
+    @abstractmethod
+    def _enqueue(self, job: ScanJob):
+        pass
+
+    @abstractmethod
+    def claim(self, worker: str) -> Optional[ScanJob]:
+        """领取优先级最高(同级最早提交)的排队任务并标记为执行中, 没有时返回 None"""
+
+    @abstractmethod
+    def finish(self, task_id: str, status: str, error: Optional[str] = None):
+        """标记任务结束, 超出保留数的旧任务连同进度一起清理"""
+
+    def cancel(self, task_id: str) -> Optional[ScanJob]:
+        """
+        取消任务: 排队中的任务直接结束; 执行中的任务记下取消请求, 由执行者在文件之间停止
+
+        Returns:
+            更新后的任务(已结束的任务原样返回), 任务不存在时返回 None
+        """
+        job, dequeued = self._request_cancel(task_id)
+        if dequeued:
+            self.publish(ScanProgress(task_id=task_id, status="cancelled", message="扫描已取消"))
+        return job
+
+    @abstractmethod
+    def _request_cancel(self, task_id: str) -> Tuple[Optional[ScanJob], bool]:
+        """原子地 排队中 -> 已取消 / 执行中 -> 标记取消请求, 返回 (任务, 是否从队列中取消)"""
+
+    @abstractmethod
+    def get_job(self, task_id: str) -> Optional[ScanJob]:
+        pass
+
+    @abstractmethod
+    def list_jobs(self, statuses: Optional[List[str]] = None, limit: int = 100) -> List[ScanJob]:
+        """按提交时间倒序列出任务"""
+
+    @abstractmethod
+    def queue_position(self, task_id: str) -> Optional[int]:
+        """排队中的任务前面还有几个任务, 不在排队中时返回 None"""
+
+    @abstractmethod
+    def job_counts(self) -> Dict[str, int]:
+        """按状态统计保留的任务数"""
+
+    # ---- 进度 ----
+
+    @abstractmethod
+    def publish(self, progress: ScanProgress) -> int:
+        """发布进度快照(可在任意线程/进程调用), 返回事件编号; 每个任务只保留最近 replay_size 个"""
+
+    @abstractmethod
+    def events(self, task_id: str, after_id: int = 0) -> List[ProgressEvent]:
+        """编号大于 after_id 的进度事件(按编号升序)"""
+
+    @abstractmethod
+    def latest(self, task_id: str) -> Optional[ProgressEvent]:
+        pass
+
+    # ---- 运行指标 ----
+
+    @abstractmethod
+    def put_metrics(self, process: str, snapshot: dict):
+        """保存进程的指标快照(同一进程覆盖); 不改变状态版本"""
+
+    @abstractmethod
+    def metrics_snapshots(self, max_age: float) -> List[Tuple[str, float, dict]]:
+        """max_age 秒内上报过的 (进程, 上报时间, 快照), 更早的快照一并清理"""
+
+    # ---- 变更通知 ----
+
+    @abstractmethod
+    def version(self) -> Hashable:
+        """状态版本: 任意进程提交任务/进度后改变"""
+
+    def wait(self, version: Hashable, timeout: float) -> Hashable:
+        """阻塞到版本变化或超时, 返回当前版本"""
+        deadline = time.monotonic() + timeout
+        current = self.version()
+        while current == version and time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            current = self.version()
+        return current
+
+
+class MemoryStateBackend(StateBackend):
+    """单进程状态后端"""
+
+    def __init__(self, replay_size: Optional[int] = None, max_finished_tasks: Optional[int] = None):
+        super().__init__(replay_size, max_finished_tasks)
+        self._cond = threading.Condition()
+        self._version = 0
+        self._last_id = 0
+        self._jobs: Dict[str, ScanJob] = {}
+        self._queue: List[Tuple[int, int, str]] = []  # 堆: (-优先级, 提交序号, task_id)
+        self._queued: Dict[str, Tuple[int, int]] = {}  # 排队中的任务 -> 堆中的有效条目
+        self._sequence = itertools.count()
+        self._finished: Deque[str] = deque()
+        self._events: Dict[str, Deque[ProgressEvent]] = {}
+        self._metrics: Dict[str, Tuple[float, dict]] = {}
+
+    def _changed(self):
+        """调用方持有锁"""
+        self._version += 1
+        self._cond.notify_all()
+
+    def _enqueue(self, job: ScanJob):
+        with self._cond:
+            self._jobs[job.task_id] = job
+            self._events.pop(job.task_id, None)
+            if job.task_id in self._finished:
+                self._finished.remove(job.task_id)
+            key = self._queued[job.task_id] = (-job.priority, next(self._sequence))
+            heapq.heappush(self._queue, (*key, job.task_id))
+            self._changed()
+
+    def claim(self, worker: str) -> Optional[ScanJob]:
+        with self._cond:
+            # 已取消/重新提交的任务在堆中留有旧条目, 领取时跳过
+            while self._queue:
+                priority, sequence, task_id = heapq.heappop(self._queue)
+                if self._queued.get(task_id) != (priority, sequence):
+                    continue
+                del self._queued[task_id]
+                job = self._jobs.get(task_id)
+                if job is not None:
+                    job.status = "running"
+                    job.worker = worker
+                    job.started_at = datetime.now()
+                    self._changed()
+                    return job.model_copy()
+            return None
+
+    def finish(self, task_id: str, status: str, error: Optional[str] = None):
+        with self._cond:
+            job = self._jobs.get(task_id)
+            if job is not None:
+                job.status = status
+                job.error = error
+                job.finished_at = datetime.now()
+            self._finished.append(task_id)
+            while len(self._finished) > self.max_finished_tasks:
+                expired = self._finished.popleft()
+                self._jobs.pop(expired, None)
+                self._events.pop(expired, None)
+            self._changed()
+
+    def _request_cancel(self, task_id: str) -> Tuple[Optional[ScanJob], bool]:
+        with self._cond:
+            job = self._jobs.get(task_id)
+            if job is None:
+                return None, False
+            queued = job.status == "queued"
+            if queued:
+                job.status = "cancelled"
+                job.finished_at = datetime.now()
+                self._queued.pop(task_id, None)
+                self._finished.append(task_id)
+            elif job.status == "running":
+                job.cancel_requested = True
+            self._changed()
+            return job.model_copy(), queued
+
+    def get_job(self, task_id: str) -> Optional[ScanJob]:
+        with self._cond:
+            job = self._jobs.get(task_id)
+            return job.model_copy() if job is not None else None
+
+    def list_jobs(self, statuses: Optional[List[str]] = None, limit: int = 100) -> List[ScanJob]:
+        with self._cond:
+            jobs = [j for j in self._jobs.values() if not statuses or j.status in statuses]
+        jobs.sort(key=lambda j: j.created_at, reverse=True)
+        return [j.model_copy() for j in jobs[:limit]]
+
+    def queue_position(self, task_id: str) -> Optional[int]:
+        with self._cond:
+            key = self._queued.get(task_id)
+            if key is None:
+                return None
+            return sum(1 for other in self._queued.values() if other < key)
+
+    def job_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        with self._cond:
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def put_metrics(self, process: str, snapshot: dict):
+        with self._cond:
+            self._metrics[process] = (time.time(), snapshot)
+
+    def metrics_snapshots(self, max_age: float) -> List[Tuple[str, float, dict]]:
+        cutoff = time.time() - max_age
+        with self._cond:
+            for process in [p for p, (updated, _) in self._metrics.items() if updated < cutoff]:
+                del self._metrics[process]
+            return [(process, updated, snapshot) for process, (updated, snapshot) in self._metrics.items()]
+
+    def publish(self, progress: ScanProgress) -> int:
+        with self._cond:
+            self._last_id += 1
+            events = self._events.get(progress.task_id)
+            if events is None:
+                events = self._events[progress.task_id] = deque(maxlen=self.replay_size)
+            events.append((self._last_id, progress))
+            self._changed()
+            return self._last_id
+
+    def events(self, task_id: str, after_id: int = 0) -> List[ProgressEvent]:
+        with self._cond:
+            return [e for e in self._events.get(task_id, ()) if e[0] > after_id]
+
+    def latest(self, task_id: str) -> Optional[ProgressEvent]:
+        with self._cond:
+            events = self._events.get(task_id)
+            return events[-1] if events else None
+
+    def version(self) -> Hashable:
+        return self._version
+
+    def wait(self, version: Hashable, timeout: float) -> Hashable:
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != version, timeout)
+            return self._version
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    task_id     TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    priority    INTEGER NOT NULL DEFAULT 0,
+    created_at  REAL NOT NULL,
+    finished_at REAL,
+    data        TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS progress (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    data    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_priority ON jobs(status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS idx_progress_task ON progress(task_id, id);
+CREATE TABLE IF NOT EXISTS metrics (
+    process    TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    data       BLOB NOT NULL
+);
+"""
+
+class SQLiteStateBackend(StateBackend):
+    """多进程共享的 SQLite 状态后端"""
+
+    def __init__(self, db_path: Optional[str] = None, replay_size: Optional[int] = None,
+                 max_finished_tasks: Optional[int] = None):
+        super().__init__(replay_size, max_finished_tasks)
+        self.db_path = db_path or settings.state.db_path
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        # 自动提交模式, 多语句操作显式开启写事务; 同一进程内各线程共用连接, 由锁串行化
+        self._conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        # data_version 只反映其他连接的提交, 本连接的提交另行计数
+        self._local_version = 0
+
+    def _write(self, statements: List[Tuple[str, tuple]]) -> List[sqlite3.Cursor]:
+        """在一个写事务中执行多条语句"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursors = [self._conn.execute(sql, params) for sql, params in statements]
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._local_version += 1
+            return cursors
+
+    def _enqueue(self, job: ScanJob):
+        self._write([
+            ("DELETE FROM progress WHERE task_id = ?", (job.task_id,)),
+            ("INSERT OR REPLACE INTO jobs (task_id, status, priority, created_at, finished_at, data) "
+             "VALUES (?, ?, ?, ?, NULL, ?)",
+             (job.task_id, job.status, job.priority, job.created_at.timestamp(), job.model_dump_json())),
+        ])
+
+    def claim(self, worker: str) -> Optional[ScanJob]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT data FROM jobs WHERE status = 'queued' ORDER BY priority DESC, created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                job = ScanJob.model_validate_json(row[0])
+                job.status = "running"
+                job.worker = worker
+                job.started_at = datetime.now()
+                self._conn.execute("UPDATE jobs SET status = ?, data = ? WHERE task_id = ?",
+                                   (job.status, job.model_dump_json(), job.task_id))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._local_version += 1
+            return job
+
+    def finish(self, task_id: str, status: str, error: Optional[str] = None):
+        with self._lock:
+            job = self.get_job(task_id)
+            if job is None:
+                return
+            job.status = status
+            job.error = error
+            job.finished_at = datetime.now()
+            expired = "(SELECT task_id FROM jobs WHERE finished_at IS NOT NULL ORDER BY finished_at DESC LIMIT -1 OFFSET ?)"
+            self._write([
+                ("UPDATE jobs SET status = ?, finished_at = ?, data = ? WHERE task_id = ?",
+                 (status, job.finished_at.timestamp(), job.model_dump_json(), task_id)),
+                (f"DELETE FROM progress WHERE task_id IN {expired}", (self.max_finished_tasks,)),
+                (f"DELETE FROM jobs WHERE task_id IN {expired}", (self.max_finished_tasks,)),
+            ])
+
+    def _request_cancel(self, task_id: str) -> Tuple[Optional[ScanJob], bool]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT data FROM jobs WHERE task_id = ?", (task_id,)).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None, False
+                job = ScanJob.model_validate_json(row[0])
+                queued = job.status == "queued"
+                if queued:
+                    job.status = "cancelled"
+                    job.finished_at = datetime.now()
+                elif job.status == "running":
+                    job.cancel_requested = True
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, data = ? WHERE task_id = ?",
+                    (job.status, job.finished_at.timestamp() if job.finished_at else None,
+                     job.model_dump_json(), task_id))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._local_version += 1
+            return job, queued
+
+    def get_job(self, task_id: str) -> Optional[ScanJob]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE task_id = ?", (task_id,)).fetchone()
+        return ScanJob.model_validate_json(row[0]) if row else None
+
+    def list_jobs(self, statuses: Optional[List[str]] = None, limit: int = 100) -> List[ScanJob]:
+        sql = "SELECT data FROM jobs"
+        params: tuple = ()
+        if statuses:
+            sql += f" WHERE status IN ({', '.join('?' * len(statuses))})"
+            params = tuple(statuses)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY created_at DESC LIMIT ?", (*params, limit)).fetchall()
+        return [ScanJob.model_validate_json(row[0]) for row in rows]
+
+    def queue_position(self, task_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT priority, created_at FROM jobs WHERE task_id = ? AND status = 'queued'", (task_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            priority, created_at = row
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND "
+                "(priority > ? OR (priority = ? AND created_at < ?))", (priority, priority, created_at)
+            ).fetchone()[0]
+
+    def job_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def put_metrics(self, process: str, snapshot: dict):
+        # 单语句自动提交; 不计入本地版本, 以免唤醒等待任务/进度的线程
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO metrics VALUES (?, ?, ?)",
+                               (process, time.time(), dumps(snapshot)))
+
+    def metrics_snapshots(self, max_age: float) -> List[Tuple[str, float, dict]]:
+        cutoff = time.time() - max_age
+        with self._lock:
+            self._conn.execute("DELETE FROM metrics WHERE updated_at < ?", (cutoff,))
+            rows = self._conn.execute("SELECT process, updated_at, data FROM metrics").fetchall()
+        return [(process, updated, loads(data)) for process, updated, data in rows]
+
+    def publish(self, progress: ScanProgress) -> int:
+        task_id = progress.task_id
+        inserted, _ = self._write([
+            ("INSERT INTO progress (task_id, data) VALUES (?, ?)", (task_id, progress.model_dump_json())),
+            ("DELETE FROM progress WHERE task_id = ? AND id <= "
+             "(SELECT id FROM progress WHERE task_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+             (task_id, task_id, self.replay_size)),
+        ])
+        return inserted.lastrowid
+
+    def events(self, task_id: str, after_id: int = 0) -> List[ProgressEvent]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, data FROM progress WHERE task_id = ? AND id > ? ORDER BY id", (task_id, after_id)
+            ).fetchall()
+        return [(event_id, ScanProgress.model_validate_json(data)) for event_id, data in rows]
+
+    def latest(self, task_id: str) -> Optional[ProgressEvent]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, data FROM progress WHERE task_id = ? ORDER BY id DESC LIMIT 1", (task_id,)
+            ).fetchone()
+        return (row[0], ScanProgress.model_validate_json(row[1])) if row else None
+
+    def version(self) -> Hashable:
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0], self._local_version
+
+
+def create_state_backend() -> StateBackend:
+    """按配置创建状态后端"""
+    kind = settings.state.backend
+    if kind == "memory":
+        return MemoryStateBackend()
+    if kind == "sqlite":
+        return SQLiteStateBackend()
+    raise ValueError(f"不支持的状态后端: {kind}")
@@ -0,0 +1,128 @@
+"""
+提取文本库 - 按内容哈希存储扫描时解析出的文本, 下游入库任务直接读取, 不再重复解析
+
+- 键为文件内容哈希(与重复检测相同), 相同内容只存一份; 已存在的条目不再写入
+- 每条记录为 JSON: {"unit": "page"/"slide"/null, "segments": [...]},
+  PDF 按页、PPT 按幻灯片分段(含空页, 下标即页码), 其他格式为单段全文
+- 压缩使用 zstd(可选依赖 zstandard), 未安装时回退 zlib; 读取时按帧头识别, 两种格式可混存
+- 目录按哈希前两位分片, 写入先写临时文件再原子替换, 多进程并发写同一条目是安全的
+"""
+import os
+import re
+import tempfile
+import zlib
+from typing import Any, Dict, Iterator, Optional
+
+from models.schemas import ScanResult
+from config.settings import settings
+from utils.json_utils import dumps, loads
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# 合法的内容哈希(十六进制), 也防止外部传入的哈希拼出库目录以外的路径
+_HASH_RE = re.compile(r'[0-9a-f]{8,128}')
+
+
+class TextStore:
+    """内容寻址的压缩文本库"""
+
+    def __init__(self, directory: Optional[str] = None, compression_level: Optional[int] = None):
+        config = settings.text_store
+        self.directory = directory or config.directory
+        self.compression_level = config.compression_level if compression_level is None else compression_level
+
+    def _path(self, file_hash: str) -> str:
+        return os.path.join(self.directory, file_hash[:2], file_hash)
+
+    # ---- 读写 ----
+
+    def put(self, file_hash: str, text: str) -> bool:
+        """
+        保存文本(带 segments/unit 属性的分段文本按段保存), 返回是否新写入
+
+        同一哈希已存在时直接跳过。
+        """
+        if not text or not _HASH_RE.fullmatch(file_hash or ''):
+            return False
+        path = self._path(file_hash)
+        if os.path.exists(path):
+            return False
+
+        segments = getattr(text, 'segments', None)
+        record = {
+            'unit': getattr(text, 'unit', None) if segments is not None else None,
+            'segments': segments if segments is not None else [str(text)],
+        }
+        data = self._compress(dumps(record))
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return True
+
+    def get(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """读取记录 {"unit", "segments"}, 不存在时返回 None"""
+        data = self.get_raw(file_hash)
+        if data is None:
+            return None
+        return loads(self._decompress(data))
+
+    def get_raw(self, file_hash: str) -> Optional[bytes]:
+        """读取压缩后的记录原文"""
+        if not _HASH_RE.fullmatch(file_hash or ''):
+            return None
+        try:
+            with open(self._path(file_hash), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def __contains__(self, file_hash: str) -> bool:
+        return bool(_HASH_RE.fullmatch(file_hash or '')) and os.path.exists(self._path(file_hash))
+
+    # ---- 压缩 ----
+
+    def _compress(self, data: bytes) -> bytes:
+        if zstandard is not None:
+            return zstandard.ZstdCompressor(level=self.compression_level).compress(data)
+        return zlib.compress(data, min(max(self.compression_level, 1), 9))
+
+    @staticmethod
+    def _decompress(data: bytes) -> bytes:
+        if data[:4] == _ZSTD_MAGIC:
+            if zstandard is None:
+                raise RuntimeError("读取 zstd 压缩的文本需要安装 zstandard")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+
+def iter_result_texts(result: ScanResult, store: TextStore, unique: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    按扫描顺序逐个输出结果中文件的文本记录 {"path", "file_hash", "unit", "segments"}
+
+    Args:
+        unique: 相同内容只输出一次(取第一个路径)
+    """
+    table = result.file_table
+    seen = set()
+    for path, file_hash in zip(table.values('path'), table.values('file_hash')):
+        if not file_hash or (unique and file_hash in seen):
+            continue
+        seen.add(file_hash)
+        record = store.get(file_hash)
+        if record is None:
+            continue
+        yield {'path': path, 'file_hash': file_hash, **record}
@@ -0,0 +1,74 @@
+"""
+测试公共配置 - 将 backend 目录加入导入路径, 结果库/状态后端使用内存, 并提供构造小型 OLE2 文件的工具
+"""
+import math
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# 导入 api.routes 时创建的全局结果库/状态后端不落盘, 也不启动扫描子进程
+os.environ.setdefault("DOC_HEALTH_RESULTS_DB", ":memory:")
+os.environ.setdefault("DOC_HEALTH_STATE_BACKEND", "memory")
+os.environ.setdefault("DOC_HEALTH_LOCAL_WORKERS", "0")
+
+from scanner.extractors.ole_reader import (  # noqa: E402
+    OLE2_MAGIC, ENDOFCHAIN, FATSECT, FREESECT, NOSTREAM, STGTY_ROOT, STGTY_STREAM,
+)
+
+
+SECTOR_SIZE = 512
+
+
+def _dir_entry(name: str, entry_type: int, right: int = NOSTREAM, child: int = NOSTREAM,
+               start: int = ENDOFCHAIN, size: int = 0) -> bytes:
+    raw_name = (name + '\0').encode('utf-16-le')
+    entry = bytearray(128)
+    entry[:len(raw_name)] = raw_name
+    struct.pack_into('<HBB', entry, 0x40, len(raw_name), entry_type, 1)
+    struct.pack_into('<III', entry, 0x44, NOSTREAM, right, child)
+    struct.pack_into('<III', entry, 0x74, start, size, 0)
+    return bytes(entry)
+
+
+def build_ole(streams: Dict[str, bytes]) -> bytes:
+    """
+    构造只含根存储下若干流的最小 OLE2 文件
+
+    扇区布局: 0=FAT, 之后依次为目录扇区和各流的数据扇区。
+    迷你流阈值设为0, 所有流都走常规扇区链。
+    """
+    names = list(streams)
+    dir_sectors = math.ceil((len(names) + 1) / 4)
+    fat = [FATSECT]
+    fat += [i + 2 for i in range(dir_sectors - 1)] + [ENDOFCHAIN]
+
+    entries = [_dir_entry('Root Entry', STGTY_ROOT, child=1 if names else NOSTREAM)]
+    payload = b''
+    for i, name in enumerate(names):
+        data = streams[name]
+        sectors = math.ceil(len(data) / SECTOR_SIZE)
+        start = len(fat) if sectors else ENDOFCHAIN
+        fat += [len(fat) + j + 1 for j in range(sectors - 1)] + ([ENDOFCHAIN] if sectors else [])
+        right = i + 2 if i + 1 < len(names) else NOSTREAM
+        entries.append(_dir_entry(name, STGTY_STREAM, right=right, start=start, size=len(data)))
+        payload += data.ljust(sectors * SECTOR_SIZE, b'\0')
+    assert len(fat) <= SECTOR_SIZE // 4, "测试文件过大, 超出单个FAT扇区"
+    fat += [FREESECT] * (SECTOR_SIZE // 4 - len(fat))
+    directory = b''.join(entries).ljust(dir_sectors * SECTOR_SIZE, b'\0')
+
+    header = bytearray(SECTOR_SIZE)
+    header[:8] = OLE2_MAGIC
+    struct.pack_into('<HHHHH', header, 0x18, 0x3E, 3, 0xFFFE, 9, 6)
+    struct.pack_into('<IIIIIIIII', header, 0x28,
+                     0, 1, 1, 0, 0, ENDOFCHAIN, 0, ENDOFCHAIN, 0)
+    struct.pack_into('<109I', header, 0x4C, 0, *([FREESECT] * 108))
+    return bytes(header) + struct.pack(f'<{len(fat)}I', *fat) + directory + payload
+
+
+def biff_record(rtype: int, body: bytes = b'') -> bytes:
+    """构造一条 BIFF 记录"""
+    return struct.pack('<HH', rtype, len(body)) + body
@@ -0,0 +1,115 @@
+"""ZIP 归档成员读取"""
+import io
+import zipfile
+
+import pytest
+
+from scanner.archive_reader import ARCHIVE_SEPARATOR, ArchiveReader
+
+
+def _zip(members: dict) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def reader():
+    return ArchiveReader(['.txt', '.md'])
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    inner = _zip({'b.md': b'# inner', 'deep.zip': _zip({'c.txt': b'deepest'})})
+    path = tmp_path / 'bundle.zip'
+    path.write_bytes(_zip({
+        'docs/a.txt': b'hello',
+        'docs/.hidden.txt': b'skip',
+        '__MACOSX/docs/a.txt': b'skip',
+        'image.bin': b'\0' * 10,
+        'inner.zip': inner,
+    }))
+    return path
+
+
+def _by_path(members):
+    return {m.virtual_path: m for m in members}
+
+
+def test_iter_members_reads_nested(reader, bundle):
+    members = _by_path(reader.iter_members(bundle))
+    top = f"{bundle}{ARCHIVE_SEPARATOR}"
+    inner = f"{top}inner.zip{ARCHIVE_SEPARATOR}"
+    assert set(members) == {f"{top}docs/a.txt", f"{inner}b.md", f"{inner}deep.zip"}
+    assert members[f"{top}docs/a.txt"].data == b'hello'
+    assert members[f"{top}docs/a.txt"].extension == '.txt'
+    assert members[f"{inner}b.md"].data == b'# inner'
+    assert members[f"{inner}b.md"].archive_path == f"{top}inner.zip"
+    # 默认最大嵌套2层, 第三层归档只记录错误
+    deep = members[f"{inner}deep.zip"]
+    assert deep.is_archive and deep.data is None and deep.error
+
+
+def test_max_depth_allows_deeper(reader, bundle, monkeypatch):
+    monkeypatch.setattr(reader.config, 'max_depth', 3)
+    paths = {m.virtual_path for m in reader.iter_members(bundle)}
+    assert any(p.endswith(f"deep.zip{ARCHIVE_SEPARATOR}c.txt") for p in paths)
+
+
+def test_only_filters_top_level(reader, bundle):
+    members = list(reader.iter_members(bundle, only={'docs/a.txt'}))
+    assert [m.name for m in members] == ['a.txt']
+
+
+def test_member_size_limit(reader, tmp_path, monkeypatch):
+    monkeypatch.setattr(reader.config, 'max_member_bytes', 4)
+    path = tmp_path / 'big.zip'
+    path.write_bytes(_zip({'a.txt': b'0123456789', 'b.txt': b'ok'}))
+    members = _by_path(reader.iter_members(path))
+    big = members[f"{path}{ARCHIVE_SEPARATOR}a.txt"]
+    assert big.data is None and big.error == "超出归档解压大小限制"
+    assert members[f"{path}{ARCHIVE_SEPARATOR}b.txt"].data == b'ok'
+
+
+def test_total_budget_shared_with_nested(reader, tmp_path, monkeypatch):
+    monkeypatch.setattr(reader.config, 'max_members', 2)
+    path = tmp_path / 'many.zip'
+    path.write_bytes(_zip({'a.txt': b'1', 'inner.zip': _zip({'b.txt': b'2', 'c.txt': b'3'})}))
+    assert [m.name for m in reader.iter_members(path)] == ['a.txt']
+
+
+def test_corrupt_nested_archive(reader, tmp_path):
+    path = tmp_path / 'bad.zip'
+    path.write_bytes(_zip({'inner.zip': b'not a zip'}))
+    (member,) = reader.iter_members(path)
+    assert member.is_archive and member.error == "嵌套归档损坏"
+
+
+def test_encrypted_member_flagged(reader, tmp_path):
+    data = bytearray(_zip({'secret.txt': b'x'}))
+    # 同时置位本地文件头和中央目录中的加密标志
+    for sig in (b'PK\x03\x04', b'PK\x01\x02'):
+        pos = data.find(sig)
+        flag_offset = pos + (6 if sig == b'PK\x03\x04' else 8)
+        data[flag_offset] |= 0x01
+    path = tmp_path / 'enc.zip'
+    path.write_bytes(bytes(data))
+    (member,) = reader.iter_members(path)
+    assert member.is_encrypted and member.data is None and member.error == "归档成员已加密"
+
+
+def test_list_members_does_not_read(reader, bundle):
+    members = _by_path(reader.list_members(bundle))
+    top = f"{bundle}{ARCHIVE_SEPARATOR}"
+    assert set(members) == {f"{top}docs/a.txt", f"{top}inner.zip"}
+    assert members[f"{top}inner.zip"].is_archive
+    assert all(m.data is None for m in members.values())
+
+
+def test_bad_top_level_archive(reader, tmp_path):
+    path = tmp_path / 'broken.zip'
+    path.write_bytes(b'PK\x03\x04garbage')
+    with pytest.raises(zipfile.BadZipFile):
+        list(reader.iter_members(path))
@@ -0,0 +1,57 @@
+"""文件夹扫描器: 归档成员之间的进度回调"""
+import io
+import zipfile
+
+import pytest
+
+from scanner.file_scanner import FileScanner
+from scanner.progress import ScanCancelled
+
+
+def _zip(members: dict) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / 'a.txt').write_text('plain')
+    inner = _zip({'c.txt': 'c', 'd.txt': 'd'})
+    (tmp_path / 'bundle.zip').write_bytes(_zip({'b.txt': 'b', 'inner.zip': inner}))
+    return tmp_path
+
+
+def test_archive_members_report_progress(tree):
+    calls = []
+    sources = list(FileScanner().iter_sources(str(tree), lambda *args: calls.append(args)))
+    assert len(sources) == 4
+    member_calls = [c for c in calls if '!/' in c[0]]
+    # 每个成员(含嵌套归档成员)各回调一次, 计数沿用顶层归档的序号
+    assert len(member_calls) == 3
+    top = next(c for c in calls if c[0].endswith('bundle.zip'))
+    assert all(c[1:] == top[1:] for c in member_calls)
+
+
+def test_cancel_between_archive_members(tree):
+    seen = []
+
+    def on_file(path, processed, total):
+        if path.endswith('c.txt'):
+            raise ScanCancelled()
+
+    with pytest.raises(ScanCancelled):
+        for file_info, _ in FileScanner().iter_sources(str(tree), on_file):
+            seen.append(file_info.name)
+    assert 'c.txt' not in seen and 'd.txt' not in seen
+
+
+def test_walk_sources_report_member_progress(tree):
+    scanner = FileScanner()
+    walked = list(scanner.walk(str(tree)))
+    calls = []
+    list(scanner.iter_walk_sources(walked, lambda *args: calls.append(args)))
+    assert sum('!/' in c[0] for c in calls) == 3
+    assert max(c[1] for c in calls) == 2
@@ -0,0 +1,253 @@
+"""扫描任务执行器: 优先级、取消、子进程丢失后重新排队、启动失败重试
+
+子进程用同进程内的线程代替(同样通过 Pipe 通信并执行 _execute), 不实际 spawn。
+"""
+import multiprocessing
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from models.schemas import ScanJob
+from scanner import job_runner as job_runner_module
+from scanner.job_runner import JobRunner, _execute
+from scanner.pipeline import ScanPipeline
+from storage import ResultStore
+from storage.state_backend import MemoryStateBackend
+
+
+class ThreadWorker:
+    """在线程中执行任务的子进程替身; gate(job, cancel) 在任务开始前调用"""
+
+    def __init__(self, gate=None):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.cancel = threading.Event()
+        self.thread = threading.Thread(target=self._main, args=(child_conn, gate), daemon=True)
+        self.thread.start()
+
+    def _main(self, conn, gate):
+        pipeline = ScanPipeline(store=ResultStore(":memory:", memory_results=1, max_results=1))
+        while True:
+            try:
+                job_json, payload = conn.recv()
+            except (EOFError, OSError):
+                return
+            job = ScanJob.model_validate_json(job_json)
+            if gate is not None:
+                gate(job, self.cancel)
+            conn.send(_execute(pipeline, job, payload, self.cancel, conn))
+
+    def alive(self) -> bool:
+        return self.thread.is_alive()
+
+    def stop(self):
+        self.conn.close()
+        self.thread.join(5)
+
+
+class LostWorker:
+    """管道已关闭、任务交付时即发现已退出的子进程"""
+
+    def __init__(self):
+        self.conn, child_conn = multiprocessing.Pipe()
+        child_conn.close()
+        self.conn.close()
+        self.cancel = threading.Event()
+
+    def alive(self) -> bool:
+        return False
+
+    def stop(self):
+        pass
+
+
+def wait_for(predicate, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return
+        time.sleep(0.02)
+    raise AssertionError("等待超时")
+
+
+def wait_until_cancelled(job, cancel):
+    cancel.wait(10)
+
+
+@pytest.fixture
+def scan_dir(tmp_path):
+    (tmp_path / 'a.txt').write_text('hello world\n' * 10, encoding='utf-8')
+    (tmp_path / 'b.md').write_text('# title\n\nbody', encoding='utf-8')
+    return tmp_path
+
+
+@pytest.fixture
+def backend():
+    return MemoryStateBackend()
+
+
+@pytest.fixture
+def make_runner(backend, monkeypatch):
+    runners = []
+    monkeypatch.setattr(job_runner_module, "RETRY_SECONDS", 0.01)
+
+    def make(spawn, state=None):
+        runner = JobRunner(state or backend, ResultStore(":memory:"), 1, name="test")
+        monkeypatch.setattr(runner, "_spawn", spawn)
+        runners.append(runner)
+        return runner
+
+    yield make
+    for runner in runners:
+        runner.stop(10)
+
+
+def _status(backend, task_id):
+    job = backend.get_job(task_id)
+    return job.status if job else None
+
+
+def test_claim_order_by_priority_then_submit_time(backend, scan_dir):
+    for task_id, priority in [("low", 0), ("high", 5), ("mid", 1), ("high2", 5)]:
+        backend.submit(ScanJob(task_id=task_id, path=str(scan_dir), priority=priority))
+    assert [backend.queue_position(t) for t in ("high", "high2", "mid", "low")] == [0, 1, 2, 3]
+    claimed = [backend.claim("w").task_id for _ in range(4)]
+    assert claimed == ["high", "high2", "mid", "low"]
+    assert backend.claim("w") is None
+    assert backend.queue_position("low") is None
+
+
+def test_runner_executes_in_priority_order(backend, make_runner, scan_dir):
+    order = []
+    runner = make_runner(lambda: ThreadWorker(lambda job, cancel: order.append(job.task_id)))
+    for task_id, priority in [("first", 0), ("urgent", 9), ("second", 0)]:
+        backend.submit(ScanJob(task_id=task_id, path=str(scan_dir), priority=priority))
+    runner.start()
+    wait_for(lambda: all(_status(backend, t) == "completed" for t in order) and len(order) == 3)
+    assert order == ["urgent", "first", "second"]
+    result = runner.store.get("urgent")
+    assert result is not None and result.total_files == 2
+    assert backend.latest("urgent")[1].status == "completed"
+
+
+def test_cancel_queued_job_never_runs(backend, make_runner, scan_dir):
+    order = []
+    backend.submit(ScanJob(task_id="dropped", path=str(scan_dir)))
+    job = backend.cancel("dropped")
+    assert job.status == "cancelled"
+    assert backend.latest("dropped")[1].status == "cancelled"
+
+    runner = make_runner(lambda: ThreadWorker(lambda job, cancel: order.append(job.task_id)))
+    backend.submit(ScanJob(task_id="kept", path=str(scan_dir)))
+    runner.start()
+    wait_for(lambda: _status(backend, "kept") == "completed")
+    assert order == ["kept"]
+    assert _status(backend, "dropped") == "cancelled"
+
+
+def test_cancel_running_job(backend, make_runner, scan_dir):
+    runner = make_runner(lambda: ThreadWorker(wait_until_cancelled))
+    backend.submit(ScanJob(task_id="t1", path=str(scan_dir)))
+    runner.start()
+    wait_for(lambda: _status(backend, "t1") == "running")
+
+    job = backend.cancel("t1")
+    assert job.status == "running" and job.cancel_requested
+    wait_for(lambda: _status(backend, "t1") == "cancelled")
+    assert backend.latest("t1")[1].status == "cancelled"
+    assert backend.get_job("t1").error is None
+    assert runner.store.get("t1") is None
+    wait_for(lambda: runner.running[0] is None)
+
+
+def test_cancel_finished_job_is_noop(backend, make_runner, scan_dir):
+    runner = make_runner(lambda: ThreadWorker())
+    backend.submit(ScanJob(task_id="done", path=str(scan_dir)))
+    runner.start()
+    wait_for(lambda: _status(backend, "done") == "completed")
+    job = backend.cancel("done")
+    assert job.status == "completed" and not job.cancel_requested
+
+
+def test_requeue_when_worker_lost(backend, make_runner, scan_dir):
+    workers = iter([LostWorker(), ThreadWorker()])
+    spawned = []
+
+    def spawn():
+        worker = next(workers)
+        spawned.append(worker)
+        return worker
+
+    runner = make_runner(spawn)
+    backend.submit(ScanJob(task_id="t1", path=str(scan_dir), priority=3))
+    runner.start()
+    wait_for(lambda: _status(backend, "t1") == "completed")
+    assert len(spawned) == 2
+    job = backend.get_job("t1")
+    assert job.priority == 3 and job.error is None
+
+
+def test_spawn_failure_retries(backend, make_runner, scan_dir, monkeypatch):
+    attempts = []
+
+    def flaky_worker(context):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OSError("无法启动子进程")
+        return ThreadWorker()
+
+    monkeypatch.setattr(job_runner_module, "_WorkerProcess", flaky_worker)
+    runner = JobRunner(backend, ResultStore(":memory:"), 1, name="test")
+    backend.submit(ScanJob(task_id="t1", path=str(scan_dir)))
+    runner.start()
+    try:
+        wait_for(lambda: _status(backend, "t1") == "completed")
+    finally:
+        runner.stop(10)
+    assert len(attempts) == 3
+
+
+def test_worker_error_marks_job_failed(backend, make_runner, tmp_path):
+    runner = make_runner(lambda: ThreadWorker())
+    backend.submit(ScanJob(task_id="t1", path=str(tmp_path / "missing")))
+    runner.start()
+    wait_for(lambda: _status(backend, "t1") == "error")
+    assert backend.get_job("t1").error.startswith("扫描失败")
+    assert backend.latest("t1")[1].status == "error"
+
+
+def test_cancel_through_api(make_runner, scan_dir):
+    from api import routes
+
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api")
+    client = TestClient(app)
+    backend = routes.state_backend
+    runner = make_runner(lambda: ThreadWorker(wait_until_cancelled), state=backend)
+    runner.start()
+
+    task_id = client.post("/api/scan/start", json={"path": str(scan_dir)}).json()["task_id"]
+    wait_for(lambda: _status(backend, task_id) == "running")
+    response = client.delete(f"/api/scan/{task_id}")
+    assert response.status_code == 200
+    assert response.json() == {"task_id": task_id, "status": "cancelling"}
+    wait_for(lambda: _status(backend, task_id) == "cancelled")
+    assert client.get(f"/api/scan/status/{task_id}").json()["job"]["status"] == "cancelled"
+    assert client.delete(f"/api/scan/{task_id}").json()["status"] == "cancelled"
+    assert client.delete("/api/scan/unknown").status_code == 404
+
+
+def test_cancel_finished_job_through_api_conflicts(scan_dir):
+    from api import routes
+
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api")
+    client = TestClient(app)
+    backend = routes.state_backend
+    backend.submit(ScanJob(task_id="finished", path=str(scan_dir)))
+    backend.claim("test")
+    backend.finish("finished", "completed")
+    response = client.delete("/api/scan/finished")
+    assert response.status_code == 409
@@ -0,0 +1,108 @@
+"""老版Office(.doc/.xls) 解析"""
+import io
+import struct
+
+import pytest
+
+from conftest import biff_record, build_ole
+from models.schemas import FileInfo, FileType
+from scanner.extractors.legacy_extractor import (
+    LegacyOfficeExtractor, _BIFF_BOF, _BIFF_BOUNDSHEET, _BIFF_FILEPASS,
+    _BIFF_LABEL, _BIFF_LABELSST, _BIFF_NUMBER, _BIFF_RK, _BIFF_SST,
+)
+
+
+def _file_info(ext: str = '.xls') -> FileInfo:
+    return FileInfo(path=f'/tmp/t{ext}', name=f't{ext}', extension=ext, size=0, file_type=FileType.OTHER)
+
+
+def _sst_string(text: str) -> bytes:
+    return struct.pack('<HB', len(text), 0) + text.encode('latin-1')
+
+
+def _workbook(*records: bytes) -> bytes:
+    return build_ole({'Workbook': b''.join(records)})
+
+
+def test_parse_xls_cells():
+    sst = struct.pack('<II', 2, 2) + _sst_string('alpha') + _sst_string('beta')
+    data = _workbook(
+        biff_record(_BIFF_BOF, b'\0' * 16),
+        biff_record(_BIFF_BOUNDSHEET, b'\0' * 8),
+        biff_record(_BIFF_SST, sst),
+        biff_record(_BIFF_BOF, b'\0' * 16),
+        biff_record(_BIFF_LABELSST, struct.pack('<HHHI', 0, 0, 0, 1)),
+        biff_record(_BIFF_NUMBER, struct.pack('<HHHd', 0, 1, 0, 2.5)),
+        biff_record(_BIFF_RK, struct.pack('<HHHI', 1, 0, 0, (42 << 2) | 0x02)),
+        biff_record(_BIFF_LABEL, struct.pack('<HHHHB', 1, 1, 0, 2, 0) + b'hi'),
+    )
+    info = _file_info()
+    metrics, text = LegacyOfficeExtractor().extract_with_text(io.BytesIO(data), info)
+    assert info.parse_success
+    assert text == 'beta 2.5\n42 hi'
+    assert metrics.sheet_count == 1
+    assert metrics.paragraph_count == 4
+
+
+def test_xls_filepass_is_encrypted():
+    data = _workbook(biff_record(_BIFF_BOF, b'\0' * 16), biff_record(_BIFF_FILEPASS, b'\0' * 6))
+    info = _file_info()
+    _, text = LegacyOfficeExtractor().extract_with_text(io.BytesIO(data), info)
+    assert info.is_encrypted and not info.parse_success
+    assert text == ''
+
+
+def test_doc_encrypted_flag():
+    fib = bytearray(0x200)
+    struct.pack_into('<HxxxxxxxxH', fib, 0, 0xA5EC, 0x0100)
+    info = _file_info('.doc')
+    LegacyOfficeExtractor().extract_with_text(io.BytesIO(build_ole({'WordDocument': bytes(fib)})), info)
+    assert info.is_encrypted
+
+
+def test_truncated_ole_marked_corrupted():
+    data = _workbook(biff_record(_BIFF_BOF, b'\0' * 16))[:700]
+    info = _file_info()
+    LegacyOfficeExtractor().extract_with_text(io.BytesIO(data), info)
+    assert info.is_corrupted and not info.parse_success
+
+
+def test_unknown_ole_type_marked_corrupted():
+    info = _file_info()
+    LegacyOfficeExtractor().extract_with_text(io.BytesIO(build_ole({'Other': b'x'})), info)
+    assert info.is_corrupted
+
+
+@pytest.mark.parametrize('rk, expected', [
+    ((42 << 2) | 0x02, 42.0),
+    ((1234 << 2) | 0x03, 12.34),
+    (((-7) & 0x3FFFFFFF) << 2 | 0x02, -7.0),
+    (struct.unpack('<Q', struct.pack('<d', 1.5))[0] >> 32, 1.5),
+])
+def test_decode_rk(rk, expected):
+    assert LegacyOfficeExtractor._decode_rk(rk) == pytest.approx(expected)
+
+
+def test_read_xl_string():
+    read = LegacyOfficeExtractor._read_xl_string
+    assert read(struct.pack('<HB', 3, 0) + b'abc', 0, True) == 'abc'
+    assert read(struct.pack('<HB', 2, 1) + '中文'.encode('utf-16-le'), 0, True) == '中文'
+    assert read(struct.pack('<H', 3) + b'xyz', 0, False) == 'xyz'
+    assert read(b'\x01', 0, True) == ''
+
+
+def test_parse_sst_across_continue():
+    # 第二个字符串的字符数据跨 CONTINUE 记录, 续记录以新的选项字节开头(切换为双字节)
+    first = struct.pack('<II', 2, 2) + _sst_string('one') + struct.pack('<HB', 4, 0) + b'tw'
+    second = b'\x01' + 'o!'.encode('utf-16-le')
+    assert LegacyOfficeExtractor._parse_sst([first, second]) == ['one', 'two!']
+
+
+def test_parse_sst_truncated_keeps_complete_strings():
+    first = struct.pack('<II', 3, 3) + _sst_string('one') + struct.pack('<HB', 10, 0) + b'ab'
+    assert LegacyOfficeExtractor._parse_sst([first]) == ['one']
+
+
+def test_strip_fields_keeps_result():
+    text = 'see \x13 HYPERLINK "x" \x14link\x15 here'
+    assert LegacyOfficeExtractor._strip_fields(text) == 'see link here'
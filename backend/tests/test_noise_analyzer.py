@@ -0,0 +1,106 @@
+"""噪音检测: Aho-Corasick 多模式匹配与 Space-Saving 高频行统计"""
+import random
+from collections import Counter
+
+import pytest
+
+from scanner.analyzers.noise_analyzer import NoiseAnalyzer, PatternMatcher, SpaceSaving
+
+
+def test_matcher_overlapping_patterns():
+    matcher = PatternMatcher(['he', 'she', 'his', 'hers'])
+    assert matcher.patterns[matcher.search('ushers')] == 'she'
+    assert matcher.patterns[matcher.search('ahis')] == 'his'
+    # 'hers' 的前缀 'he' 先命中
+    assert matcher.patterns[matcher.search('xhers')] == 'he'
+    assert matcher.search('hxsx') is None
+
+
+def test_matcher_case_insensitive_and_cjk():
+    matcher = PatternMatcher(['Confidential', '机密文件', 'confidential'])
+    assert matcher.patterns == ['confidential', '机密文件']
+    assert matcher.search('STRICTLY CONFIDENTIAL') == 0
+    assert matcher.search('本页为机密文件, 请勿外传') == 1
+    assert matcher.search('机密 文件') is None
+
+
+def test_matcher_without_patterns():
+    assert PatternMatcher([]).search('anything') is None
+    assert PatternMatcher(['']).search('anything') is None
+
+
+def test_matcher_agrees_with_substring_search():
+    rng = random.Random(3)
+    patterns = [''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))) for _ in range(8)]
+    matcher = PatternMatcher(patterns)
+    for _ in range(500):
+        text = ''.join(rng.choice('abcdX') for _ in range(rng.randint(0, 12)))
+        hit = matcher.search(text)
+        assert (hit is not None) == any(p in text for p in patterns), text
+        if hit is not None:
+            assert matcher.patterns[hit] in text
+
+
+def test_space_saving_exact_under_capacity():
+    sketch = SpaceSaving(10)
+    for item in 'aababcabcd':
+        sketch.add(item)
+    assert sketch.top(10) == [('a', 4, 0), ('b', 3, 0), ('c', 2, 0), ('d', 1, 0)]
+    assert sketch.top(2, min_count=3) == [('a', 4, 0), ('b', 3, 0)]
+
+
+def test_space_saving_keeps_heavy_hitters():
+    rng = random.Random(5)
+    stream = ['hot1'] * 300 + ['hot2'] * 200 + [f'cold{rng.randint(0, 2000)}' for _ in range(1500)]
+    rng.shuffle(stream)
+    capacity = 20
+    sketch = SpaceSaving(capacity)
+    for item in stream:
+        sketch.add(item)
+
+    exact = Counter(stream)
+    assert len(sketch.counts) <= capacity
+    for item, count, error in sketch.top(capacity):
+        # 估计值不低于真实值, 且误差不超过上限
+        assert count - error <= exact[item] <= count
+    top = [item for item, _, _ in sketch.top(2)]
+    assert top == ['hot1', 'hot2']
+    # 保证计数达到阈值的只有真正的高频项
+    assert {item for item, _, _ in sketch.top(capacity, min_count=150)} == {'hot1', 'hot2'}
+
+
+def test_space_saving_merge():
+    a, b = SpaceSaving(3), SpaceSaving(3)
+    for item in 'xxxyyz':
+        a.add(item)
+    for item in 'xxwwq':
+        b.add(item)
+    a.merge(b)
+    assert len(a.counts) == 3
+    assert a.top(1) == [('x', 5, 0)]
+    for item, count, error in a.top(3):
+        assert count - error <= Counter('xxxyyzxxwwq')[item] <= count
+
+
+def test_space_saving_clear():
+    sketch = SpaceSaving(2)
+    sketch.add('a')
+    sketch.clear()
+    assert sketch.top(5) == []
+
+
+def test_noise_analyzer_repeated_and_pattern_lines():
+    analyzer = NoiseAnalyzer(patterns=['confidential'])
+    text = '\n'.join(['Header', 'body one', 'Header', 'CONFIDENTIAL draft', 'header', 'body two'])
+    result = analyzer.analyze_text(text)
+    assert result['line_count'] == 6
+    assert result['noise_line_count'] == 4
+    assert result['noise_ratio'] == pytest.approx(4 / 6)
+
+    for _ in range(2):
+        analyzer.analyze_text('header\nother')
+    stats = analyzer.result()
+    assert stats.pattern_hits == {'confidential': 1}
+    assert stats.docs_with_noise == 1
+    assert stats.repeated_lines[0].text == 'header'
+    assert stats.repeated_lines[0].doc_count == 3
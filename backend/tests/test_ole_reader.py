@@ -0,0 +1,59 @@
+"""OLE2 复合文档读取器"""
+import io
+
+import pytest
+
+from conftest import build_ole
+from scanner.extractors.ole_reader import OleFileReader, OleFormatError
+
+
+def test_list_and_open_streams():
+    big = bytes(range(256)) * 5
+    ole = OleFileReader(io.BytesIO(build_ole({'WordDocument': b'hello', 'Data': big})))
+    assert sorted(ole.list_streams()) == ['data', 'worddocument']
+    assert ole.exists('worddocument') and ole.exists('DATA')
+    assert not ole.exists('Workbook')
+    assert ole.open_stream('WordDocument') == b'hello'
+    assert ole.open_stream('Data') == big
+    assert ole.open_stream('Data', max_bytes=600) == big[:600]
+
+
+def test_missing_stream_raises_key_error():
+    ole = OleFileReader(io.BytesIO(build_ole({'Book': b'x'})))
+    with pytest.raises(KeyError):
+        ole.open_stream('Workbook')
+
+
+def test_short_header_rejected():
+    with pytest.raises(OleFormatError):
+        OleFileReader(io.BytesIO(build_ole({'Book': b'x'})[:300]))
+
+
+def test_bad_magic_rejected():
+    data = bytearray(build_ole({'Book': b'x'}))
+    data[:8] = b'PK\x03\x04\x00\x00\x00\x00'
+    with pytest.raises(OleFormatError):
+        OleFileReader(io.BytesIO(bytes(data)))
+
+
+def test_illegal_sector_size_rejected():
+    data = bytearray(build_ole({'Book': b'x'}))
+    data[0x1E] = 10
+    with pytest.raises(OleFormatError):
+        OleFileReader(io.BytesIO(bytes(data)))
+
+
+def test_truncated_body_raises_format_error():
+    # 文件头完整, 但FAT/目录扇区被截掉
+    ole = OleFileReader(io.BytesIO(build_ole({'Book': b'x'})[:512]))
+    with pytest.raises(OleFormatError):
+        ole.list_streams()
+
+
+def test_cyclic_chain_raises_format_error():
+    data = bytearray(build_ole({'Book': b'x' * 1024}))
+    # 流占扇区 2、3, 把 3 指回 2
+    data[512 + 3 * 4:512 + 4 * 4] = (2).to_bytes(4, 'little')
+    ole = OleFileReader(io.BytesIO(bytes(data)))
+    with pytest.raises(OleFormatError):
+        ole.open_stream('Book')
@@ -0,0 +1,39 @@
+"""扫描管线: 各模式的进度回调"""
+import pytest
+
+from scanner.pipeline import ScanPipeline
+from scanner.progress import ScanCancelled
+from storage import ResultStore
+
+
+@pytest.fixture
+def pipeline():
+    return ScanPipeline(store=ResultStore(":memory:"))
+
+
+@pytest.fixture
+def scan_dir(tmp_path):
+    for i in range(6):
+        (tmp_path / f"f{i}.txt").write_text(f"line {i}\n" * (i + 1), encoding="utf-8")
+    return tmp_path
+
+
+def test_sample_scan_reports_walk_progress(pipeline, scan_dir):
+    events = []
+    task_id = pipeline.start_sample_scan(
+        str(scan_dir), 0.5, 1, lambda p: events.append((p.status, p.message, p.processed_count, p.total_count)))
+    walk_events = [e for e in events if e[0] == "scanning" and e[1].startswith("正在处理")]
+    # 遍历阶段按文件回调(6个文件), 之后才解析样本
+    assert [e[2:] for e in walk_events[:6]] == [(i, 6) for i in range(1, 7)]
+    assert events[-1][0] == "completed"
+    assert pipeline.get_result(task_id).total_files == 6
+
+
+def test_sample_scan_cancel_during_walk(pipeline, scan_dir):
+    def on_progress(progress):
+        if progress.status == "scanning" and progress.processed_count == 2:
+            raise ScanCancelled()
+
+    with pytest.raises(ScanCancelled):
+        pipeline.start_sample_scan(str(scan_dir), 0.5, 1, on_progress, task_id="t1")
+    assert pipeline.get_result("t1") is None
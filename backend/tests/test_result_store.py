@@ -0,0 +1,112 @@
+"""结果存储: SQLite 持久化、内存 LRU 与保留策略"""
+import time
+from datetime import datetime
+
+import pytest
+
+from models.result_table import FileTable
+from models.schemas import DocumentMetrics, FileAnalysis, FileInfo, FileType, ScanResult
+from storage import ResultStore
+
+
+def _result(task_id: str, files: int = 3) -> ScanResult:
+    analyses = [
+        FileAnalysis(
+            file_info=FileInfo(path=f"/data/{task_id}/{i}.txt", name=f"{i}.txt", extension=".txt",
+                               size=100 + i, file_type=FileType.TXT),
+            metrics=DocumentMetrics(char_count=10 * i),
+            file_hash=f"h{i}",
+        )
+        for i in range(files)
+    ]
+    return ScanResult(
+        task_id=task_id, scan_path=f"/data/{task_id}", scan_time=datetime(2024, 1, 1),
+        duration_seconds=1.5, total_files=files, format_distribution={"txt": files},
+    ).attach_table(FileTable.from_analyses(analyses))
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "results.db")
+
+
+def test_file_table_persists_through_sqlite(db_path):
+    original = _result("t1")
+    ResultStore(db_path).put(original)
+    loaded = ResultStore(db_path).get("t1")
+    assert loaded is not original
+    assert loaded.model_dump(exclude={"files", "ocr_files", "review_files"}) == \
+        original.model_dump(exclude={"files", "ocr_files", "review_files"})
+    assert [r.model_dump() for r in loaded.file_table.iter_rows()] == \
+        [r.model_dump() for r in original.file_table.iter_rows()]
+
+
+def test_lru_evicts_past_capacity_and_reloads(db_path):
+    store = ResultStore(db_path, memory_results=2, max_results=0, max_age_days=0)
+    evicted = []
+    store.add_evict_listener(evicted.append)
+    results = {t: _result(t) for t in ("a", "b", "c")}
+    store.put(results["a"])
+    store.put(results["b"])
+    assert store.get("a") is results["a"]   # a 变为最近使用
+    store.put(results["c"])
+    assert evicted == ["b"]
+    assert list(store._memory) == ["a", "c"]
+
+    # 移出内存的结果从磁盘重新加载, 并挤出最久未用的 a
+    reloaded = store.get("b")
+    assert reloaded is not results["b"] and reloaded.total_files == 3
+    assert evicted == ["b", "a"]
+    assert "a" in store and store.get("a").task_id == "a"
+
+
+def test_retention_by_count(db_path):
+    store = ResultStore(db_path, memory_results=10, max_results=2, max_age_days=0)
+    purged = []
+    store.add_evict_listener(purged.append)
+    for task_id in ("a", "b", "c"):
+        store.put(_result(task_id))
+        time.sleep(0.01)
+    assert purged == ["a"]
+    assert store.get("a") is None and "a" not in store
+    assert [r["task_id"] for r in store.list()] == ["c", "b"]
+
+
+def test_retention_by_age(db_path):
+    store = ResultStore(db_path, memory_results=10, max_results=0, max_age_days=1)
+    store.put(_result("old"))
+    store.put(_result("new"))
+    # 把 old 的写入时间改到两天前
+    store._conn.execute("UPDATE results SET created_at = ? WHERE task_id = 'old'", (time.time() - 2 * 86400,))
+    store._conn.commit()
+    assert store.enforce_retention() == ["old"]
+    assert store.get("old") is None
+    assert store.get("new") is not None
+    assert ResultStore(db_path).list() == [
+        {"task_id": "new", "scan_path": "/data/new", "scan_mode": "deep",
+         "scan_time": "2024-01-01T00:00:00", "total_files": 3}]
+
+
+def test_shared_store_sees_other_process_changes(db_path):
+    first = ResultStore(db_path)
+    second = ResultStore(db_path)
+    first.put(_result("t1", files=3))
+    assert second.get("t1").total_files == 3
+
+    time.sleep(0.01)
+    first.put(_result("t1", files=5))
+    assert second.get("t1").total_files == 5
+
+    forgotten = []
+    second.add_evict_listener(forgotten.append)
+    first.delete("t1")
+    assert second.get("t1") is None
+    assert forgotten == ["t1"]
+
+
+def test_memory_store_does_not_touch_disk():
+    store = ResultStore(":memory:", memory_results=1, max_results=1)
+    store.put(_result("a"))
+    store.put(_result("b"))
+    assert store.get("a") is None
+    assert store.get("b").task_id == "b"
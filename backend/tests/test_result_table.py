@@ -0,0 +1,121 @@
+"""列式结果表的编码与持久化"""
+import json
+import struct
+from datetime import datetime
+
+import pytest
+
+from models.result_table import MISSING_STRING, FileTable, _DUMP_MAGIC
+from models.schemas import (
+    DocumentCategory, DocumentMetrics, FileAnalysis, FileInfo, FileTiming, FileType, PDFType,
+)
+
+
+def _analyses():
+    return [
+        FileAnalysis(
+            file_info=FileInfo(path='/data/报告.pdf', name='报告.pdf', extension='.pdf', size=2048,
+                               modified_time=datetime(2024, 5, 1, 12, 30), file_type=FileType.PDF,
+                               container='pdf', is_encrypted=True),
+            metrics=DocumentMetrics(char_count=1200, page_count=3, pdf_type=PDFType.MIXED,
+                                    text_density=400.5),
+            timing=FileTiming(extract_seconds=0.25, total_seconds=0.3),
+            file_hash='abc123',
+            quality_tag='Scan_PDF',
+            category=DocumentCategory.COMPLEX,
+            needs_ocr=True,
+        ),
+        FileAnalysis(
+            file_info=FileInfo(path='/data/a.txt', name='a.txt', extension='.txt', size=10,
+                               file_type=FileType.TXT, parse_success=False, parse_error='编码错误'),
+            metrics=DocumentMetrics(),
+        ),
+    ]
+
+
+def _split(blob: bytes):
+    offset = len(_DUMP_MAGIC)
+    (header_len,) = struct.unpack_from('<I', blob, offset)
+    offset += 4
+    header = json.loads(blob[offset:offset + header_len].decode('utf-8'))
+    return header, blob[offset + header_len:]
+
+
+def _join(header: dict, payload: bytes) -> bytes:
+    raw = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    return _DUMP_MAGIC + struct.pack('<I', len(raw)) + raw + payload
+
+
+def test_rows_round_trip_through_table():
+    analyses = _analyses()
+    table = FileTable.from_analyses(analyses)
+    assert len(table) == 2
+    for i, a in enumerate(analyses):
+        assert table.row(i).model_dump() == a.model_dump()
+        assert table.row_dict(i) == a.model_dump()
+
+
+def test_dump_load_round_trip():
+    analyses = _analyses()
+    loaded = FileTable.load(FileTable.from_analyses(analyses).dump())
+    assert len(loaded) == 2
+    assert [r.model_dump() for r in loaded.iter_rows()] == [a.model_dump() for a in analyses]
+    assert loaded.values('file_hash') == ['abc123', None]
+    assert loaded.flagged('needs_ocr') == [0]
+
+
+def test_code_compares_raw_columns():
+    table = FileTable.from_analyses(_analyses())
+    code = table.code('txt')
+    assert [i for i, v in enumerate(table.column('file_type')) if v == code] == [1]
+    assert table.code('never-seen') == MISSING_STRING
+
+
+def test_load_fills_missing_columns_with_defaults():
+    table = FileTable.from_analyses(_analyses())
+    header, payload = _split(table.dump())
+    # 模拟旧版本数据: 去掉一个数组列和它的数据
+    kept, parts, offset = [], [], 0
+    for desc in header['columns']:
+        nbytes = desc.get('nbytes', 0)
+        if desc['name'] not in ('total_seconds', 'needs_ocr'):
+            kept.append(desc)
+            parts.append(payload[offset:offset + nbytes])
+        offset += nbytes
+    header['columns'] = kept
+    loaded = FileTable.load(_join(header, b''.join(parts)))
+    assert loaded.values('total_seconds') == [0.0, 0.0]
+    assert loaded.values('needs_ocr') == [False, False]
+    assert loaded.values('extract_seconds') == [0.25, 0.0]
+
+
+def test_load_ignores_unknown_columns():
+    table = FileTable.from_analyses(_analyses())
+    header, payload = _split(table.dump())
+    header['columns'].insert(0, {'name': 'dropped_field', 'typecode': 'q', 'nbytes': 16})
+    loaded = FileTable.load(_join(header, b'\0' * 16 + payload))
+    assert loaded.row(0).model_dump() == _analyses()[0].model_dump()
+
+
+def test_load_swaps_foreign_byte_order():
+    table = FileTable.from_analyses(_analyses())
+    header, payload = _split(table.dump())
+    # 按另一字节序重写每个数组列
+    swapped = []
+    offset = 0
+    for desc in header['columns']:
+        if 'nbytes' not in desc:
+            continue
+        col = table.columns[desc['name']].data
+        chunk = type(col)(col.typecode, payload[offset:offset + desc['nbytes']])
+        chunk.byteswap()
+        swapped.append(chunk.tobytes())
+        offset += desc['nbytes']
+    header['byteorder'] = 'big' if header['byteorder'] == 'little' else 'little'
+    loaded = FileTable.load(_join(header, b''.join(swapped)))
+    assert [r.model_dump() for r in loaded.iter_rows()] == [a.model_dump() for a in _analyses()]
+
+
+def test_load_rejects_foreign_data():
+    with pytest.raises(ValueError):
+        FileTable.load(b'not a table')
@@ -0,0 +1,143 @@
+"""分层抽样与抽样外推"""
+import math
+import random
+import statistics
+
+import pytest
+
+from models.schemas import DocumentCategory, DocumentMetrics, FileAnalysis, FileInfo, FileType
+from scanner.analyzers.sample_estimator import SampleEstimator
+from scanner.analyzers.stats_analyzer import StatsAnalyzer
+from scanner.sampler import StratifiedSampler
+
+
+KB = 1024
+
+
+def _files(seed: int = 1):
+    rng = random.Random(seed)
+    files = []
+    spec = [(FileType.TXT, 400), (FileType.PDF, 150), (FileType.DOCX, 3), (FileType.MD, 40)]
+    for file_type, n in spec:
+        for i in range(n):
+            size = rng.choice([1 * KB, 100 * KB, 2 * KB * KB])
+            files.append(FileInfo(path=f"/data/{file_type.value}/{i}", name=f"{i}", extension=f".{file_type.value}",
+                                  size=size, file_type=file_type))
+    files.append(FileInfo(path="/data/broken.zip", name="broken.zip", extension=".zip", size=10,
+                          file_type=FileType.ARCHIVE, parse_success=False))
+    return files
+
+
+def _analyze(file_info: FileInfo) -> FileAnalysis:
+    rng = random.Random(file_info.path)
+    chars = rng.randint(0, 12000)
+    category = rng.choice(list(DocumentCategory))
+    metrics = DocumentMetrics(char_count=chars, table_count=rng.choice([0, 0, 2]),
+                              image_count=rng.choice([0, 1]), paragraph_count=chars // 100,
+                              heading_count=rng.choice([0, 3]))
+    info = file_info.model_copy(update={"parse_success": rng.random() > 0.1})
+    return FileAnalysis(file_info=info, metrics=metrics, category=category)
+
+
+def test_sampling_is_deterministic_for_seed():
+    files = _files()
+    first = [f.path for f in StratifiedSampler(0.1, seed=42).sample(files).samples]
+    second = [f.path for f in StratifiedSampler(0.1, seed=42).sample(files).samples]
+    other = [f.path for f in StratifiedSampler(0.1, seed=43).sample(files).samples]
+    assert first == second
+    assert first != other
+
+
+def test_every_stratum_sampled():
+    sampler = StratifiedSampler(0.01, seed=1)
+    frame = sampler.sample(_files())
+    assert frame.unsampled == 1
+    assert frame.population_size == 593
+    for key, population in frame.population.items():
+        expected = min(population, max(sampler.min_per_stratum, round(population * 0.01)))
+        assert frame.sampled[key] == expected >= 1
+    assert len(frame.samples) == sum(frame.sampled.values())
+    assert all(frame.stratum_of[f.path] == sampler.stratum(f) for f in frame.samples)
+    info = sampler.strata_info(frame)
+    assert sum(s.population for s in info) == 593
+    assert {s.size_bucket for s in info} <= {"0B-64KB", "64KB-1MB", "1MB-16MB"}
+
+
+def test_max_samples_keeps_stratum_floor(monkeypatch):
+    sampler = StratifiedSampler(1.0, seed=1)
+    monkeypatch.setattr(sampler, "max_samples", 60)
+    frame = sampler.sample(_files())
+    assert all(n >= min(frame.population[k], sampler.min_per_stratum) for k, n in frame.sampled.items())
+    assert len(frame.samples) <= max(60, sum(min(n, sampler.min_per_stratum) for n in frame.population.values()))
+
+
+@pytest.mark.parametrize("rate", [0, -0.1, 1.5])
+def test_invalid_sample_rate(rate):
+    with pytest.raises(ValueError):
+        StratifiedSampler(rate)
+
+
+def test_full_sample_reproduces_population():
+    files = _files()
+    frame = StratifiedSampler(1.0, seed=3).sample(files)
+    analyses = [_analyze(f) for f in frame.samples]
+    estimator = SampleEstimator(frame, analyses)
+    expected = StatsAnalyzer().analyze(analyses)
+
+    length = estimator.length_stats()
+    want = expected["length_stats"]
+    assert (length.min, length.max) == (want.min, want.max)
+    assert length.mean == pytest.approx(want.mean)
+    assert length.std == pytest.approx(want.std)
+    for field in ("under_500", "range_500_2000", "range_2000_5000", "range_5000_10000", "over_10000"):
+        assert getattr(length, field) == getattr(want, field)
+
+    structure = estimator.structure_stats()
+    exact = expected["structure_stats"]
+    for field in ("docs_with_tables", "docs_with_images", "docs_with_headings"):
+        assert getattr(structure, field) == getattr(exact, field)
+    for field in ("table_ratio", "image_ratio", "avg_tables_per_doc", "avg_paragraphs"):
+        assert getattr(structure, field) == pytest.approx(getattr(exact, field), abs=1e-4)
+
+    categories = estimator.category_stats()
+    assert categories.simple_count == sum(a.category == DocumentCategory.SIMPLE for a in analyses)
+    assert categories.complex_count == sum(a.category == DocumentCategory.COMPLEX for a in analyses)
+
+    # 全量抽样没有抽样误差, 所有区间宽度为0
+    for name, estimate in estimator.estimates.items():
+        assert estimate.lower == estimate.value == estimate.upper, name
+
+
+def test_partial_sample_extrapolates_with_intervals():
+    files = _files()
+    frame = StratifiedSampler(0.2, seed=5).sample(files)
+    analyses = [_analyze(f) for f in frame.samples]
+    estimator = SampleEstimator(frame, analyses)
+
+    # 常量指标: 总量等于总体规模, 区间宽度为0
+    value, variance = estimator.total(lambda a: 1.0)
+    assert value == pytest.approx(frame.population_size)
+    assert variance == pytest.approx(0.0)
+
+    # 分层估计 Σ N_h·ȳ_h
+    expected = 0.0
+    for key, N in frame.population.items():
+        ys = [a.metrics.char_count for a in analyses if frame.stratum_of[a.file_info.path] == key]
+        expected += N * statistics.fmean(ys)
+    value, variance = estimator.total(lambda a: a.metrics.char_count)
+    assert value == pytest.approx(expected)
+    assert variance > 0
+
+    estimator.length_stats()
+    estimator.structure_stats()
+    for name, estimate in estimator.estimates.items():
+        assert 0 <= estimate.lower <= estimate.value <= estimate.upper, name
+    ratio = estimator.estimates["structure_stats.table_ratio"]
+    assert ratio.upper <= 1.0 and ratio.upper > ratio.lower
+
+    # 真实总体值落在95%区间内(固定种子, 不依赖运气)
+    population = [_analyze(f) for f in files if f.file_type != FileType.ARCHIVE]
+    true_tables = sum(a.metrics.table_count > 0 for a in population)
+    interval = estimator.estimates["structure_stats.docs_with_tables"]
+    assert interval.lower <= true_tables <= interval.upper
+    assert not math.isclose(interval.lower, interval.upper)
@@ -0,0 +1,111 @@
+"""文件头嗅探器"""
+import io
+import struct
+import zipfile
+
+import pytest
+
+from conftest import biff_record, build_ole
+from scanner.sniffer import (
+    CONTAINER_IMAGE, CONTAINER_OLE2, CONTAINER_PDF, CONTAINER_UNKNOWN, CONTAINER_ZIP, FileSniffer,
+)
+
+
+def _sniff(data: bytes, ext: str):
+    return FileSniffer(head_bytes=4096, tail_bytes=1024).sniff_stream(io.BytesIO(data), ext, len(data))
+
+
+def _zip_bytes() -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        zf.writestr('word/document.xml', '<w:document/>')
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize('head, container', [
+    (b'PK\x03\x04rest', CONTAINER_ZIP),
+    (b'PK\x05\x06', CONTAINER_ZIP),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', CONTAINER_OLE2),
+    (b'\xef\xbb\xbfjunk\n%PDF-1.4', CONTAINER_PDF),
+    (b'\x89PNG\r\n\x1a\n', CONTAINER_IMAGE),
+    (b'hello', CONTAINER_UNKNOWN),
+])
+def test_detect_container(head, container):
+    assert FileSniffer.detect_container(head) == container
+
+
+def test_plain_pdf():
+    result = _sniff(b'%PDF-1.7\n1 0 obj<<>>endobj\ntrailer<</Root 1 0 R>>\n%%EOF', '.pdf')
+    assert result.container == CONTAINER_PDF
+    assert not result.is_encrypted and not result.is_corrupted
+
+
+def test_encrypted_pdf_trailer():
+    data = b'%PDF-1.7\n' + b'x' * 5000 + b'\ntrailer<</Root 1 0 R/Encrypt 5 0 R>>\n%%EOF'
+    assert _sniff(data, '.pdf').is_encrypted
+
+
+def test_encrypted_linearized_pdf_header():
+    data = b'%PDF-1.5\n1 0 obj<</Linearized 1/Encrypt 9 0 R>>endobj\n' + b'x' * 5000
+    assert _sniff(data, '.pdf').is_encrypted
+
+
+def test_empty_file_corrupted():
+    result = _sniff(b'', '.pdf')
+    assert result.is_corrupted and result.reason == "空文件"
+
+
+def test_extension_mismatch_corrupted():
+    result = _sniff(b'<html></html>', '.pdf')
+    assert result.is_corrupted and result.container == CONTAINER_UNKNOWN
+
+
+def test_text_extension_not_sniffed():
+    result = _sniff(b'anything', '.txt')
+    assert result.container == CONTAINER_UNKNOWN and not result.is_corrupted
+
+
+def test_zip_ok_and_truncated():
+    data = _zip_bytes()
+    assert not _sniff(data, '.docx').is_corrupted
+    truncated = _sniff(data[:-10], '.docx')
+    assert truncated.is_corrupted and truncated.reason == "ZIP归档被截断"
+
+
+def test_zip_central_directory_out_of_range():
+    data = bytearray(_zip_bytes())
+    eocd = data.rfind(b'PK\x05\x06')
+    struct.pack_into('<I', data, eocd + 16, eocd)  # 中央目录偏移越过EOCD
+    assert _sniff(bytes(data), '.zip').reason == "ZIP中央目录损坏"
+
+
+def test_office_container_swap_allowed():
+    # .doc 实为 OOXML, .docx 实为 OLE2, 都按真实容器处理
+    assert _sniff(_zip_bytes(), '.doc').container == CONTAINER_ZIP
+    result = _sniff(build_ole({'WordDocument': b'\0' * 32}), '.docx')
+    assert result.container == CONTAINER_OLE2 and not result.is_corrupted
+
+
+def test_encrypted_ooxml_package():
+    result = _sniff(build_ole({'EncryptionInfo': b'\0' * 8, 'EncryptedPackage': b'\0' * 64}), '.xlsx')
+    assert result.container == CONTAINER_OLE2 and result.is_encrypted
+
+
+def test_encrypted_doc_fib_flag():
+    fib = bytearray(32)
+    struct.pack_into('<H', fib, 0x0A, 0x0100)
+    assert _sniff(build_ole({'WordDocument': bytes(fib)}), '.doc').is_encrypted
+    assert not _sniff(build_ole({'WordDocument': b'\0' * 32}), '.doc').is_encrypted
+
+
+def test_encrypted_xls_filepass():
+    bof = biff_record(0x0809, b'\0' * 16)
+    encrypted = build_ole({'Workbook': bof + biff_record(0x002F, b'\0' * 6)})
+    plain = build_ole({'Workbook': bof + biff_record(0x0085, b'\0' * 8) + biff_record(0x002F)})
+    assert _sniff(encrypted, '.xls').is_encrypted
+    assert not _sniff(plain, '.xls').is_encrypted
+
+
+def test_truncated_ole_corrupted():
+    result = _sniff(build_ole({'WordDocument': b'\0' * 32})[:512], '.doc')
+    assert result.container == CONTAINER_OLE2 and result.is_corrupted
@@ -0,0 +1,143 @@
+"""SQLite 状态后端: 多个连接(进程)共享同一个数据库文件"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.schemas import ScanJob, ScanProgress
+from storage.state_backend import SQLiteStateBackend
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "state.db")
+
+
+@pytest.fixture
+def backend(db_path):
+    return SQLiteStateBackend(db_path, replay_size=3, max_finished_tasks=2)
+
+
+def _job(task_id: str, priority: int = 0, offset: float = 0.0) -> ScanJob:
+    created = datetime(2024, 1, 1) + timedelta(seconds=offset)
+    return ScanJob(task_id=task_id, path="/data", priority=priority, created_at=created)
+
+
+def test_claim_order_across_connections(backend, db_path):
+    other = SQLiteStateBackend(db_path)
+    backend.submit(_job("low", 0, 0))
+    other.submit(_job("high", 5, 1))
+    backend.submit(_job("mid", 1, 2))
+    other.submit(_job("high2", 5, 3))
+
+    assert [backend.queue_position(t) for t in ("high", "high2", "mid", "low")] == [0, 1, 2, 3]
+    first = other.claim("w1")
+    assert first.task_id == "high" and first.status == "running" and first.worker == "w1"
+    assert backend.get_job("high").status == "running"
+    assert backend.queue_position("high") is None
+    assert [backend.claim("w2").task_id, other.claim("w1").task_id, backend.claim("w2").task_id] == \
+        ["high2", "mid", "low"]
+    assert other.claim("w1") is None
+
+
+def test_job_round_trip(backend, db_path):
+    job = ScanJob(task_id="t1", path="/data", mode="sample", sample_rate=0.1, seed=7, priority=2)
+    backend.submit(job)
+    loaded = SQLiteStateBackend(db_path).get_job("t1")
+    assert loaded.model_dump() == job.model_dump()
+    assert backend.get_job("missing") is None
+
+
+def test_cancel_queued_and_running(backend, db_path):
+    other = SQLiteStateBackend(db_path)
+    backend.submit(_job("queued", 0, 0))
+    backend.submit(_job("running", 1, 1))
+    backend.claim("w")
+
+    job = other.cancel("queued")
+    assert job.status == "cancelled" and job.finished_at is not None
+    assert backend.latest("queued")[1].status == "cancelled"
+    assert backend.claim("w") is None
+
+    job = other.cancel("running")
+    assert job.status == "running" and job.cancel_requested
+    assert backend.get_job("running").cancel_requested
+    assert other.cancel("missing") is None
+
+
+def test_progress_round_trip_and_replay_limit(backend, db_path):
+    other = SQLiteStateBackend(db_path, replay_size=3)
+    backend.submit(_job("t1"))
+    ids = [other.publish(ScanProgress(task_id="t1", status="scanning", processed_count=i, total_count=5,
+                                      current_file=f"f{i}.txt", percentage=i * 20.0))
+           for i in range(1, 5)]
+    events = backend.events("t1")
+    # 每个任务只保留最近 replay_size 个事件(含提交时的排队事件)
+    assert [event_id for event_id, _ in events] == ids[-3:]
+    event_id, progress = backend.latest("t1")
+    assert event_id == ids[-1]
+    assert progress.model_dump() == ScanProgress(
+        task_id="t1", status="scanning", processed_count=4, total_count=5,
+        current_file="f4.txt", percentage=80.0).model_dump()
+    assert [p.processed_count for _, p in backend.events("t1", after_id=ids[-2])] == [4]
+    assert backend.latest("missing") is None
+
+
+def test_resubmit_clears_progress(backend):
+    backend.submit(_job("t1"))
+    backend.publish(ScanProgress(task_id="t1", status="scanning"))
+    backend.submit(_job("t1"))
+    assert [p.status for _, p in backend.events("t1")] == ["queued"]
+
+
+def test_job_counts_and_finished_retention(backend, db_path):
+    for i in range(5):
+        backend.submit(_job(f"t{i}", offset=i))
+    counts = SQLiteStateBackend(db_path).job_counts()
+    assert counts == {"queued": 5}
+
+    for i in range(4):
+        backend.claim("w")
+    backend.finish("t0", "completed")
+    backend.finish("t1", "error", "boom")
+    assert backend.job_counts() == {"queued": 1, "running": 2, "completed": 1, "error": 1}
+    assert backend.get_job("t1").error == "boom"
+
+    # 超出 max_finished_tasks 的旧任务连同进度一起清理
+    time.sleep(0.01)
+    backend.finish("t2", "completed")
+    assert backend.get_job("t0") is None
+    assert backend.events("t0") == []
+    assert backend.job_counts() == {"queued": 1, "running": 1, "completed": 1, "error": 1}
+    assert [j.task_id for j in backend.list_jobs(["completed", "error"])] == ["t2", "t1"]
+
+
+def test_version_changes_on_other_connection_commit(backend, db_path):
+    other = SQLiteStateBackend(db_path)
+    version = backend.version()
+    other.submit(_job("t1"))
+    assert backend.wait(version, 2.0) != version
+    version = backend.version()
+    backend.publish(ScanProgress(task_id="t1", status="scanning"))
+    assert backend.version() != version
+
+
+def test_metrics_snapshots_retention(backend, db_path):
+    other = SQLiteStateBackend(db_path)
+    backend.put_metrics("api:1", {"counters": {"a": 1}})
+    other.put_metrics("worker:2", {"counters": {"b": 2}})
+    backend.put_metrics("api:1", {"counters": {"a": 3}})
+    snapshots = {process: data for process, _, data in other.metrics_snapshots(60)}
+    assert snapshots == {"api:1": {"counters": {"a": 3}}, "worker:2": {"counters": {"b": 2}}}
+
+    # 超过 max_age 未上报的进程被清理
+    time.sleep(0.05)
+    other.put_metrics("worker:2", {"counters": {"b": 4}})
+    assert [process for process, _, _ in backend.metrics_snapshots(0.04)] == ["worker:2"]
+    assert [process for process, _, _ in other.metrics_snapshots(60)] == ["worker:2"]
+
+
+def test_put_metrics_keeps_local_version(backend):
+    version = backend.version()
+    backend.put_metrics("api:1", {})
+    assert backend.version() == version
@@ -0,0 +1,149 @@
+"""统计分析: Welford 矩与 DDSketch 分位数的合并"""
+import math
+import random
+import statistics
+
+import pytest
+
+from models.schemas import DocumentMetrics, FileAnalysis, FileInfo, FileType
+from scanner.analyzers.stats_analyzer import QuantileSketch, RunningMoments, StatsAnalyzer
+
+
+def _values(n: int = 5000, seed: int = 7):
+    rng = random.Random(seed)
+    return [int(rng.lognormvariate(7, 1.5)) for _ in range(n)]
+
+
+def _split(values, parts: int = 3):
+    return [values[i::parts] for i in range(parts)]
+
+
+def _exact_quantile(sorted_values, q: float) -> float:
+    # 与草图相同的秩定义: 第 floor(q*(n-1)) 个值
+    return sorted_values[int(q * (len(sorted_values) - 1))]
+
+
+def test_moments_merge_matches_statistics():
+    values = [float(v) for v in _values()]
+    merged = RunningMoments()
+    for part in _split(values):
+        m = RunningMoments()
+        for x in part:
+            m.add(x)
+        merged.merge(m)
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(statistics.fmean(values), rel=1e-12)
+    assert merged.variance == pytest.approx(statistics.pvariance(values), rel=1e-9)
+    assert (merged.min, merged.max) == (min(values), max(values))
+
+
+def test_moments_merge_with_empty():
+    a = RunningMoments()
+    for x in (1.0, 2.0, 6.0):
+        a.add(x)
+    empty = RunningMoments()
+    empty.merge(a)
+    a.merge(RunningMoments())
+    for m in (a, empty):
+        assert (m.count, m.mean, m.min, m.max) == (3, 3.0, 1.0, 6.0)
+        assert m.variance == pytest.approx(statistics.pvariance([1, 2, 6]))
+
+
+@pytest.mark.parametrize('alpha', [0.01, 0.05])
+def test_sketch_merge_within_relative_accuracy(alpha):
+    values = _values() + [0] * 50
+    merged = QuantileSketch(relative_accuracy=alpha, max_buckets=4096)
+    for part in _split(values):
+        sketch = QuantileSketch(relative_accuracy=alpha, max_buckets=4096)
+        for x in part:
+            sketch.add(x)
+        merged.merge(sketch)
+
+    assert merged.count == len(values)
+    exact = sorted(values)
+    for q in (0.0, 0.01, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0):
+        expected = _exact_quantile(exact, q)
+        actual = merged.quantile(q)
+        if expected == 0:
+            assert actual == 0
+        else:
+            assert abs(actual - expected) <= alpha * expected * (1 + 1e-9), q
+
+
+def test_sketch_merge_equals_single_sketch():
+    values = _values(2000)
+    single = QuantileSketch(relative_accuracy=0.01, max_buckets=4096)
+    for x in values:
+        single.add(x)
+    merged = QuantileSketch(relative_accuracy=0.01, max_buckets=4096)
+    for part in _split(values, 4):
+        s = QuantileSketch(relative_accuracy=0.01, max_buckets=4096)
+        for x in part:
+            s.add(x)
+        merged.merge(s)
+    assert merged.buckets == single.buckets
+    assert merged.zero_count == single.zero_count
+
+
+def test_sketch_merge_rejects_different_accuracy():
+    with pytest.raises(ValueError):
+        QuantileSketch(relative_accuracy=0.01).merge(QuantileSketch(relative_accuracy=0.02))
+
+
+def test_sketch_collapse_keeps_upper_quantiles():
+    values = [1.1 ** i for i in range(200)]
+    sketch = QuantileSketch(relative_accuracy=0.01, max_buckets=50)
+    for x in values:
+        sketch.add(x)
+    assert len(sketch.buckets) == 50
+    expected = _exact_quantile(values, 0.99)
+    assert sketch.quantile(0.99) == pytest.approx(expected, rel=0.01)
+
+
+def test_empty_sketch():
+    assert QuantileSketch().quantile(0.5) == 0.0
+
+
+def _analysis(chars: int, tables: int = 0, ok: bool = True) -> FileAnalysis:
+    info = FileInfo(path='/tmp/a.txt', name='a.txt', extension='.txt', size=chars,
+                    file_type=FileType.TXT, parse_success=ok)
+    return FileAnalysis(file_info=info, metrics=DocumentMetrics(char_count=chars, table_count=tables))
+
+
+def test_accumulator_merge_matches_single_pass():
+    analyses = [_analysis(c, tables=i % 3) for i, c in enumerate(_values(300))]
+    analyses.append(_analysis(0, ok=False))
+    analyzer = StatsAnalyzer()
+    expected = analyzer.analyze(analyses)
+
+    merged = analyzer.accumulator()
+    for part in _split(analyses):
+        acc = analyzer.accumulator()
+        for a in part:
+            acc.add(a)
+        merged.merge(acc)
+    result = merged.result()
+
+    assert result['structure_stats'] == expected['structure_stats']
+    got, want = result['length_stats'], expected['length_stats']
+    assert (got.min, got.max, got.median, got.p99) == (want.min, want.max, want.median, want.p99)
+    assert got.mean == pytest.approx(want.mean)
+    assert got.std == pytest.approx(want.std)
+    assert sum(getattr(got, f) for f in ('under_500', 'range_500_2000', 'range_2000_5000',
+                                         'range_5000_10000', 'over_10000')) == 300
+    assert math.isclose(got.mean, statistics.fmean(a.metrics.char_count for a in analyses[:-1]))
+
+
+@pytest.mark.parametrize('values', [
+    [850] * 20,
+    [1, 2, 3, 850],
+    [0, 0, 0, 5],
+    _values(500, seed=11),
+])
+def test_length_quantiles_within_observed_range(values):
+    acc = StatsAnalyzer().accumulator()
+    for v in values:
+        acc.add(_analysis(v))
+    stats = acc.length_stats()
+    assert stats.min <= stats.p25 <= stats.median <= stats.p75 <= stats.p90 <= stats.p99 <= stats.max
+    assert (stats.min, stats.max) == (min(values), max(values))
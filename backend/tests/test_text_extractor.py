@@ -0,0 +1,113 @@
+"""纯文本提取: 编码探测与大文件分块增量解码"""
+import codecs
+import io
+
+import pytest
+
+from config.settings import settings
+from models.schemas import FileInfo, FileType
+from scanner.extractors.text_extractor import TextExtractor, detect_encoding
+
+
+SAMPLE = (
+    "# 文档健康检查\n\n"
+    "第一段: 中文与 English words 混排, 包含全角标点。\n"
+    "  ## 二级标题\n"
+    "emoji 😀 占四个字节, 跨块时不能被拆坏\n\n"
+    "最后一行没有换行符"
+)
+
+
+def _info(ext: str = '.md') -> FileInfo:
+    return FileInfo(path=f'/tmp/t{ext}', name=f't{ext}', extension=ext, size=0, file_type=FileType.MD)
+
+
+def _extract(data: bytes, ext: str = '.md', as_file=None):
+    info = _info(ext)
+    source = as_file if as_file is not None else io.BytesIO(data)
+    metrics, text = TextExtractor().extract_with_text(source, info)
+    assert info.parse_success, info.parse_error
+    return metrics, text
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    """把阈值和分块调小, 让小样本也走分块增量解码"""
+    def configure(chunk_bytes: int, max_text_bytes: int = 1 << 20):
+        monkeypatch.setattr(settings.text, 'mmap_threshold', 8)
+        monkeypatch.setattr(settings.text, 'chunk_bytes', chunk_bytes)
+        monkeypatch.setattr(settings.text, 'max_text_bytes', max_text_bytes)
+    return configure
+
+
+def _counts(metrics):
+    return metrics.char_count, metrics.word_count, metrics.paragraph_count, metrics.heading_count
+
+
+@pytest.mark.parametrize('chunk_bytes', [1, 2, 3, 5, 7, 64])
+@pytest.mark.parametrize('encoding', ['utf-8', 'utf-8-sig', 'utf-16'])
+def test_streaming_matches_whole_file(streaming, chunk_bytes, encoding):
+    data = SAMPLE.encode(encoding)
+    expected_metrics, expected_text = _extract(data)
+    assert expected_text == SAMPLE
+
+    streaming(chunk_bytes)
+    metrics, text = _extract(data)
+    # 多字节字符跨块边界时由增量解码器拼接, 不产生替换字符
+    assert text == SAMPLE
+    assert '�' not in text
+    assert _counts(metrics) == _counts(expected_metrics)
+
+
+def test_streaming_gb18030(streaming):
+    text = ("中文文档编码探测测试, 这是一段比较长的简体中文内容, 用于覆盖国标编码。\n" * 40)
+    data = text.encode('gb18030')
+    expected_metrics, expected_text = _extract(data, '.txt')
+    assert expected_text == text
+
+    streaming(5)
+    metrics, streamed = _extract(data, '.txt')
+    assert streamed == text
+    assert _counts(metrics) == _counts(expected_metrics)
+
+
+def test_streaming_truncates_text_but_counts_everything(streaming):
+    data = ('段落一行\n' * 200).encode('utf-8')
+    expected_metrics, _ = _extract(data)
+    streaming(16, max_text_bytes=64)
+    metrics, text = _extract(data)
+    assert _counts(metrics) == _counts(expected_metrics)
+    assert 64 <= len(text.encode('utf-8')) < 64 + 16 + 4
+    assert ('段落一行\n' * 200).startswith(text)
+
+
+def test_streaming_from_disk_uses_mmap(streaming, tmp_path):
+    path = tmp_path / 'big.log'
+    path.write_bytes(SAMPLE.encode('utf-8'))
+    streaming(3)
+    metrics, text = _extract(b'', '.log', as_file=path)
+    assert text == SAMPLE
+    assert metrics.heading_count == 0
+
+
+@pytest.mark.parametrize('data, expected', [
+    (codecs.BOM_UTF8 + '中文'.encode('utf-8'), 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE + '中文'.encode('utf-16-le'), 'utf-16'),
+    (codecs.BOM_UTF16_BE + '中文'.encode('utf-16-be'), 'utf-16'),
+    ('plain ascii'.encode('utf-8'), 'utf-8'),
+])
+def test_detect_encoding_bom_and_utf8(data, expected):
+    assert detect_encoding(data) == expected
+
+
+def test_detect_encoding_truncated_sample():
+    # 采样末尾截断在多字节字符中间, 仍判定为UTF-8
+    sample = ('中文内容' * 20).encode('utf-8')[:-1]
+    assert detect_encoding(sample, complete=False) == 'utf-8'
+
+
+def test_detect_encoding_gb18030():
+    text = "中文文档编码探测测试, 这是一段比较长的简体中文内容, 用于覆盖国标编码。" * 10
+    encoding = detect_encoding(text.encode('gb18030'))
+    assert codecs.lookup(encoding).name in ('gb2312', 'gbk', 'gb18030')
+    assert text.encode('gb18030').decode(encoding) == text
@@ -1,10 +1,16 @@
 
+import heapq
 import json
 import os
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader
+from functools import lru_cache
+from typing import Any, Dict, Iterator
+from jinja2 import Environment, FileSystemLoader, Template
 from models.schemas import ScanResult
 
+REPORT_TEMPLATE = 'report_template.html'
+TOP_FILES = 10
+
 def format_size(size_bytes: int) -> str:
     if size_bytes < 1024:
         return f"{size_bytes} B"
@@ -13,25 +19,45 @@ def format_size(size_bytes: int) -> str:
     else:
         return f"{size_bytes / (1024 * 1024):.1f} MB"
 
+@lru_cache(maxsize=None)
+def load_report_template(template_dir: str) -> Template:
+    """加载并编译报告模板(每个模板目录只编译一次)"""
+    env = Environment(loader=FileSystemLoader(template_dir))
+    return env.get_template(REPORT_TEMPLATE)
+
+
 def generate_export_html(result: ScanResult, template_dir: str) -> str:
     """
     根据扫描结果生成HTML导出报告
     """
-    # 初始化Jinja2环境
-    env = Environment(loader=FileSystemLoader(template_dir))
-    template = env.get_template('report_template.html')
+    return ''.join(iter_export_html(result, template_dir))
+
+
+def iter_export_html(result: ScanResult, template_dir: str) -> Iterator[str]:
+    """逐段渲染HTML导出报告(Template.generate), 首段产出前才开始统计"""
+    template = load_report_template(template_dir)
+    yield from template.generate(**build_report_context(result))
+
 
+def build_report_context(result: ScanResult) -> Dict[str, Any]:
+    """
+    计算报告模板所需的数据
+    """
     # 1. 概况数据 (Overview)
     total_size_mb = f"{result.total_size / (1024 * 1024):.1f}"
     
+    # 文件清单以列式表保存, 直接按列统计
+    table = result.file_table
+    
     # 需OCR文件 (Scan PDF)
-    ocr_files = result.ocr_files or []
-    ocr_count = len(ocr_files)
+    ocr_count = sum(table.column('needs_ocr'))
     
     # 解析失败/需审核文件
     # review_files 可能包含 failed 和 complex，这里严格筛选 parse_success=False
-    review_files = result.review_files or []
-    failed_count = sum(1 for f in review_files if not f.file_info.parse_success)
+    failed_count = sum(
+        1 for review, ok in zip(table.column('needs_review'), table.column('parse_success'))
+        if review and not ok
+    )
     
     # 计算可解析率
     parse_success_rate = 0
@@ -63,27 +89,30 @@ def generate_export_html(result: ScanResult, template_dir: str) -> str:
         'ocr_count': ocr_count,
         'failed_count': failed_count,
         'similar_groups': len(result.similar_groups),
+        'ocr_pages': f"{result.ocr_workload.total_pages:,}",
+        'ocr_megapixels': f"{result.ocr_workload.total_megapixels:,.1f}",
     }
 
     # 5. Top 10 复杂文件 (脱敏)
     # 策略：按文件大小降序，优先展示非 Simple 类型的文件
-    all_files = result.files or []
+    sizes = table.column('size')
+    categories = table.column('category')
+    simple = table.code('simple')
     
-    # 按大小降序
-    sorted_by_size = sorted(all_files, key=lambda f: f.file_info.size, reverse=True)
-    
-    # 优先选出 非Simple 的 (Complex / Medium)
-    complex_candidates = [f for f in sorted_by_size if f.category.value != 'simple']
-    
-    # 取前10个
-    top_candidates = complex_candidates[:10]
-    # 如果不足10个，用剩余的大文件补足
-    if len(top_candidates) < 10:
-        remaining = [f for f in sorted_by_size if f not in top_candidates]
-        top_candidates.extend(remaining[:(10 - len(top_candidates))])
+    # 优先选出 非Simple 的 (Complex / Medium), 按大小降序取前10个(堆选择, 不排序全表)
+    size_of = sizes.__getitem__
+    top_candidates = heapq.nlargest(
+        TOP_FILES, (i for i in range(len(table)) if categories[i] != simple), key=size_of
+    )
+    # 如果不足10个，用剩余的大文件(即 Simple 文件)补足
+    if len(top_candidates) < TOP_FILES:
+        top_candidates.extend(heapq.nlargest(
+            TOP_FILES - len(top_candidates),
+            (i for i in range(len(table)) if categories[i] == simple), key=size_of
+        ))
         
     top_files_data = []
-    for idx, f in enumerate(top_candidates):
+    for idx, f in enumerate(table.rows(top_candidates)):
         # 格式化 metrics 字符串
         metrics_parts = []
         metrics_parts.append(f"{f.metrics.char_count} chars")
@@ -105,7 +134,7 @@ def generate_export_html(result: ScanResult, template_dir: str) -> str:
             'id': f"FILE_{str(idx+1).zfill(4)}_{ext}",
             'type': f.file_info.file_type.value,
             'size': format_size(f.file_info.size),
-            'tag': f.quality_tag,
+            'tag': f.quality_tag or '',
             'metrics': metrics_str
         })
 
@@ -128,8 +157,7 @@ def generate_export_html(result: ScanResult, template_dir: str) -> str:
         'length': len_dist
     })
 
-    # 渲染HTML
-    html_content = template.render(
+    return dict(
         generated_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         total_files=f"{result.total_files:,}",
         total_size_mb=total_size_mb,
@@ -140,5 +168,3 @@ def generate_export_html(result: ScanResult, template_dir: str) -> str:
         top_files=top_files_data,
         charts_data=charts_data
     )
-    
-    return html_content
@@ -0,0 +1,92 @@
+"""
+JSON 序列化工具 - 优先使用 orjson(可选依赖), 未安装时回退到标准库 json
+
+完整扫描结果按字段逐段输出, 文件清单直接从列式表按批编码, 不构建整份 Pydantic 对象。
+"""
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterator, List
+
+from pydantic import BaseModel
+
+from models.schemas import ScanResult, DocumentCategory
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode='json')
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """编码为 JSON 字节串"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: bytes) -> Any:
+    """解码 JSON 字节串"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# 由列式表逐行输出的字段
+_ROW_LISTS = ('files', 'ocr_files', 'review_files')
+
+
+def iter_result_json(result: ScanResult, batch_size: int = 1000) -> Iterator[bytes]:
+    """
+    逐段输出完整扫描结果的 JSON(与 result.materialize() 的序列化结果等价)
+
+    Args:
+        batch_size: 文件清单每批编码的行数
+    """
+    table = result.file_table
+    rows_of = {
+        'files': range(len(table)),
+        'ocr_files': table.flagged('needs_ocr'),
+        'review_files': table.flagged('needs_review'),
+    }
+
+    yield b'{'
+    for i, name in enumerate(ScanResult.model_fields):
+        yield (b',' if i else b'') + dumps(name) + b':'
+        if name in _ROW_LISTS:
+            yield from _iter_rows(table, rows_of[name], batch_size)
+        elif name == 'category_stats':
+            yield dumps(_category_stats(result))
+        else:
+            yield dumps(result.model_dump(mode='json', include={name})[name])
+    yield b'}'
+
+
+def _iter_rows(table, rows, batch_size: int) -> Iterator[bytes]:
+    yield b'['
+    for start in range(0, len(rows), batch_size):
+        batch = [dumps(table.row_dict(row)) for row in rows[start:start + batch_size]]
+        yield (b',' if start else b'') + b','.join(batch)
+    yield b']'
+
+
+def _category_stats(result: ScanResult) -> Dict[str, Any]:
+    """分类统计(文件清单由列式表构建, 未分类计入复杂, 与 materialize 一致)"""
+    table = result.file_table
+    stats = result.category_stats.model_dump(mode='json')
+    files: Dict[str, List[str]] = {c.value: [] for c in DocumentCategory}
+    for path, category in zip(table.values('path'), table.values('category')):
+        files[(category or DocumentCategory.COMPLEX).value].append(path)
+    for category, paths in files.items():
+        stats[f'{category}_files'] = paths
+    return stats
@@ -0,0 +1,182 @@
+"""
+文件清单导出 - 逐文件的处理决策(质量标签/分类/是否OCR/重复哈希等), 供下游入库任务按文件分流
+
+支持 CSV / JSONL / Parquet, 直接从列式表按批读取并逐段输出, 不构建完整的对象列表。
+Parquet 依赖可选包 pyarrow。
+"""
+import csv
+import io
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from models.schemas import ScanResult
+from models.result_table import (
+    FileTable, KIND_BOOL, KIND_INT, KIND_FLOAT, KIND_TIME, KIND_STR, KIND_ENUM, KIND_OBJECT
+)
+from .json_utils import dumps
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - 可选依赖
+    pyarrow = None
+
+
+# 默认导出的列(列式表的扁平列名) + 派生列 is_duplicate
+MANIFEST_COLUMNS = (
+    'path', 'name', 'extension', 'size', 'modified_time', 'file_type', 'archive_path',
+    'parse_success', 'parse_error', 'is_encrypted', 'is_corrupted',
+    'category', 'quality_tag', 'needs_ocr', 'needs_review',
+    'file_hash', 'is_duplicate',
+    'char_count', 'page_count', 'scan_page_count', 'token_count', 'chunk_count', 'noise_ratio',
+)
+
+# 格式 -> (媒体类型, 扩展名)
+MANIFEST_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+DUPLICATE_COLUMN = 'is_duplicate'
+
+
+class ManifestWriter:
+    """按批读取列式表并编码为清单格式"""
+
+    def __init__(self, result: ScanResult, columns: Optional[Sequence[str]] = None,
+                 batch_size: int = 5000):
+        """
+        Raises:
+            ValueError: 未知的列
+        """
+        self.table: FileTable = result.file_table
+        self.columns: List[str] = list(columns or MANIFEST_COLUMNS)
+        self.batch_size = batch_size
+        for name in self.columns:
+            col = self.table.columns.get(name)
+            if name != DUPLICATE_COLUMN and (col is None or col.kind == KIND_OBJECT):
+                raise ValueError(f"未知的列: {name}")
+
+        # 内容哈希出现多次即为重复(与目录树汇总一致)
+        self._duplicated = set()
+        if DUPLICATE_COLUMN in self.columns:
+            hashes = self.table.column('file_hash')
+            empty = self.table.code("")
+            self._duplicated = {h for h, n in Counter(hashes).items() if n > 1 and h >= 0 and h != empty}
+
+    def iter_format(self, fmt: str) -> Iterator[bytes]:
+        """
+        Raises:
+            ValueError: 不支持的格式
+            RuntimeError: 缺少可选依赖
+        """
+        if fmt == 'csv':
+            return self.iter_csv()
+        if fmt == 'jsonl':
+            return self.iter_jsonl()
+        if fmt == 'parquet':
+            if pyarrow is None:
+                raise RuntimeError("导出 Parquet 需要安装 pyarrow")
+            return self.iter_parquet()
+        raise ValueError(f"不支持的清单格式: {fmt}")
+
+    # ---- 按批解码 ----
+
+    def _batches(self) -> Iterator[Dict[str, List[Any]]]:
+        """每批返回 列名 -> 值列表(字符串/枚举列解码为字符串, 时间列解码为 datetime)"""
+        table = self.table
+        for start in range(0, len(table), self.batch_size):
+            rows = range(start, min(start + self.batch_size, len(table)))
+            yield {name: self._values(name, rows) for name in self.columns}
+
+    def _values(self, name: str, rows: range) -> List[Any]:
+        table = self.table
+        if name == DUPLICATE_COLUMN:
+            hashes = table.column('file_hash')
+            return [hashes[r] in self._duplicated for r in rows]
+        col = table.columns[name]
+        data = col.data
+        if col.kind in (KIND_STR, KIND_ENUM):
+            get = table.strings.get
+            return [get(data[r]) for r in rows]
+        if col.kind == KIND_TIME:
+            return [None if math.isnan(data[r]) else datetime.fromtimestamp(data[r]) for r in rows]
+        if col.kind == KIND_BOOL:
+            return [bool(data[r]) for r in rows]
+        return [data[r] for r in rows]
+
+    # ---- 各格式 ----
+
+    def iter_csv(self) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.columns)
+        for batch in self._batches():
+            for row in zip(*(batch[name] for name in self.columns)):
+                writer.writerow(['' if v is None else v.isoformat() if isinstance(v, datetime) else v for v in row])
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+    def iter_jsonl(self) -> Iterator[bytes]:
+        names = self.columns
+        for batch in self._batches():
+            lines = [dumps(dict(zip(names, row))) for row in zip(*(batch[name] for name in names))]
+            yield b'\n'.join(lines) + b'\n'
+
+    def iter_parquet(self) -> Iterator[bytes]:
+        """每批写一个行组, 写完即输出已编码的字节"""
+        schema = pyarrow.schema([(name, self._arrow_type(name)) for name in self.columns])
+        sink = _DrainableBuffer()
+        with pyarrow.parquet.ParquetWriter(sink, schema, compression='zstd') as writer:
+            for batch in self._batches():
+                writer.write_table(pyarrow.Table.from_pydict(batch, schema=schema))
+                data = sink.drain()
+                if data:
+                    yield data
+        yield sink.drain()
+
+    def _arrow_type(self, name: str):
+        if name == DUPLICATE_COLUMN:
+            return pyarrow.bool_()
+        kind = self.table.columns[name].kind
+        if kind == KIND_BOOL:
+            return pyarrow.bool_()
+        if kind == KIND_INT:
+            return pyarrow.int64()
+        if kind == KIND_FLOAT:
+            return pyarrow.float64()
+        if kind == KIND_TIME:
+            return pyarrow.timestamp('us')
+        return pyarrow.string()
+
+
+class _DrainableBuffer(io.RawIOBase):
+    """只追加的内存输出流, 已写入的数据可随时取走(不支持 seek)"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
@@ -0,0 +1,362 @@
+"""
+运行指标 - 进程内的计数器/仪表/直方图, 以 Prometheus 文本格式输出
+
+- 每个进程一个注册表(REGISTRY), 采集点只做加法和一次二分查找, 开销可忽略
+- 扫描子进程按增量(snapshot(reset=True))把指标回传调度线程, 合并进父进程注册表
+- 各进程定期把快照写入状态后端, /api/metrics 合并所有进程的快照后输出;
+  计数器和直方图按进程求和, 仪表只取最近仍在上报的进程; 队列深度等取自状态后端的当前值
+"""
+import bisect
+import math
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config.settings import settings
+
+
+# 默认直方图分桶(秒): 覆盖 0.5ms 的哈希到数分钟的整次扫描
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+
+class _Metric:
+    """带标签的指标; labels() 返回按标签值缓存的子指标"""
+
+    kind = ''
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._registry.lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+
+class _Value:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self, lock: threading.Lock):
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _Buckets:
+    __slots__ = ('_lock', '_bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, lock: threading.Lock, bounds: Tuple[float, ...]):
+        self._lock = lock
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # 最后一个为 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Counter(_Metric):
+    kind = COUNTER
+
+    def _new_child(self):
+        return _Value(self._registry.lock)
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = GAUGE
+
+    def _new_child(self):
+        return _Value(self._registry.lock)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    kind = HISTOGRAM
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str,
+                 labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _Buckets(self._registry.lock, self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+
+class MetricsRegistry:
+    """进程内的指标注册表"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self, reset: bool = False, include_gauges: bool = True) -> Dict[str, Any]:
+        """
+        导出为可 JSON 序列化的快照
+
+        Args:
+            reset: 导出后把计数器和直方图清零(按增量回传时使用)
+            include_gauges: 是否包含仪表(增量回传时不含)
+        """
+        snapshot = {}
+        with self.lock:
+            for name, metric in self.metrics.items():
+                if metric.kind == GAUGE and not include_gauges:
+                    continue
+                samples = []
+                for values, child in metric._children.items():
+                    if metric.kind == HISTOGRAM:
+                        if child.count:
+                            samples.append([list(values), list(child.counts), child.sum, child.count])
+                        if reset:
+                            child.counts = [0] * len(child.counts)
+                            child.sum = 0.0
+                            child.count = 0
+                    else:
+                        if child.value or metric.kind == GAUGE:
+                            samples.append([list(values), child.value])
+                        if reset and metric.kind == COUNTER:
+                            child.value = 0.0
+                entry = {'type': metric.kind, 'help': metric.documentation,
+                         'labels': list(metric.labelnames), 'samples': samples}
+                if metric.kind == HISTOGRAM:
+                    entry['buckets'] = list(metric.buckets)
+                snapshot[name] = entry
+        return snapshot
+
+    def merge(self, snapshot: Dict[str, Any]):
+        """把其他进程的增量快照累加进来(只合并本注册表已定义的计数器和直方图)"""
+        for name, entry in snapshot.items():
+            metric = self.metrics.get(name)
+            if metric is None or metric.kind != entry['type'] or metric.kind == GAUGE:
+                continue
+            for sample in entry['samples']:
+                child = metric.labels(*sample[0])
+                with self.lock:
+                    if metric.kind == COUNTER:
+                        child.value += sample[1]
+                    elif len(sample[1]) == len(child.counts):
+                        child.counts = [a + b for a, b in zip(child.counts, sample[1])]
+                        child.sum += sample[2]
+                        child.count += sample[3]
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """合并多个进程的快照: 同名同标签的样本求和"""
+    merged: Dict[str, Any] = {}
+    for snapshot in snapshots:
+        for name, entry in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = {**entry, 'samples': {}}
+            samples = target['samples']
+            for sample in entry['samples']:
+                key = tuple(sample[0])
+                existing = samples.get(key)
+                if existing is None:
+                    samples[key] = [list(sample[0])] + [list(v) if isinstance(v, list) else v for v in sample[1:]]
+                elif entry['type'] == HISTOGRAM:
+                    if len(existing[1]) == len(sample[1]):
+                        existing[1] = [a + b for a, b in zip(existing[1], sample[1])]
+                        existing[2] += sample[2]
+                        existing[3] += sample[3]
+                else:
+                    existing[1] += sample[1]
+    for entry in merged.values():
+        entry['samples'] = list(entry['samples'].values())
+    return merged
+
+
+def render(snapshot: Dict[str, Any]) -> str:
+    """输出 Prometheus 文本格式(0.0.4)"""
+    lines: List[str] = []
+    for name in sorted(snapshot):
+        entry = snapshot[name]
+        labelnames = entry['labels']
+        lines.append(f"# HELP {name} {_escape_help(entry['help'])}")
+        lines.append(f"# TYPE {name} {entry['type']}")
+        for sample in sorted(entry['samples'], key=lambda s: s[0]):
+            labels = list(zip(labelnames, sample[0]))
+            if entry['type'] == HISTOGRAM:
+                cumulative = 0
+                bounds = [_format_value(b) for b in entry['buckets']] + ['+Inf']
+                for bound, count in zip(bounds, sample[1]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels + [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(sample[2])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {sample[3]}")
+            else:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(sample[1])}")
+    return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels: List[Tuple[str, str]]) -> str:
+    if not labels:
+        return ''
+    body = ','.join(f'{k}="{_escape_label(str(v))}"' for k, v in labels)
+    return '{' + body + '}'
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if value.is_integer():
+            return str(int(value))
+    return repr(value)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _escape_label(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+# ---- 指标定义 ----
+
+REGISTRY = MetricsRegistry()
+
+FILES_PROCESSED = REGISTRY.counter(
+    'dhc_files_processed_total', '已处理的文件数(按文件类型; rate() 即每秒文件数)', ['file_type'])
+BYTES_PROCESSED = REGISTRY.counter(
+    'dhc_bytes_processed_total', '已处理的文件字节数(按文件类型; rate() 即每秒字节数)', ['file_type'])
+EXTRACT_SECONDS = REGISTRY.histogram(
+    'dhc_extract_seconds', '单个文件的解析耗时(按提取器)', ['extractor'])
+HASH_SECONDS = REGISTRY.histogram(
+    'dhc_hash_seconds', '单个文件的内容哈希耗时')
+SIMHASH_SECONDS = REGISTRY.histogram(
+    'dhc_simhash_seconds', '单个文档的 SimHash 计算耗时')
+SIMILARITY_GROUPING_SECONDS = REGISTRY.histogram(
+    'dhc_similarity_grouping_seconds', '每次扫描的相似文档分组耗时')
+SCANS = REGISTRY.counter(
+    'dhc_scans_total', '结束的扫描任务数(按模式和结束状态)', ['mode', 'status'])
+SCAN_SECONDS = REGISTRY.histogram(
+    'dhc_scan_seconds', '扫描任务的执行耗时(按模式)', ['mode'])
+CACHE_REQUESTS = REGISTRY.counter(
+    'dhc_cache_requests_total', '缓存查询次数(按缓存和是否命中)', ['cache', 'result'])
+WORKER_SLOTS = REGISTRY.gauge(
+    'dhc_worker_slots', '扫描执行槽位数(扫描子进程数)')
+WORKER_BUSY = REGISTRY.gauge(
+    'dhc_worker_busy', '正在执行任务的槽位数')
+WORKER_BUSY_SECONDS = REGISTRY.counter(
+    'dhc_worker_busy_seconds_total', '执行槽位累计忙碌秒数(rate() / 槽位数 即利用率)')
+
+
+def cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def process_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class MetricsPublisher:
+    """后台线程: 定期把本进程的指标快照写入状态后端"""
+
+    def __init__(self, backend, interval: Optional[float] = None):
+        self.backend = backend
+        self.interval = settings.metrics.publish_interval if interval is None else interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'MetricsPublisher':
+        if settings.metrics.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='metrics-publisher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        name = process_name()
+        while not self._stop.wait(self.interval):
+            try:
+                self.backend.put_metrics(name, REGISTRY.snapshot())
+            except Exception:
+                pass  # 状态库暂时不可写时等下一轮
+
+
+def collect(backend) -> Dict[str, Any]:
+    """合并所有进程的快照(先写入本进程的最新快照), 并补充状态后端的队列状态"""
+    config = settings.metrics
+    backend.put_metrics(process_name(), REGISTRY.snapshot())
+    now = time.time()
+    snapshots = []
+    live = 0
+    for _, updated, snapshot in backend.metrics_snapshots(config.retention_hours * 3600):
+        if now - updated <= config.stale_seconds:
+            live += 1
+        else:
+            # 已退出的进程: 保留累计值, 仪表不再计入
+            snapshot = {name: entry for name, entry in snapshot.items() if entry['type'] != GAUGE}
+        snapshots.append(snapshot)
+    merged = merge_snapshots(snapshots)
+
+    counts = backend.job_counts()
+    merged['dhc_queue_depth'] = _gauge_entry('排队等待执行的扫描任务数', counts.get('queued', 0))
+    merged['dhc_active_scans'] = _gauge_entry('正在执行的扫描任务数', counts.get('running', 0))
+    merged['dhc_metrics_processes'] = _gauge_entry('仍在上报指标的进程数', live)
+    return merged
+
+
+def _gauge_entry(documentation: str, value: float) -> Dict[str, Any]:
+    return {'type': GAUGE, 'help': documentation, 'labels': [], 'samples': [[[], value]]}